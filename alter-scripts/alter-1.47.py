@@ -0,0 +1,186 @@
+import os
+import sys
+
+import django
+
+from connection import execute
+
+os.chdir('..')
+sys.path.append(os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mulearnbackend.settings')
+django.setup()
+
+
+def create_monthly_leaderboard():
+    execute("""
+        CREATE TABLE IF NOT EXISTS monthly_leaderboard (
+            id          VARCHAR(36) PRIMARY KEY NOT NULL,
+            month       CHAR(7)     NOT NULL,
+            type        VARCHAR(10) NOT NULL,
+            `rank`      INT         NOT NULL,
+            user_id     VARCHAR(36),
+            org_id      VARCHAR(36),
+            full_name   VARCHAR(150),
+            code        VARCHAR(12),
+            institution VARCHAR(100),
+            total_karma INT         NOT NULL DEFAULT 0,
+            students    INT,
+            created_at  DATETIME    NOT NULL,
+            CONSTRAINT MonthTypeRank UNIQUE (month, type, `rank`),
+            CONSTRAINT fk_monthly_leaderboard_ref_user_id FOREIGN KEY (user_id) REFERENCES user (id) ON DELETE SET NULL,
+            CONSTRAINT fk_monthly_leaderboard_ref_org_id FOREIGN KEY (org_id) REFERENCES organization (id) ON DELETE SET NULL
+        );
+    """)
+
+
+def create_event_leaderboard():
+    execute("""
+        CREATE TABLE IF NOT EXISTS event_leaderboard (
+            id            VARCHAR(36)  PRIMARY KEY NOT NULL,
+            event         VARCHAR(50)  NOT NULL,
+            user_id       VARCHAR(36)  NOT NULL,
+            full_name     VARCHAR(150) NOT NULL,
+            karma         INT          NOT NULL DEFAULT 0,
+            org           VARCHAR(100),
+            district      VARCHAR(75),
+            state         VARCHAR(75),
+            last_karma_at DATETIME     NOT NULL,
+            updated_at    DATETIME     NOT NULL,
+            CONSTRAINT EventUser UNIQUE (event, user_id),
+            INDEX idx_event_leaderboard_ranking (event, karma DESC, last_karma_at, user_id),
+            CONSTRAINT fk_event_leaderboard_ref_user_id FOREIGN KEY (user_id) REFERENCES user (id) ON DELETE CASCADE
+        );
+    """)
+
+
+def create_karma_rollup():
+    execute("""
+        CREATE TABLE IF NOT EXISTS karma_rollup (
+            id             VARCHAR(36) PRIMARY KEY NOT NULL,
+            scope          VARCHAR(15) NOT NULL,
+            scope_id       VARCHAR(36) NOT NULL,
+            parent_id      VARCHAR(36),
+            karma          BIGINT      NOT NULL DEFAULT 0,
+            verified_karma BIGINT      NOT NULL DEFAULT 0,
+            members        INT         NOT NULL DEFAULT 0,
+            updated_at     DATETIME    NOT NULL,
+            CONSTRAINT ScopeId UNIQUE (scope, scope_id),
+            INDEX idx_karma_rollup_rank (scope, karma, scope_id),
+            INDEX idx_karma_rollup_parent (scope, parent_id, verified_karma)
+        );
+    """)
+
+
+def create_integration_checkpoint():
+    execute("""
+        CREATE TABLE IF NOT EXISTS integration_checkpoint (
+            id             VARCHAR(36)  PRIMARY KEY NOT NULL,
+            integration_id VARCHAR(36)  NOT NULL,
+            feed           VARCHAR(50)  NOT NULL,
+            `cursor`       VARCHAR(255) NOT NULL,
+            updated_at     DATETIME     NOT NULL,
+            created_at     DATETIME     NOT NULL,
+            CONSTRAINT unique_checkpoint_per_feed UNIQUE (integration_id, feed),
+            CONSTRAINT fk_integration_checkpoint_ref_integration_id FOREIGN KEY (integration_id) REFERENCES integration (id) ON DELETE CASCADE
+        );
+    """)
+    # the karma feed pages through karma_activity_log by (updated_at, id)
+    if not execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE()
+          AND table_name = 'karma_activity_log'
+          AND index_name = 'idx_karma_activity_log_updated_at';
+    """):
+        execute("CREATE INDEX idx_karma_activity_log_updated_at ON karma_activity_log (updated_at, id);")
+
+
+def create_approver_stats():
+    execute("""
+        CREATE TABLE IF NOT EXISTS approver_stats (
+            id         VARCHAR(36) PRIMARY KEY NOT NULL,
+            approval   VARCHAR(10) NOT NULL,
+            day        DATE        NOT NULL,
+            user_id    VARCHAR(36) NOT NULL,
+            count      INT         NOT NULL DEFAULT 0,
+            updated_at DATETIME    NOT NULL,
+            CONSTRAINT ApprovalDayUser UNIQUE (approval, day, user_id),
+            CONSTRAINT fk_approver_stats_ref_user_id FOREIGN KEY (user_id) REFERENCES user (id) ON DELETE CASCADE
+        );
+    """)
+
+
+def create_search_document():
+    # the default stopwords include "a" and "i", and the ngram parser drops
+    # every n-gram containing a stopword, so the index is built without them
+    execute("""
+        CREATE TABLE IF NOT EXISTS search_document (
+            id         VARCHAR(36) PRIMARY KEY NOT NULL,
+            entity     VARCHAR(50) NOT NULL,
+            entity_id  VARCHAR(36) NOT NULL,
+            content    TEXT        NOT NULL,
+            updated_at DATETIME    NOT NULL,
+            CONSTRAINT EntityId UNIQUE (entity, entity_id),
+            FULLTEXT INDEX idx_search_document_content (content) WITH PARSER ngram
+        );
+    """, init_command="SET SESSION innodb_ft_enable_stopword = OFF")
+
+
+def create_export_job():
+    execute("""
+        CREATE TABLE IF NOT EXISTS export_job (
+            id           VARCHAR(36)   PRIMARY KEY NOT NULL,
+            path         VARCHAR(255)  NOT NULL,
+            params       VARCHAR(1000),
+            claims       JSON          NOT NULL,
+            status       VARCHAR(10)   NOT NULL,
+            rows_written INT           NOT NULL DEFAULT 0,
+            total_rows   INT,
+            file_name    VARCHAR(255),
+            error        VARCHAR(255),
+            expires_at   DATETIME,
+            created_by   VARCHAR(36)   NOT NULL,
+            created_at   DATETIME      NOT NULL,
+            updated_at   DATETIME      NOT NULL,
+            INDEX idx_export_job_status (status, created_at),
+            CONSTRAINT fk_export_job_ref_created_by FOREIGN KEY (created_by) REFERENCES user (id) ON DELETE CASCADE
+        );
+    """)
+
+
+def create_voucher_sequence():
+    execute("""
+        CREATE TABLE IF NOT EXISTS voucher_sequence (
+            id         VARCHAR(36) PRIMARY KEY NOT NULL,
+            day        DATE        NOT NULL,
+            value      INT         NOT NULL DEFAULT 0,
+            updated_at DATETIME    NOT NULL,
+            CONSTRAINT VoucherSequenceDay UNIQUE (day)
+        );
+    """)
+
+
+def alter_voucher_log_batch():
+    if not execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE()
+          AND table_name = 'voucher_log'
+          AND column_name = 'batch';
+    """):
+        execute("""
+            ALTER TABLE voucher_log
+                ADD COLUMN batch VARCHAR(36),
+                ADD INDEX idx_voucher_log_batch (batch)
+        """)
+
+
+if __name__ == '__main__':
+    create_monthly_leaderboard()
+    create_event_leaderboard()
+    create_karma_rollup()
+    create_integration_checkpoint()
+    create_approver_stats()
+    create_search_document()
+    create_export_job()
+    create_voucher_sequence()
+    alter_voucher_log_batch()
+    execute("UPDATE system_setting SET value = '1.47', updated_at = now() WHERE `key` = 'db.version';")
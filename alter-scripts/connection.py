@@ -9,8 +9,8 @@ db_config = {
 }
 
 
-def execute(query):
-    with pymysql.connect(**db_config, autocommit=True) as connection:
+def execute(query, init_command=None):
+    with pymysql.connect(**db_config, autocommit=True, init_command=init_command) as connection:
         with connection.cursor() as cursor:
             cursor.execute(query)
             return cursor.fetchall()
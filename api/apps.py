@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self) -> None:
+        # register the signal receivers that keep precomputed data in sync
+        from api.common import common_helper  # noqa: F401
+        from api.dashboard.discord_moderator import discord_mod_helper  # noqa: F401
+        from api.dashboard.profile import profile_helper  # noqa: F401
+        from api.leaderboard import leaderboard_helper  # noqa: F401
+        from api.top100_coders import top100_helper  # noqa: F401
+        from utils import search  # noqa: F401
@@ -0,0 +1,265 @@
+import json
+import logging
+
+from django.db.models import F, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from redis.exceptions import RedisError
+
+from db.learning_circle import LearningCircle, UserCircleLink
+from db.task import InterestGroup, KarmaActivityLog, TaskList
+from utils.utils import RedisUtils
+
+logger = logging.getLogger("django")
+
+
+class CircleKarmaIndex:
+    """
+    Karma of every learning circle of an interest group, ranked.
+
+    A circle's karma is the approved karma its accepted members earned on tasks
+    of the circle's interest group. The whole interest group is computed with
+    one grouped query and cached in redis, so rank, total karma and the circle
+    leaderboard of an IG are served from the same entry. Entries are dropped on
+    approvals and membership changes made through this service and expire
+    after CACHE_TIMEOUT for those made by the Discord bot.
+    """
+
+    CACHE_TIMEOUT = 60 * 15
+
+    @staticmethod
+    def get_key(ig_id) -> str:
+        return f"lc:karma:{ig_id}"
+
+    @staticmethod
+    def build(ig_id) -> list:
+        karma = dict(
+            KarmaActivityLog.objects.filter(
+                task__ig_id=ig_id,
+                appraiser_approved=True,
+                user__user_circle_link_user__circle__ig_id=ig_id,
+                user__user_circle_link_user__accepted=True,
+            )
+            .values(circle_id=F("user__user_circle_link_user__circle_id"))
+            .annotate(total_karma=Sum("karma"))
+            .values_list("circle_id", "total_karma")
+            .order_by()
+        )
+
+        circles = [
+            {"id": circle_id, "name": name, "karma": karma.get(circle_id) or 0}
+            for circle_id, name in LearningCircle.objects.filter(ig_id=ig_id).values_list(
+                "id", "name"
+            )
+        ]
+        circles.sort(key=lambda circle: (-circle["karma"], circle["name"]))
+
+        for rank, circle in enumerate(circles, start=1):
+            circle["rank"] = rank
+        return circles
+
+    @classmethod
+    def get(cls, ig_id) -> list:
+        """Returns the circles of an interest group ordered by rank."""
+        key = cls.get_key(ig_id)
+        try:
+            client = RedisUtils.get_client()
+            if (cached := client.get(key)) is not None:
+                return json.loads(cached)
+
+            circles = cls.build(ig_id)
+            client.set(key, json.dumps(circles), ex=cls.CACHE_TIMEOUT)
+            return circles
+
+        except RedisError as e:
+            logger.error(f"Learning circle karma cache unavailable: {e}")
+            return cls.build(ig_id)
+
+    @classmethod
+    def get_circle(cls, circle: LearningCircle) -> dict:
+        return next(
+            (row for row in cls.get(circle.ig_id) if row["id"] == circle.id),
+            {"id": circle.id, "name": circle.name, "karma": 0, "rank": None},
+        )
+
+    @classmethod
+    def invalidate(cls, ig_id) -> None:
+        try:
+            RedisUtils.get_client().delete(cls.get_key(ig_id))
+        except RedisError as e:
+            logger.error(f"Learning circle karma invalidation failed: {e}")
+
+
+class IgKarmaIndex:
+    """
+    Approved karma of every user in every interest group, ranked.
+
+    Each interest group is a redis sorted set of user id -> karma earned on
+    its tasks, so the top users of one IG is a single ZREVRANGE and the top
+    users of several IGs is a ZUNIONSTORE of their sets, with the same totals
+    as summing karma over all of them. A user's score is recomputed whenever
+    one of their logs of the IG is saved or deleted through this service;
+    logs written by the Discord bot are picked up by `build_ig_karma`.
+
+    Redis drops empty sets, so a separate marker key records which interest
+    groups were built, including those without any karma yet.
+    """
+
+    @staticmethod
+    def get_key(ig_id) -> str:
+        return f"ig:karma:{ig_id}"
+
+    @staticmethod
+    def get_built_key(ig_id) -> str:
+        return f"ig:karma:{ig_id}:built"
+
+    @staticmethod
+    def get_karma(ig_ids, user_id=None):
+        logs = KarmaActivityLog.objects.filter(
+            task__ig_id__in=ig_ids, appraiser_approved=True, user__isnull=False
+        )
+        if user_id is not None:
+            logs = logs.filter(user_id=user_id)
+
+        return (
+            logs.values("user_id")
+            .annotate(total_karma=Sum("karma"))
+            .values_list("user_id", "total_karma")
+            .order_by()
+        )
+
+    @classmethod
+    def build(cls, ig_id) -> int:
+        """Recreates the set of one interest group and swaps it in atomically."""
+        client = RedisUtils.get_client()
+        key = cls.get_key(ig_id)
+        temp_key = f"{key}:rebuild"
+        client.delete(temp_key)
+
+        karma = dict(cls.get_karma([ig_id]))
+        pipeline = client.pipeline()
+        if karma:
+            client.zadd(temp_key, karma)
+            pipeline.rename(temp_key, key)
+        else:
+            pipeline.delete(key)
+        pipeline.set(cls.get_built_key(ig_id), 1)
+        pipeline.execute()
+        return len(karma)
+
+    @classmethod
+    def rebuild(cls) -> dict:
+        return {
+            name: cls.build(ig_id)
+            for ig_id, name in InterestGroup.objects.values_list("id", "name")
+        }
+
+    @classmethod
+    def get_top(cls, ig_ids, limit: int = 100) -> list:
+        """Returns the (user id, karma) pairs with the most karma across `ig_ids`."""
+        if not ig_ids:
+            return []
+
+        try:
+            client = RedisUtils.get_client()
+            keys = [cls.get_key(ig_id) for ig_id in ig_ids]
+            for ig_id in ig_ids:
+                if not client.exists(cls.get_built_key(ig_id)):
+                    cls.build(ig_id)
+
+            if len(keys) == 1:
+                top = client.zrevrange(keys[0], 0, limit - 1, withscores=True)
+            else:
+                union_key = f"ig:karma:union:{':'.join(sorted(map(str, ig_ids)))}"
+                pipeline = client.pipeline()
+                pipeline.zunionstore(union_key, keys)
+                pipeline.zrevrange(union_key, 0, limit - 1, withscores=True)
+                pipeline.delete(union_key)
+                top = pipeline.execute()[1]
+
+            return [(user_id, int(karma)) for user_id, karma in top]
+
+        except RedisError as e:
+            logger.error(f"Interest group karma index fell back to SQL: {e}")
+            return list(cls.get_karma(ig_ids).order_by("-total_karma")[:limit])
+
+    @classmethod
+    def sync_user(cls, user_id, ig_id) -> None:
+        """Recomputes one user's karma in an interest group whose set is already built."""
+        karma = dict(cls.get_karma([ig_id], user_id)).get(user_id)
+        key = cls.get_key(ig_id)
+        try:
+            client = RedisUtils.get_client()
+            if not client.exists(cls.get_built_key(ig_id)):
+                return
+            if karma is None:
+                client.zrem(key, user_id)
+            else:
+                client.zadd(key, {user_id: karma})
+        except RedisError as e:
+            logger.error(f"Interest group karma sync failed for {user_id}: {e}")
+
+
+def get_ig_karma(ig_id, user_ids) -> dict:
+    """
+    Returns the approved karma each user earned on tasks of an interest group,
+    computed with one grouped query. `user_ids` may be a list or a subquery.
+    """
+    return dict(
+        KarmaActivityLog.objects.filter(
+            task__ig_id=ig_id,
+            user_id__in=user_ids,
+            appraiser_approved=True,
+        )
+        .values("user_id")
+        .annotate(total_karma=Sum("karma"))
+        .values_list("user_id", "total_karma")
+        .order_by()
+    )
+
+
+def get_member_info(circle: LearningCircle, accepted) -> list:
+    """
+    Loads the members of a circle with their IG karma and level.
+
+    Members, users and levels come from one joined query and karma from one
+    grouped query, however many members the circle has.
+    """
+    members = list(
+        circle.user_circle_link_circle.filter(accepted=accepted).select_related(
+            "user__user_lvl_link_user__level"
+        )
+    )
+    karma = get_ig_karma(circle.ig_id, [member.user_id for member in members])
+
+    return [
+        {
+            "id": member.user.id,
+            "username": f"{member.user.full_name}",
+            "profile_pic": f"{member.user.profile_pic}" or None,
+            "karma": karma.get(member.user_id) or 0,
+            "is_lead": member.lead,
+            "level": member.user.user_lvl_link_user.level.level_order,
+        }
+        for member in members
+    ]
+
+
+@receiver(post_save, sender=KarmaActivityLog)
+@receiver(post_delete, sender=KarmaActivityLog)
+def circle_karma_changed(sender, instance, **kwargs):
+    if ig_id := TaskList.objects.filter(id=instance.task_id).values_list(
+        "ig_id", flat=True
+    ).first():
+        CircleKarmaIndex.invalidate(ig_id)
+        if instance.user_id:
+            IgKarmaIndex.sync_user(instance.user_id, ig_id)
+
+
+@receiver(post_save, sender=UserCircleLink)
+@receiver(post_delete, sender=UserCircleLink)
+@receiver(post_save, sender=LearningCircle)
+@receiver(post_delete, sender=LearningCircle)
+def circle_membership_changed(sender, instance, **kwargs):
+    circle = instance if sender is LearningCircle else instance.circle
+    CircleKarmaIndex.invalidate(circle.ig_id)
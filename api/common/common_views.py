@@ -10,7 +10,7 @@ from rest_framework.views import APIView
 from db.learning_circle import LearningCircle
 from db.learning_circle import UserCircleLink
 from db.organization import Organization,Department,District,State,Country
-from db.task import InterestGroup, KarmaActivityLog, UserIgLink
+from db.task import InterestGroup, UserIgLink
 from db.user import User, UserRoleLink
 from utils.response import CustomResponse
 from utils.types import IntegrationType, OrganizationType, RoleType
@@ -18,6 +18,7 @@ from utils.utils import CommonUtils
 from .serializer import StudentInfoSerializer, CollegeInfoSerializer, LearningCircleEnrollmentSerializer, \
     UserLeaderboardSerializer,OrgSerializer,DistrictSerializer,StateSerializer,CountrySerializer, LcDetailsSerializer, \
     LcListSerializer
+from .common_helper import CircleKarmaIndex, IgKarmaIndex
 
 class LcDetailsAPI(APIView):
     def get(self, request, circle_id):
@@ -31,6 +32,17 @@ class LcDetailsAPI(APIView):
 
         return CustomResponse(response=serializer.data).get_success_response()
 
+class IgCircleLeaderboardAPI(APIView):
+    def get(self, request, ig_id):
+        if not InterestGroup.objects.filter(id=ig_id).exists():
+            return CustomResponse(
+                general_message="Invalid interest group"
+            ).get_failure_response()
+
+        return CustomResponse(
+            response=CircleKarmaIndex.get(ig_id)
+        ).get_success_response()
+
 class LcListAPI(APIView):
     def get(self, request):
         all_circles = LearningCircle.objects.all()
@@ -51,7 +63,7 @@ class LcListAPI(APIView):
         paginated_queryset = CommonUtils.get_paginated_queryset(
             all_circles,
             request,
-            search_fields=[],
+            search_fields=["name", "circle_code", "ig__name", "org__title"],
         )
 
         serializer = LcListSerializer(
@@ -314,9 +326,9 @@ class LcReportDownloadAPI(APIView):
             )
         )
 
-        student_info_data = StudentInfoSerializer(student_info, many=True).data
+        rows = CommonUtils.serialize_in_chunks(student_info, StudentInfoSerializer)
 
-        return CommonUtils.generate_csv(student_info_data, "Learning Circle Report")
+        return CommonUtils.generate_export(request, rows, "Learning Circle Report")
 
 
 class CollegeWiseLcReport(APIView):
@@ -399,9 +411,9 @@ class CollegeWiseLcReportCSV(APIView):
             is_pagination=False
         )
 
-        lc_report = CollegeInfoSerializer(paginated_queryset, many=True).data
+        rows = CommonUtils.serialize_in_chunks(paginated_queryset, CollegeInfoSerializer)
 
-        return CommonUtils.generate_csv(lc_report, "Learning Circle Report")
+        return CommonUtils.generate_export(request, rows, "Learning Circle Report")
 
 
 class LearningCircleEnrollment(APIView):
@@ -494,9 +506,11 @@ class LearningCircleEnrollmentCSV(APIView):
                          "organisation": "organisation", "dwms_id": "dwms_id", "karma_earned": "karma_earned"},
             is_pagination=False)
 
-        lc_enrollment = LearningCircleEnrollmentSerializer(paginated_queryset, many=True).data
+        rows = CommonUtils.serialize_in_chunks(
+            paginated_queryset, LearningCircleEnrollmentSerializer
+        )
 
-        return CommonUtils.generate_csv(lc_enrollment, "Learning Enrollment Report")
+        return CommonUtils.generate_export(request, rows, "Learning Enrollment Report")
 
 
 class GlobalCountAPI(APIView):
@@ -582,15 +596,20 @@ class ListTopIgUsersAPI(APIView):
     def get(self, request):
         ig_name = request.query_params.getlist("ig_name", [])
 
-        user_karma_by_ig = KarmaActivityLog.objects.filter(
-            task__ig__name__in=ig_name, appraiser_approved=True
-        ).values(
-            userid=F('user__id'),
-            muid=F('user__muid'),
-            full_name=F('user__full_name'),
-        ).annotate(
-            ig_karma=Sum('karma')
-        ).order_by('-ig_karma')[:100]
+        top_users = IgKarmaIndex.get_top(
+            list(InterestGroup.objects.filter(name__in=ig_name).values_list("id", flat=True))
+        )
+        users = User.objects.in_bulk([user_id for user_id, _ in top_users])
+        user_karma_by_ig = [
+            {
+                "userid": user_id,
+                "muid": users[user_id].muid,
+                "full_name": users[user_id].full_name,
+                "ig_karma": karma,
+            }
+            for user_id, karma in top_users
+            if user_id in users
+        ]
 
         # Extract 'userid' values into a new list
         userid_list = [entry['userid'] for entry in user_karma_by_ig]
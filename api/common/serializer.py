@@ -11,6 +11,7 @@ from db.organization import (
 from db.learning_circle import LearningCircle
 from db.task import KarmaActivityLog
 from db.user import User
+from .common_helper import CircleKarmaIndex, get_member_info
 
 class LcListSerializer(serializers.ModelSerializer):
     ig_name = serializers.CharField(source='ig.name')
@@ -92,101 +93,23 @@ class LcDetailsSerializer(serializers.ModelSerializer):
             "ig_code"
         ]
 
+    def get_circle_karma(self, obj):
+        if not hasattr(self, "_circle_karma"):
+            self._circle_karma = CircleKarmaIndex.get_circle(obj)
+        return self._circle_karma
+
     def get_total_karma(self, obj):
-        return (
-            KarmaActivityLog.objects.filter(
-                user__user_circle_link_user__circle=obj,
-                user__user_circle_link_user__accepted=True,
-                task__ig=obj.ig,
-                appraiser_approved=True,
-            ).aggregate(
-                total_karma=Sum(
-                    'karma'
-                ))['total_karma'] or 0
-        )
+        return self.get_circle_karma(obj)["karma"]
 
     def get_members(self, obj):
         return self._get_member_info(obj, accepted=1)
 
 
     def _get_member_info(self, obj, accepted):
-
-        members = obj.user_circle_link_circle.filter(
-            circle=obj,
-            accepted=accepted
-        )
-
-        member_info = []
-
-        for member in members:
-            total_ig_karma = KarmaActivityLog.objects.filter(
-                task__ig=member.circle.ig,
-                user=member.user,
-                appraiser_approved=True
-            ).aggregate(
-                total_karma=Sum(
-                    'karma'
-                ))['total_karma'] or 0
-
-            member_info.append({
-                'id': member.user.id,
-                'username': f'{member.user.full_name}',
-                'profile_pic': f'{member.user.profile_pic}' or None,
-                'karma': total_ig_karma,
-                'is_lead': member.lead,
-                'level': member.user.user_lvl_link_user.level.level_order
-            })
-
-        return member_info
+        return get_member_info(obj, accepted)
 
     def get_rank(self, obj):
-        total_karma = KarmaActivityLog.objects.filter(
-            user__user_circle_link_user__circle=obj,
-            user__user_circle_link_user__accepted=True,
-            task__ig=obj.ig,
-            appraiser_approved=True
-        ).aggregate(
-            total_karma=Sum(
-                'karma'
-            )
-        )['total_karma'] or 0
-
-        circle_ranks = {obj.name: {'total_karma': total_karma}}
-
-        all_learning_circles = LearningCircle.objects.filter(
-            ig=obj.ig
-        ).exclude(
-            id=obj.id
-        )
-
-        for lc in all_learning_circles:
-            total_karma_lc = KarmaActivityLog.objects.filter(
-                user__user_circle_link_user__circle=lc,
-                user__user_circle_link_user__accepted=True,
-                task__ig=lc.ig,
-                appraiser_approved=True
-            ).aggregate(
-                total_karma=Sum(
-                    'karma'
-                )
-            )['total_karma'] or 0
-
-            circle_ranks[lc.name] = {'total_karma': total_karma_lc}
-
-        sorted_ranks = sorted(
-            circle_ranks.items(),
-            key=lambda x: x[1]['total_karma'],
-            reverse=True
-        )
-
-        return next(
-            (
-                i + 1
-                for i, (circle_name, data) in enumerate(sorted_ranks)
-                if circle_name == obj.name
-            ),
-            None,
-        )
+        return self.get_circle_karma(obj)["rank"]
 
 
 class StudentInfoSerializer(serializers.Serializer):
@@ -5,6 +5,7 @@ from . import common_views
 urlpatterns = [
     path('lc-list', common_views.LcListAPI.as_view()),
     path('<str:circle_id>/lc-details/', common_views.LcDetailsAPI.as_view()),
+    path('<str:ig_id>/lc-leaderboard/', common_views.IgCircleLeaderboardAPI.as_view()),
     path('lc-dashboard/', common_views.LcDashboardAPI.as_view()),
     path('lc-report/', common_views.LcReportAPI.as_view()),
     path('college-wise-lc-report/', common_views.CollegeWiseLcReport.as_view()),
@@ -2,8 +2,9 @@ from django.db.models import Count, F
 from django.db.models import Q
 from rest_framework.views import APIView
 
+from api.leaderboard.leaderboard_helper import get_wallet_ranks
 from db.organization import UserOrganizationLink
-from db.task import Level, Wallet, InterestGroup
+from db.task import Level, InterestGroup
 from db.user import User, Role, UserRoleLink
 from utils.permission import CustomizePermission, JWTUtils, role_required
 from utils.response import CustomResponse
@@ -100,22 +101,6 @@ class CampusStudentDetailsAPI(APIView):
                 general_message="Campus lead has no college"
             ).get_failure_response()
         if is_alumni:
-            rank = (
-                Wallet.objects.filter(
-                    user__user_organization_link_user__org=user_org_link.org,
-                    user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-                    user__user_organization_link_user__is_alumni=is_alumni,
-                )
-                .distinct()
-                .order_by("-karma", "-created_at")
-                .values(
-                    "user_id",
-                    "karma",
-                )
-            )
-
-            ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
-
             user_org_links = (
                 User.objects.filter(
                     user_organization_link_user__org=user_org_link.org,
@@ -136,21 +121,6 @@ class CampusStudentDetailsAPI(APIView):
                     is_alumni=F('user_organization_link_user__is_alumni'),
                 ))
         else:
-            rank = (
-                Wallet.objects.filter(
-                    user__user_organization_link_user__org=user_org_link.org,
-                    user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-                )
-                .distinct()
-                .order_by("-karma", "-created_at")
-                .values(
-                    "user_id",
-                    "karma",
-                )
-            )
-
-            ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
-
             user_org_links = (
                 User.objects.filter(
                     user_organization_link_user__org=user_org_link.org,
@@ -187,6 +157,12 @@ class CampusStudentDetailsAPI(APIView):
             },
         )
 
+        ranks = get_wallet_ranks(
+            user_org_links,
+            ["-karma", "-created_at"],
+            [user.id for user in paginated_queryset.get("queryset")],
+        )
+
         serializer = serializers.CampusStudentDetailsSerializer(paginated_queryset.get("queryset"), many=True,
                                                                 context={"ranks": ranks})
         return CustomResponse(
@@ -215,22 +191,6 @@ class CampusStudentDetailsCSVAPI(APIView):
             ).get_failure_response()
 
         if is_alumni:
-            rank = (
-                Wallet.objects.filter(
-                    user__user_organization_link_user__org=user_org_link.org,
-                    user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-                    user__user_organization_link_user__is_alumni=is_alumni,
-                )
-                .distinct()
-                .order_by("-karma", "-created_at")
-                .values(
-                    "user_id",
-                    "karma",
-                )
-            )
-
-            ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
-
             user_org_links = (
                 User.objects.filter(
                     user_organization_link_user__org=user_org_link.org,
@@ -251,21 +211,6 @@ class CampusStudentDetailsCSVAPI(APIView):
                     is_alumni=F('user_organization_link_user__is_alumni'),
                 ))
         else:
-            rank = (
-                Wallet.objects.filter(
-                    user__user_organization_link_user__org=user_org_link.org,
-                    user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-                )
-                .distinct()
-                .order_by("-karma", "-created_at")
-                .values(
-                    "user_id",
-                    "karma",
-                )
-            )
-
-            ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
-
             user_org_links = (
                 User.objects.filter(
                     user_organization_link_user__org=user_org_link.org,
@@ -302,10 +247,19 @@ class CampusStudentDetailsCSVAPI(APIView):
             },
         )
 
-        serializer = serializers.CampusStudentDetailsSerializer(
-            user_org_links, many=True, context={"ranks": ranks}
+        ranks = get_wallet_ranks(user_org_links, ["-karma", "-created_at"])
+
+        rows = CommonUtils.serialize_in_chunks(
+            user_org_links,
+            serializers.CampusStudentDetailsSerializer,
+            {"ranks": ranks},
+        )
+        summary = CommonUtils.serialize_in_chunks(
+            [user_org_link], serializers.CampusDetailsSerializer
+        )
+        return CommonUtils.generate_export(
+            request, rows, "Campus Student Details", {"Campus Summary": summary}
         )
-        return CommonUtils.generate_csv(serializer.data, "Campus Student Details")
 
 
 class WeeklyKarmaAPI(APIView):
@@ -7,8 +7,8 @@ from rest_framework import serializers
 from db.organization import UserOrganizationLink, College
 from db.task import KarmaActivityLog
 from db.user import User, UserRoleLink
-from utils.types import OrganizationType
-from utils.types import RoleType
+from api.leaderboard.leaderboard_helper import KarmaRollupHelper
+from utils.types import OrganizationType, RoleType, RollupScope
 from utils.utils import DateTimeUtils
 
 
@@ -65,8 +65,16 @@ class CampusDetailsSerializer(serializers.ModelSerializer):
 
         return None
 
+    def get_rollup(self, obj):
+        if not hasattr(self, "_rollup"):
+            self._rollup = KarmaRollupHelper.get(
+                RollupScope.ORGANIZATION.value, obj.org.id
+            )
+        return self._rollup
+
     def get_total_members(self, obj):
-        return obj.org.user_organization_link_org.count()
+        rollup = self.get_rollup(obj)
+        return rollup.members if rollup else 0
 
     def get_active_members(self, obj):
 
@@ -78,36 +86,11 @@ class CampusDetailsSerializer(serializers.ModelSerializer):
         ).count()
 
     def get_total_karma(self, obj):
-        return (
-            obj.org.user_organization_link_org.filter(
-                org__org_type=OrganizationType.COLLEGE.value,
-                verified=True,
-                user__wallet_user__isnull=False,
-            ).aggregate(total_karma=Sum("user__wallet_user__karma"))["total_karma"]
-            or 0
-        )
+        rollup = self.get_rollup(obj)
+        return rollup.verified_karma if rollup else 0
 
     def get_rank(self, obj):
-        org_karma_dict = (
-            UserOrganizationLink.objects.filter(
-                org__org_type=OrganizationType.COLLEGE.value)
-            .values("org")
-            .annotate(total_karma=Sum("user__wallet_user__karma"))
-        ).order_by("-total_karma", "org__created_at")
-
-        rank_dict = {
-            data["org"]: data["total_karma"] if data["total_karma"] is not None else 0
-            for data in org_karma_dict
-        }
-
-        sorted_rank_dict = dict(
-            sorted(rank_dict.items(), key=lambda x: x[1], reverse=True)
-        )
-
-        if obj.org.id in sorted_rank_dict:
-            keys_list = list(sorted_rank_dict.keys())
-            position = keys_list.index(obj.org.id)
-            return position + 1
+        return KarmaRollupHelper.get_rank(self.get_rollup(obj))
 
 
 class CampusStudentDetailsSerializer(serializers.Serializer):
@@ -0,0 +1,149 @@
+import datetime
+import logging
+import uuid
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from redis.exceptions import RedisError
+
+from db.leaderboard import ApproverStats
+from db.task import KarmaActivityLog
+from utils.types import ApprovalType
+from utils.utils import DateTimeUtils, RedisUtils
+
+logger = logging.getLogger("django")
+
+
+class ApproverStatsHelper:
+    """
+    Number of karma logs each moderator approved, per approval type and day.
+
+    A log counts on the day it was submitted, the only date a log keeps. The
+    approver_stats table is rewritten by `build_approver_stats`, so the
+    moderator leaderboard sums a few rows per approver and day instead of
+    scanning the whole karma activity log.
+    """
+
+    @staticmethod
+    def get_counts(approval: str, start: datetime.date = None):
+        approver = f"{approval}_approved_by"
+        logs = KarmaActivityLog.objects.filter(**{f"{approver}__isnull": False})
+        if start is not None:
+            logs = logs.filter(created_at__date__gte=start)
+
+        return (
+            logs.values(day=TruncDate("created_at"), approver_id=F(approver))
+            .annotate(count=Count("id"))
+            .values_list("day", "approver_id", "count")
+            .order_by()
+        )
+
+    @classmethod
+    def refresh(cls, days: int = None) -> int:
+        """Rewrites the stats of the last `days` days, or of every day when None."""
+        start = None
+        if days is not None:
+            start = DateTimeUtils.get_current_utc_time().date() - datetime.timedelta(
+                days=days - 1
+            )
+
+        rows = [
+            ApproverStats(
+                id=uuid.uuid4(),
+                approval=approval,
+                day=day,
+                user_id=approver_id,
+                count=count,
+            )
+            for approval in ApprovalType.get_all_values()
+            for day, approver_id, count in cls.get_counts(approval, start)
+        ]
+
+        with transaction.atomic():
+            stale = ApproverStats.objects.all()
+            if start is not None:
+                stale = stale.filter(day__gte=start)
+            stale.delete()
+            ApproverStats.objects.bulk_create(rows, batch_size=1000)
+
+        return len(rows)
+
+    @staticmethod
+    def get_leaderboard(approval: str, start: datetime.date = None, end: datetime.date = None):
+        stats = ApproverStats.objects.filter(approval=approval)
+        if start is not None:
+            stats = stats.filter(day__gte=start)
+        if end is not None:
+            stats = stats.filter(day__lte=end)
+
+        return (
+            stats.values("user_id", name=F("user__full_name"), muid=F("user__muid"))
+            .annotate(count=Sum("count"))
+            .order_by("-count", "muid")
+        )
+
+
+class PendingCounter:
+    """
+    Number of karma logs waiting for peer and appraiser approval.
+
+    Both numbers come from one conditional aggregate and are kept in redis for
+    CACHE_TIMEOUT. Logs saved or deleted through this service drop the
+    counters at once; approvals made by the Discord bot show up when they
+    expire.
+    """
+
+    CACHE_TIMEOUT = 60 * 5
+
+    @staticmethod
+    def get_key(date: datetime.date = None) -> str:
+        return "karma:pending" if date is None else f"karma:pending:{date.isoformat()}"
+
+    @staticmethod
+    def count(date: datetime.date = None) -> dict:
+        logs = KarmaActivityLog.objects.all()
+        if date is not None:
+            logs = logs.filter(created_at__date=date)
+
+        return logs.aggregate(
+            peer_pending=Count("id", filter=Q(peer_approved=False)),
+            appraise_pending=Count("id", filter=Q(appraiser_approved=False)),
+        )
+
+    @classmethod
+    def get(cls, date: datetime.date = None) -> dict:
+        key = cls.get_key(date)
+        try:
+            client = RedisUtils.get_client()
+            if cached := client.hgetall(key):
+                return {name: int(count) for name, count in cached.items()}
+
+            counts = cls.count(date)
+            pipeline = client.pipeline()
+            pipeline.hset(key, mapping=counts)
+            pipeline.expire(key, cls.CACHE_TIMEOUT)
+            pipeline.execute()
+            return counts
+
+        except RedisError as e:
+            logger.error(f"Pending karma counters unavailable: {e}")
+            return cls.count(date)
+
+    @classmethod
+    def invalidate(cls, date: datetime.date = None) -> None:
+        keys = [cls.get_key()]
+        if date is not None:
+            keys.append(cls.get_key(date))
+        try:
+            RedisUtils.get_client().delete(*keys)
+        except RedisError as e:
+            logger.error(f"Pending karma counters invalidation failed: {e}")
+
+
+@receiver(post_save, sender=KarmaActivityLog)
+@receiver(post_delete, sender=KarmaActivityLog)
+def pending_karma_changed(sender, instance, **kwargs):
+    PendingCounter.invalidate(instance.created_at.date() if instance.created_at else None)
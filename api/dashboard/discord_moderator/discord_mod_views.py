@@ -1,15 +1,26 @@
-from collections import defaultdict
+import datetime
 
-from django.db.models import Q
 from rest_framework.views import APIView
 
 from db.task import KarmaActivityLog
+from utils.exception import CustomException
+from utils.types import ApprovalType
 from utils.utils import CommonUtils
 from utils.permission import CustomizePermission
 from utils.response import CustomResponse
+from .discord_mod_helper import ApproverStatsHelper, PendingCounter
 from .serializer import KarmaActivityLogSerializer,LeaderboardSerializer
 
 
+def get_date_param(request, name):
+    if value := request.query_params.get(name):
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError as e:
+            raise CustomException(f"Invalid {name}, use YYYY-MM-DD") from e
+    return None
+
+
 class TaskList(APIView):
     authentication_classes = [CustomizePermission]
 
@@ -37,51 +48,32 @@ class PendingTasks(APIView):
     authentication_classes = [CustomizePermission]
 
     def get(self, request):
-        date = request.query_params.get("date")
-        if date:
-            tasks = KarmaActivityLog.objects.filter(created_at=date)
-            peerpending = tasks.filter(peer_approved=False).count()
-            appraiserpending = tasks.filter(appraiser_approved=False).count()
-            data = {'peer_pending': peerpending,
-                    'appraise_pending': appraiserpending}
-            return CustomResponse(response=data).get_success_response()
-
-        peerpending = KarmaActivityLog.objects.filter(
-            peer_approved=False).count()
-        appraiserpending = KarmaActivityLog.objects.filter(
-            appraiser_approved=False).count()
-        data = {'peer_pending': peerpending,
-                'appraise_pending': appraiserpending}
-        return CustomResponse(response=data).get_success_response()
+        try:
+            date = get_date_param(request, "date")
+        except CustomException as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
+
+        return CustomResponse(response=PendingCounter.get(date)).get_success_response()
 
 
 class LeaderBoard(APIView):
     authentication_classes = [CustomizePermission]
 
     def get(self, request):
-        choice = request.query_params.get("option", "peer")
-
-        approval_field = f"{choice}_approved_by"
-        logs_with_approval = KarmaActivityLog.objects.filter(
-            Q(**{f"{approval_field}__isnull": False}
-              ) & ~Q(**{approval_field: ''})
-        )
-
-        data = defaultdict(lambda: {"count": 0, "muid": None})
-
-        for obj in logs_with_approval:
-            approver_name = getattr(obj, approval_field).full_name
-            if data[approver_name]["muid"] is None:
-                data[approver_name]["muid"] = getattr(obj, approval_field).muid
-            data[approver_name]["count"] += 1
-
-        response_data = [
-            {"name": name, "count": info["count"], "muid": info["muid"]}
-            for name, info in data.items()
-        ]
+        choice = request.query_params.get("option", ApprovalType.PEER.value)
+        if choice not in ApprovalType.get_all_values():
+            return CustomResponse(
+                general_message=f"Invalid option, use one of {ApprovalType.get_all_values()}"
+            ).get_failure_response()
+
+        try:
+            start_date = get_date_param(request, "startDate")
+            end_date = get_date_param(request, "endDate")
+        except CustomException as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
 
         paginated_queryset = CommonUtils.get_paginated_queryset(
-            response_data,
+            ApproverStatsHelper.get_leaderboard(choice, start_date, end_date),
             request,
             []
         )
@@ -95,4 +87,3 @@ class LeaderBoard(APIView):
                 "pagination"
             )
         )
-
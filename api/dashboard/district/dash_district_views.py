@@ -1,14 +1,13 @@
-from itertools import islice
-
-from django.db.models import Sum, F, Case, CharField, When
+from django.db.models import F, Case, CharField, When
 from rest_framework.views import APIView
 
-from db.organization import UserOrganizationLink, Organization
-from db.task import Level, Wallet
+from api.leaderboard.leaderboard_helper import KarmaRollupHelper, get_wallet_ranks
+from db.organization import Organization
+from db.task import Level
 from db.user import User
 from utils.permission import CustomizePermission, JWTUtils, role_required
 from utils.response import CustomResponse
-from utils.types import RoleType, OrganizationType
+from utils.types import RoleType, OrganizationType, RollupScope
 from utils.utils import CommonUtils
 from . import dash_district_serializer
 from .dash_district_helper import get_user_college_link
@@ -39,28 +38,14 @@ class DistrictTopThreeCampusAPI(APIView):
 
         user_org_link = get_user_college_link(user_id)
 
-        org_karma_dict = (
-            UserOrganizationLink.objects.filter(
-                org__org_type=OrganizationType.COLLEGE.value,
-                org__district=user_org_link.org.district,
-                verified=True,
-            )
-            .values("org")
-            .annotate(total_karma=Sum("user__wallet_user__karma")).order_by('-total_karma', 'org__created_at')
-        )
-
         org_ranks = {
-            data["org"]: data["total_karma"] if data["total_karma"] is not None else 0
-            for data in org_karma_dict
+            rollup.scope_id: rollup.verified_karma
+            for rollup in KarmaRollupHelper.get_top(
+                RollupScope.ORGANIZATION.value, user_org_link.org.district.id
+            )
         }
 
-        sorted_org_ranks = dict(
-            sorted(org_ranks.items(), key=lambda x: x[1], reverse=True)
-        )
-
-        top_three_orgs = dict(islice(sorted_org_ranks.items(), 3))
-
-        user_org = Organization.objects.filter(id__in=top_three_orgs).distinct()
+        user_org = Organization.objects.filter(id__in=org_ranks).distinct()
 
         serializer = dash_district_serializer.DistrictTopThreeCampusSerializer(
             user_org, many=True, context={"ranks": org_ranks}
@@ -97,21 +82,6 @@ class DistrictStudentDetailsAPI(APIView):
 
         user_org_link = get_user_college_link(user_id)
 
-        rank = (
-            Wallet.objects.filter(
-                user__user_organization_link_user__org__district=user_org_link.org.district,
-                user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-            )
-            .distinct()
-            .order_by("-karma", '-update_at', "created_at")
-            .values(
-                "user_id",
-                "karma",
-            )
-        )
-
-        ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
-
         user_org_links = (
             User.objects.filter(
                 user_organization_link_user__org__district=user_org_link.org.district,
@@ -137,6 +107,12 @@ class DistrictStudentDetailsAPI(APIView):
             },
         )
 
+        ranks = get_wallet_ranks(
+            user_org_links,
+            ["-karma", "-updated_at", "created_at"],
+            [user.id for user in paginated_queryset.get("queryset")],
+        )
+
         serializer = dash_district_serializer.DistrictStudentDetailsSerializer(
             paginated_queryset.get("queryset"), many=True, context={"ranks": ranks}
         )
@@ -158,21 +134,6 @@ class DistrictStudentDetailsCSVAPI(APIView):
 
         user_org_link = get_user_college_link(user_id)
 
-        rank = (
-            Wallet.objects.filter(
-                user__user_organization_link_user__org__district=user_org_link.org.district,
-                user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-            )
-            .distinct()
-            .order_by("-karma", '-updated_at', "created_at")
-            .values(
-                "user_id",
-                "karma",
-            )
-        )
-
-        ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
-
         user_org_links = (
             User.objects.filter(
                 user_organization_link_user__org__district=user_org_link.org.district,
@@ -186,10 +147,19 @@ class DistrictStudentDetailsCSVAPI(APIView):
             )
         )
 
-        serializer = dash_district_serializer.DistrictStudentDetailsSerializer(
-            user_org_links, many=True, context={"ranks": ranks}
+        ranks = get_wallet_ranks(user_org_links, ["-karma", "-updated_at", "created_at"])
+
+        rows = CommonUtils.serialize_in_chunks(
+            user_org_links,
+            dash_district_serializer.DistrictStudentDetailsSerializer,
+            {"ranks": ranks},
+        )
+        summary = CommonUtils.serialize_in_chunks(
+            [user_org_link], dash_district_serializer.DistrictDetailsSerializer
+        )
+        return CommonUtils.generate_export(
+            request, rows, "District Student Details", {"District Summary": summary}
         )
-        return CommonUtils.generate_csv(serializer.data, "District Student Details")
 
 
 class DistrictsCollageDetailsAPI(APIView):
@@ -295,7 +265,9 @@ class DistrictsCollageDetailsCSVAPI(APIView):
             )
         )
 
-        serializer = dash_district_serializer.DistrictCollegeDetailsSerializer(
-            organizations, many=True, context={"leads": leads}
+        rows = CommonUtils.serialize_in_chunks(
+            organizations,
+            dash_district_serializer.DistrictCollegeDetailsSerializer,
+            {"leads": leads},
         )
-        return CommonUtils.generate_csv(serializer.data, "District College Details")
+        return CommonUtils.generate_export(request, rows, "District College Details")
@@ -0,0 +1,255 @@
+import datetime
+import logging
+import os
+import re
+from contextlib import suppress
+
+import jwt
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    HttpRequest,
+    HttpResponse,
+    QueryDict,
+    StreamingHttpResponse,
+)
+from django.urls import Resolver404, resolve
+
+from db.export import ExportJob
+from utils.exception import CustomException
+from utils.types import ExportStatus
+from utils.utils import DateTimeUtils, XLSXExporter
+
+logger = logging.getLogger("django")
+
+
+class ExportJobHelper:
+    """
+    Runs the CSV export endpoints in the background.
+
+    A job keeps the path and query string of a CSV endpoint and the token
+    claims of the user who asked for it. `run_export_jobs` replays the
+    endpoint as that user, so the export gets the same queryset, filters,
+    format and role checks as a direct download. The response body (gzipped
+    CSV or XLSX) is written to DIRECTORY, and the job records how many rows
+    are done out of the total. DIRECTORY is kept out of MEDIA_ROOT, which
+    `muback-media/` serves to anyone.
+    Finished files are served with byte ranges and removed after TTL.
+    """
+
+    DIRECTORY = os.path.join(settings.BASE_DIR, "exports")
+    TTL = datetime.timedelta(hours=24)
+    TOKEN_LIFETIME = datetime.timedelta(minutes=10)
+    PROGRESS_INTERVAL = datetime.timedelta(seconds=2)
+    # running jobs report progress every PROGRESS_INTERVAL, a silent one has died
+    STALE_AFTER = datetime.timedelta(hours=1)
+    BLOCK_SIZE = 64 * 1024
+    RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+    @classmethod
+    def get_file_path(cls, job: ExportJob) -> str:
+        return os.path.join(cls.DIRECTORY, job.id)
+
+    @staticmethod
+    def get_content_type(job: ExportJob) -> tuple:
+        """Returns the content type and encoding the file was exported with."""
+        if job.file_name.endswith(f".{XLSXExporter.FORMAT}"):
+            return XLSXExporter.CONTENT_TYPE, None
+        return "text/csv", "gzip"
+
+    @staticmethod
+    def create(claims: dict, url: str) -> ExportJob:
+        """Queues an export of `url`, a CSV endpoint path with its query string."""
+        path, _, params = url.partition("?")
+        try:
+            resolve(path)
+        except Resolver404 as e:
+            raise CustomException("Invalid export path") from e
+        if any(
+            len(value) > ExportJob._meta.get_field(name).max_length
+            for name, value in (("path", path), ("params", params))
+        ):
+            raise CustomException("Export URL is too long")
+
+        return ExportJob.objects.create(
+            path=path,
+            params=params or None,
+            claims={name: value for name, value in claims.items() if name != "expiry"},
+            status=ExportStatus.PENDING.value,
+            created_by_id=claims["id"],
+        )
+
+    @classmethod
+    def get_request(cls, job: ExportJob) -> HttpRequest:
+        """Builds the GET request of the export, signed for its user."""
+        expiry = DateTimeUtils.get_current_utc_time() + cls.TOKEN_LIFETIME
+        token = jwt.encode(
+            {**job.claims, "expiry": expiry.strftime("%Y-%m-%d %H:%M:%S%z")},
+            settings.SECRET_KEY,
+            algorithm="HS256",
+        )
+
+        request = HttpRequest()
+        request.method = "GET"
+        request.path = request.path_info = job.path
+        request.GET = QueryDict(job.params or "")
+        request.META["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        return request
+
+    @staticmethod
+    def get_error(response) -> str:
+        messages = getattr(response, "data", None) or {}
+        general = messages.get("message", {}).get("general") if isinstance(messages, dict) else None
+        return " ".join(map(str, general)) if general else "Not a CSV export"
+
+    @classmethod
+    def set_status(cls, job: ExportJob, status: str, **fields) -> bool:
+        """Updates a running job. Returns False once `purge` has failed it."""
+        return bool(
+            ExportJob.objects.filter(id=job.id, status=ExportStatus.RUNNING.value).update(
+                status=status, updated_at=DateTimeUtils.get_current_utc_time(), **fields
+            )
+        )
+
+    @classmethod
+    def run(cls, job: ExportJob) -> bool:
+        """Builds the file of a pending job. Returns False if another worker took it."""
+        if not ExportJob.objects.filter(
+            id=job.id, status=ExportStatus.PENDING.value
+        ).update(
+            status=ExportStatus.RUNNING.value,
+            updated_at=DateTimeUtils.get_current_utc_time(),
+        ):
+            return False
+
+        file_path = cls.get_file_path(job)
+        part_path = f"{file_path}.part"
+        try:
+            match = resolve(job.path)
+            response = match.func(cls.get_request(job), *match.args, **match.kwargs)
+            if (exporter := getattr(response, "exporter", None)) is None:
+                raise CustomException(cls.get_error(response))
+            cls.set_status(job, ExportStatus.RUNNING.value, total_rows=exporter.count())
+
+            os.makedirs(cls.DIRECTORY, exist_ok=True)
+            reported_at = DateTimeUtils.get_current_utc_time()
+
+            def report_progress():
+                nonlocal reported_at
+                now = DateTimeUtils.get_current_utc_time()
+                if now - reported_at >= cls.PROGRESS_INTERVAL:
+                    cls.set_status(
+                        job, ExportStatus.RUNNING.value, rows_written=exporter.rows_written
+                    )
+                    reported_at = now
+
+            # a workbook sends no block until every row is written
+            if isinstance(exporter, XLSXExporter):
+                exporter.on_row = report_progress
+            with open(part_path, "wb") as file:
+                for block in response.streaming_content:
+                    file.write(block)
+                    report_progress()
+            os.replace(part_path, file_path)
+
+        except Exception as e:
+            logger.error(f"Export {job.id} of {job.path} failed: {e}")
+            with suppress(FileNotFoundError):
+                os.remove(part_path)
+            cls.set_status(job, ExportStatus.FAILED.value, error=str(e)[:255])
+            return True
+
+        file_name = re.search(r'filename="(.+)"', response["Content-Disposition"])
+        if not cls.set_status(
+            job,
+            ExportStatus.DONE.value,
+            rows_written=exporter.rows_written,
+            file_name=file_name[1] if file_name else f"{job.id}.csv",
+            expires_at=DateTimeUtils.get_current_utc_time() + cls.TTL,
+        ):
+            # purge failed the job meanwhile and will never remove its file
+            os.remove(file_path)
+        return True
+
+    @classmethod
+    def run_pending(cls) -> int:
+        jobs = ExportJob.objects.filter(status=ExportStatus.PENDING.value).order_by(
+            "created_at"
+        )
+        return sum(cls.run(job) for job in list(jobs))
+
+    @classmethod
+    def purge(cls) -> int:
+        """Fails jobs whose worker died and removes the files of expired jobs."""
+        now = DateTimeUtils.get_current_utc_time()
+        ExportJob.objects.filter(
+            status=ExportStatus.RUNNING.value, updated_at__lt=now - cls.STALE_AFTER
+        ).update(
+            status=ExportStatus.FAILED.value,
+            error="Export stopped before finishing",
+            updated_at=now,
+        )
+
+        expired = list(
+            ExportJob.objects.filter(status=ExportStatus.DONE.value, expires_at__lte=now)
+        )
+        for job in expired:
+            with suppress(FileNotFoundError):
+                os.remove(cls.get_file_path(job))
+        return ExportJob.objects.filter(id__in=[job.id for job in expired]).update(
+            status=ExportStatus.EXPIRED.value, updated_at=now
+        )
+
+    @classmethod
+    def read_range(cls, file_path: str, start: int, end: int):
+        with open(file_path, "rb") as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0 and (block := file.read(min(cls.BLOCK_SIZE, remaining))):
+                remaining -= len(block)
+                yield block
+
+    @classmethod
+    def get_file_response(cls, job: ExportJob, range_header: str = None):
+        """
+        Serves the file of a finished job, or the single byte range asked for
+        with a `Range: bytes=start-end` header. Other range forms get the
+        whole file.
+        """
+        file_path = cls.get_file_path(job)
+        content_type, encoding = cls.get_content_type(job)
+        size = os.path.getsize(file_path)
+        match = cls.RANGE.match(range_header or "")
+
+        if not match or not any(match.groups()):
+            response = FileResponse(
+                open(file_path, "rb"),
+                as_attachment=True,
+                filename=job.file_name,
+                content_type=content_type,
+            )
+        else:
+            start, end = match.groups()
+            if start:
+                start, end = int(start), min(int(end), size - 1) if end else size - 1
+            else:
+                start, end = max(size - int(end), 0), size - 1
+
+            if start > end:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+
+            response = StreamingHttpResponse(
+                cls.read_range(file_path, start, end),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = end - start + 1
+            response["Content-Disposition"] = f'attachment; filename="{job.file_name}"'
+
+        response["Accept-Ranges"] = "bytes"
+        if encoding:
+            response["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,69 @@
+from rest_framework.views import APIView
+
+from db.export import ExportJob
+from utils.exception import CustomException
+from utils.permission import CustomizePermission, JWTUtils
+from utils.response import CustomResponse
+from utils.types import ExportStatus
+from utils.utils import DateTimeUtils
+from .export_helper import ExportJobHelper
+from .serializers import ExportJobSerializer
+
+
+class ExportJobAPI(APIView):
+    authentication_classes = [CustomizePermission]
+
+    def get(self, request):
+        user_id = JWTUtils.fetch_user_id(request)
+        jobs = ExportJob.objects.filter(created_by_id=user_id).exclude(
+            status=ExportStatus.EXPIRED.value
+        ).order_by("-created_at")
+
+        return CustomResponse(
+            response=ExportJobSerializer(jobs, many=True).data
+        ).get_success_response()
+
+    def post(self, request):
+        try:
+            job = ExportJobHelper.create(request.auth, request.data.get("path", ""))
+        except CustomException as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
+
+        return CustomResponse(
+            general_message="Export queued",
+            response=ExportJobSerializer(job).data,
+        ).get_success_response()
+
+
+class ExportJobDetailAPI(APIView):
+    authentication_classes = [CustomizePermission]
+
+    def get(self, request, job_id):
+        user_id = JWTUtils.fetch_user_id(request)
+        if not (job := ExportJob.objects.filter(id=job_id, created_by_id=user_id).first()):
+            return CustomResponse(general_message="Export not found").get_failure_response()
+
+        return CustomResponse(
+            response=ExportJobSerializer(job).data
+        ).get_success_response()
+
+
+class ExportJobDownloadAPI(APIView):
+    authentication_classes = [CustomizePermission]
+
+    def get(self, request, job_id):
+        user_id = JWTUtils.fetch_user_id(request)
+        if not (job := ExportJob.objects.filter(id=job_id, created_by_id=user_id).first()):
+            return CustomResponse(general_message="Export not found").get_failure_response()
+
+        if job.status != ExportStatus.DONE.value:
+            return CustomResponse(
+                general_message=f"Export is {job.status}"
+            ).get_failure_response()
+
+        if job.expires_at <= DateTimeUtils.get_current_utc_time():
+            return CustomResponse(
+                general_message="Export has expired"
+            ).get_failure_response()
+
+        return ExportJobHelper.get_file_response(job, request.headers.get("Range"))
@@ -0,0 +1,20 @@
+from rest_framework import serializers
+
+from db.export import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "path",
+            "params",
+            "status",
+            "rows_written",
+            "total_rows",
+            "file_name",
+            "error",
+            "expires_at",
+            "created_at",
+        ]
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import export_views
+
+urlpatterns = [
+    path('', export_views.ExportJobAPI.as_view()),
+    path('<str:job_id>/', export_views.ExportJobDetailAPI.as_view()),
+    path('<str:job_id>/download/', export_views.ExportJobDownloadAPI.as_view()),
+]
@@ -205,9 +205,9 @@ class InterestGroupCSV(APIView):
             .all()
         )
 
-        ig_serializer_data = InterestGroupSerializer(ig_serializer, many=True).data
+        rows = CommonUtils.serialize_in_chunks(ig_serializer, InterestGroupSerializer)
 
-        return CommonUtils.generate_csv(ig_serializer_data, "Interest Group")
+        return CommonUtils.generate_export(request, rows, "Interest Group")
 
 
 class InterestGroupGetAPI(APIView):
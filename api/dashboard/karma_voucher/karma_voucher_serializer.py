@@ -5,7 +5,7 @@ from db.task import VoucherLog, TaskList
 from db.user import User
 from utils.permission import JWTUtils
 from utils.utils import DateTimeUtils
-from utils.karma_voucher import generate_ordered_id
+from utils.karma_voucher import VoucherCodeAllocator
 
 
 class VoucherLogCSVSerializer(serializers.ModelSerializer):
@@ -31,7 +31,8 @@ class VoucherLogCSVSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
             'event',
-            'description'
+            'description',
+            'batch'
         ]
 
     def validate(self, data):
@@ -121,12 +122,7 @@ class VoucherLogCreateSerializer(serializers.ModelSerializer):
         validated_data['task_id'] = validated_data.pop('task')
         validated_data['id'] = uuid.uuid4()
 
-        existing_codes = set(VoucherLog.objects.values_list('code', flat=True))
-        count = 1
-        while generate_ordered_id(count) in existing_codes:
-            count += 1
-
-        validated_data['code'] = generate_ordered_id(count)
+        validated_data['code'] = VoucherCodeAllocator.reserve(1)[0]
         validated_data['claimed'] = False
         validated_data['updated_by_id'] = user_id
         validated_data['updated_at'] = DateTimeUtils.get_current_utc_time()
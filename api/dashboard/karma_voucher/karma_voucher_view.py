@@ -1,7 +1,8 @@
 import uuid
+import zipfile
 from email.mime.image import MIMEImage
 from io import BytesIO
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, TemporaryFile
 
 import decouple
 from django.core.mail import EmailMessage
@@ -14,7 +15,7 @@ from rest_framework.views import APIView
 
 from db.task import VoucherLog, TaskList
 from db.user import User
-from utils.karma_voucher import generate_karma_voucher, generate_ordered_id
+from utils.karma_voucher import VoucherCodeAllocator, VoucherRenderer, generate_karma_voucher
 from utils.permission import CustomizePermission, JWTUtils, role_required
 from utils.response import CustomResponse
 from utils.types import RoleType
@@ -33,26 +34,26 @@ class ImportVoucherLogAPI(APIView):
             file_obj = request.FILES['voucher_log']
         except KeyError:
             return CustomResponse(general_message={'File not found.'}).get_failure_response()
-        excel_data = ImportCSV()
-        excel_data = excel_data.read_excel_file(file_obj)
-        if not excel_data:
+        reader = ImportCSV()
+        headers, rows = reader.read_rows(file_obj)
+        if headers is None:
             return CustomResponse(general_message={'Empty csv file.'}).get_failure_response()
 
         temp_headers = ['muid', 'karma', 'hashtag',
                         'month', 'week', 'description', 'event']
-        first_entry = excel_data[0]
         for key in temp_headers:
-            if key not in first_entry:
+            if key not in headers:
                 return CustomResponse(general_message={f'{key} does not exist in the file.'}).get_failure_response()
         current_user = JWTUtils.fetch_user_id(request)
+        batch = str(uuid.uuid4())
 
-        excel_data = [row for row in excel_data if any(row.values())]
+        excel_data = [{key: row.get(key) for key in temp_headers} for row in rows]
         valid_rows = []
-        error_rows = []
+        error_rows = list(reader.errors)
         success_rows = []
         users_to_fetch = set()
         tasks_to_fetch = set()
-        for row in excel_data[1:]:
+        for row in excel_data:
             task_hashtag = row.get('hashtag')
             muid = row.get('muid')
             users_to_fetch.add(muid)
@@ -71,8 +72,7 @@ class ImportVoucherLogAPI(APIView):
 
         task_dict = {task['hashtag']: task['id'] for task in tasks}
 
-        count = 1
-        for row in excel_data[1:]:
+        for row in excel_data:
             task_hashtag = row.get('hashtag')
             karma = row.get('karma')
             month = row.get('month')
@@ -97,23 +97,22 @@ class ImportVoucherLogAPI(APIView):
                     row['error'] = "Month cannot be empty"
                     error_rows.append(row)
                 else:
-                    existing_codes = set(
-                        VoucherLog.objects.values_list('code', flat=True))
-                    while generate_ordered_id(count) in existing_codes:
-                        count += 1
                     # Preparing valid row data
                     row['user_id'] = user_id
                     row['task_id'] = task_id
                     row['id'] = str(uuid.uuid4())
-                    row['code'] = generate_ordered_id(count)
                     row['claimed'] = False
+                    row['batch'] = batch
                     row['created_by_id'] = current_user
                     row['updated_by_id'] = current_user
                     row['created_at'] = DateTimeUtils.get_current_utc_time()
                     row['updated_at'] = DateTimeUtils.get_current_utc_time()
-                    count += 1
                     valid_rows.append(row)
 
+        codes = VoucherCodeAllocator.reserve(len(valid_rows))
+        for row, code in zip(valid_rows, codes):
+            row['code'] = code
+
         # Serializing and saving valid voucher rows to the database
         voucher_serializer = VoucherLogCSVSerializer(
             data=valid_rows, many=True)
@@ -153,6 +152,8 @@ class ImportVoucherLogAPI(APIView):
                 return CustomResponse(
                     general_message='Something went wrong. Please try again.').get_failure_response()
 
+        vouchers = []
+        recipients = {}
         for voucher in voucher_serializer.data:
             muid = voucher['muid']
             code = voucher['code']
@@ -179,9 +180,21 @@ class ImportVoucherLogAPI(APIView):
                 'description': description,
                 'event': event
             })
-            # Preparing email context and attachment
-            from_mail = decouple.config("FROM_MAIL")
-            subject = "Congratulations on earning Karma points!"
+            vouchers.append({
+                'name': str(full_name),
+                'karma': str(int(karma)),
+                'code': code,
+                'hashtag': task_hashtag,
+                'month': time_or_event,
+            })
+            recipients[code] = (full_name, email)
+
+        # Vouchers are drawn in parallel and mailed as they are ready
+        from_mail = decouple.config("FROM_MAIL")
+        subject = "Congratulations on earning Karma points!"
+        for voucher, karma_voucher_image in VoucherRenderer.render_many(vouchers):
+            code = voucher['code']
+            full_name, email = recipients[code]
             text = f"""Greetings from GTech µLearn!
 
             Great news! You are just one step away from claiming your internship/contribution Karma points.
@@ -192,17 +205,13 @@ class ImportVoucherLogAPI(APIView):
             To claim your karma points copy this `voucher {code}` and paste it #task-dropbox channel along with your voucher image.
             """
 
-            karma_voucher_image = generate_karma_voucher(
-                name=str(full_name), karma=str(int(karma)), code=code, hashtag=task_hashtag,
-                month=time_or_event)
-            karma_voucher_image.seek(0)
             email_obj = EmailMessage(
                 subject=subject,
                 body=text,
                 from_email=from_mail,
                 to=[email],
             )
-            attachment = MIMEImage(karma_voucher_image.read())
+            attachment = MIMEImage(karma_voucher_image)
             attachment.add_header(
                 'Content-Disposition',
                 'attachment',
@@ -212,7 +221,7 @@ class ImportVoucherLogAPI(APIView):
             email_obj.send(fail_silently=False)
 
         return CustomResponse(
-            response={"Success": success_rows, "Failed": error_rows}
+            response={"Success": success_rows, "Failed": error_rows, "Batch": batch if success_rows else None}
         ).get_success_response()
 
 
@@ -332,6 +341,7 @@ class VoucherLogAPI(APIView):
     def delete(self, request, voucher_id):
         if voucher_log := VoucherLog.objects.filter(id=voucher_id).first():
             voucher_log.delete()
+            VoucherRenderer.discard(voucher_log.code)
             return CustomResponse(
                 general_message=f'Voucher successfully deleted'
             ).get_success_response()
@@ -346,10 +356,9 @@ class ExportVoucherLogAPI(APIView):
     @role_required([RoleType.ADMIN.value, RoleType.FELLOW.value, RoleType.ASSOCIATE.value])
     def get(self, request):
         voucher_serializer = VoucherLog.objects.all()
-        voucher_serializer_data = VoucherLogSerializer(
-            voucher_serializer, many=True).data
+        rows = CommonUtils.serialize_in_chunks(voucher_serializer, VoucherLogSerializer)
 
-        return CommonUtils.generate_csv(voucher_serializer_data, 'Voucher Log')
+        return CommonUtils.generate_export(request, rows, 'Voucher Log')
 
 
 class VoucherBaseTemplateAPI(APIView):
@@ -377,3 +386,39 @@ class VoucherBaseTemplateAPI(APIView):
                 f.seek(0)
                 new_file_object = f.read()
         return FileResponse(BytesIO(new_file_object), as_attachment=True, filename='voucher_base_template.xlsx')
+
+
+class VoucherImageAPI(APIView):
+    authentication_classes = [CustomizePermission]
+
+    @role_required([RoleType.ADMIN.value, RoleType.FELLOW.value, RoleType.ASSOCIATE.value])
+    def get(self, request, voucher_id):
+        voucher = VoucherLog.objects.filter(id=voucher_id).values(*VoucherRenderer.FIELDS).first()
+        if not voucher:
+            return CustomResponse(general_message='Invalid Voucher').get_failure_response()
+
+        _, image_data = next(VoucherRenderer.render_many([VoucherRenderer.get_voucher(voucher)]))
+        return FileResponse(BytesIO(image_data), as_attachment=True, filename=f"{voucher['code']}.jpg")
+
+
+class VoucherBatchImageAPI(APIView):
+    authentication_classes = [CustomizePermission]
+
+    @role_required([RoleType.ADMIN.value, RoleType.FELLOW.value, RoleType.ASSOCIATE.value])
+    def get(self, request, batch_id):
+        vouchers = [
+            VoucherRenderer.get_voucher(voucher)
+            for voucher in VoucherLog.objects.filter(batch=batch_id).order_by('code').values(
+                *VoucherRenderer.FIELDS
+            )
+        ]
+        if not vouchers:
+            return CustomResponse(general_message='Invalid Batch').get_failure_response()
+
+        # JPEGs do not compress any further, so they are stored as they are
+        archive = TemporaryFile()
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as zip_file:
+            for voucher, image_data in VoucherRenderer.render_many(vouchers):
+                zip_file.writestr(f"{voucher['code']}.jpg", image_data)
+        archive.seek(0)
+        return FileResponse(archive, as_attachment=True, filename=f'vouchers-{batch_id}.zip')
@@ -12,4 +12,7 @@ urlpatterns = [
     path('delete/<str:voucher_id>/', karma_voucher_view.VoucherLogAPI.as_view()),
 
     path('base-template/', karma_voucher_view.VoucherBaseTemplateAPI.as_view()),
+
+    path('image/<str:voucher_id>/', karma_voucher_view.VoucherImageAPI.as_view()),
+    path('batch/<str:batch_id>/images/', karma_voucher_view.VoucherBatchImageAPI.as_view()),
 ]   
\ No newline at end of file
@@ -5,6 +5,7 @@ from decouple import config
 from django.db.models import Sum
 from rest_framework import serializers
 
+from api.common.common_helper import CircleKarmaIndex, get_ig_karma, get_member_info
 from db.learning_circle import LearningCircle, UserCircleLink, InterestGroup, CircleMeetingLog
 from db.organization import UserOrganizationLink
 from db.task import KarmaActivityLog
@@ -274,17 +275,14 @@ class LearningCircleMemberListSerializer(serializers.ModelSerializer):
         ]
 
     def get_lc_karma(self, obj):
-        circle_id = self.context.get('circle_id')
-        karma_activity_log = KarmaActivityLog.objects.filter(
-            user=obj.user,
-            task__ig__learning_circle_ig__id=circle_id
-        ).aggregate(
-            karma=Sum(
-                'karma'
+        if not hasattr(self, "_lc_karma"):
+            circle_id = self.context.get('circle_id')
+            self._lc_karma = get_ig_karma(
+                LearningCircle.objects.filter(id=circle_id).values("ig_id")[:1],
+                UserCircleLink.objects.filter(circle_id=circle_id).values("user_id"),
             )
-        )['karma']
 
-        return karma_activity_log if karma_activity_log else 0
+        return self._lc_karma.get(obj.user_id) or 0
 
 
 class LearningCircleJoinSerializer(serializers.ModelSerializer):
@@ -385,18 +383,13 @@ class LearningCircleDetailsSerializer(serializers.ModelSerializer):
             lead=True
         ).exists()
 
+    def get_circle_karma(self, obj):
+        if not hasattr(self, "_circle_karma"):
+            self._circle_karma = CircleKarmaIndex.get_circle(obj)
+        return self._circle_karma
+
     def get_total_karma(self, obj):
-        return (
-            KarmaActivityLog.objects.filter(
-                user__user_circle_link_user__circle=obj,
-                user__user_circle_link_user__accepted=True,
-                task__ig=obj.ig,
-                appraiser_approved=True,
-            ).aggregate(
-                total_karma=Sum(
-                    'karma'
-                ))['total_karma'] or 0
-        )
+        return self.get_circle_karma(obj)["karma"]
 
     def get_members(self, obj):
         return self._get_member_info(obj, accepted=1)
@@ -405,83 +398,10 @@ class LearningCircleDetailsSerializer(serializers.ModelSerializer):
         return self._get_member_info(obj, accepted=None)
 
     def _get_member_info(self, obj, accepted):
-
-        members = obj.user_circle_link_circle.filter(
-            circle=obj,
-            accepted=accepted
-        )
-
-        member_info = []
-
-        for member in members:
-            total_ig_karma = KarmaActivityLog.objects.filter(
-                task__ig=member.circle.ig,
-                user=member.user,
-                appraiser_approved=True
-            ).aggregate(
-                total_karma=Sum(
-                    'karma'
-                ))['total_karma'] or 0
-
-            member_info.append({
-                'id': member.user.id,
-                'username': f'{member.user.full_name}',
-                'profile_pic': f'{member.user.profile_pic}' or None,
-                'karma': total_ig_karma,
-                'is_lead': member.lead,
-                'level': member.user.user_lvl_link_user.level.level_order
-            })
-
-        return member_info
+        return get_member_info(obj, accepted)
 
     def get_rank(self, obj):
-        total_karma = KarmaActivityLog.objects.filter(
-            user__user_circle_link_user__circle=obj,
-            user__user_circle_link_user__accepted=True,
-            task__ig=obj.ig,
-            appraiser_approved=True
-        ).aggregate(
-            total_karma=Sum(
-                'karma'
-            )
-        )['total_karma'] or 0
-
-        circle_ranks = {obj.name: {'total_karma': total_karma}}
-
-        all_learning_circles = LearningCircle.objects.filter(
-            ig=obj.ig
-        ).exclude(
-            id=obj.id
-        )
-
-        for lc in all_learning_circles:
-            total_karma_lc = KarmaActivityLog.objects.filter(
-                user__user_circle_link_user__circle=lc,
-                user__user_circle_link_user__accepted=True,
-                task__ig=lc.ig,
-                appraiser_approved=True
-            ).aggregate(
-                total_karma=Sum(
-                    'karma'
-                )
-            )['total_karma'] or 0
-
-            circle_ranks[lc.name] = {'total_karma': total_karma_lc}
-
-        sorted_ranks = sorted(
-            circle_ranks.items(),
-            key=lambda x: x[1]['total_karma'],
-            reverse=True
-        )
-
-        return next(
-            (
-                i + 1
-                for i, (circle_name, data) in enumerate(sorted_ranks)
-                if circle_name == obj.name
-            ),
-            None,
-        )
+        return self.get_circle_karma(obj)["rank"]
 
     def get_previous_meetings(self, obj):
         return obj.circle_meeting_log_learning_circle.all().values(
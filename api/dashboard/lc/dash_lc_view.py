@@ -151,7 +151,9 @@ class LearningCircleListMembersApi(APIView):
         # learning_circle = LearningCircle.objects.filter(
         #     id=circle_id
         # )
-        user_learning_circle = UserCircleLink.objects.filter(circle_id=circle_id)
+        user_learning_circle = UserCircleLink.objects.filter(
+            circle_id=circle_id
+        ).select_related("user__user_lvl_link_user__level")
 
         if user_learning_circle is None:
             return CustomResponse(
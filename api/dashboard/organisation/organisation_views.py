@@ -221,9 +221,9 @@ class InstitutionCSVAPI(APIView):
             )
         )
 
-        serializer = InstitutionSerializer(organizations, many=True).data
+        rows = CommonUtils.serialize_in_chunks(organizations, InstitutionSerializer)
 
-        return CommonUtils.generate_csv(serializer, f"{org_type} data")
+        return CommonUtils.generate_export(request, rows, f"{org_type} data")
 
 
 class InstitutionDetailsAPI(APIView):
@@ -566,8 +566,8 @@ class OrganisationImportAPI(APIView):
                 general_message="File not found."
             ).get_failure_response()
 
-        excel_data = ImportCSV()
-        excel_data = excel_data.read_excel_file(file_obj)
+        reader = ImportCSV()
+        excel_data = reader.read_excel_file(file_obj)
 
         if not excel_data:
             return CustomResponse(
@@ -590,7 +590,7 @@ class OrganisationImportAPI(APIView):
 
         excel_data = [row for row in excel_data if any(row.values())]
         valid_rows = []
-        error_rows = []
+        error_rows = list(reader.errors)
 
         title_excel = set()
         code_excel = set()
@@ -0,0 +1,473 @@
+import json
+import logging
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from redis.exceptions import RedisError
+
+from db.task import KarmaActivityLog, TaskList, UserIgLink, Wallet
+from db.user import Role, UserRoleLink
+from utils.types import RoleType
+from utils.utils import RedisUtils
+
+logger = logging.getLogger("django")
+
+
+class KarmaRank:
+    """
+    Ranks users by wallet karma within their cohort (students, mentors, enablers).
+
+    Each cohort is kept as a redis sorted set of user id -> karma so a rank is a
+    single O(log n) ZCOUNT. Users sharing the same karma share the same rank.
+    When redis is unreachable or a user is missing from the set the rank is
+    answered by one COUNT query against the wallet table instead.
+    """
+
+    STUDENT = "student"
+    MENTOR = "mentor"
+    ENABLER = "enabler"
+    COHORTS = (STUDENT, MENTOR, ENABLER)
+
+    @staticmethod
+    def get_key(cohort: str) -> str:
+        return f"karma:rank:{cohort}"
+
+    @classmethod
+    def get_cohort(cls, roles) -> str:
+        if RoleType.MENTOR.value in roles:
+            return cls.MENTOR
+        if RoleType.ENABLER.value in roles:
+            return cls.ENABLER
+        return cls.STUDENT
+
+    @classmethod
+    def get_cohort_wallets(cls, cohort: str):
+        if cohort == cls.MENTOR:
+            return Wallet.objects.filter(
+                user__user_role_link_user__verified=True,
+                user__user_role_link_user__role__title=RoleType.MENTOR.value,
+            )
+        if cohort == cls.ENABLER:
+            return Wallet.objects.filter(
+                user__user_role_link_user__verified=True,
+                user__user_role_link_user__role__title=RoleType.ENABLER.value,
+            )
+        return Wallet.objects.exclude(
+            Q(user__user_role_link_user__role__title__in=[
+                RoleType.ENABLER.value, RoleType.MENTOR.value])
+        )
+
+    @classmethod
+    def get_user_cohorts(cls, user_id) -> list:
+        """Returns every cohort set the user belongs to."""
+        roles = UserRoleLink.objects.filter(
+            user_id=user_id,
+            role__title__in=[RoleType.MENTOR.value, RoleType.ENABLER.value],
+        ).values_list("role__title", "verified")
+
+        cohorts = [
+            cls.MENTOR if title == RoleType.MENTOR.value else cls.ENABLER
+            for title, verified in roles
+            if verified
+        ]
+        return cohorts or ([] if roles else [cls.STUDENT])
+
+    @classmethod
+    def get_rank(cls, user_id, karma: int, roles) -> int:
+        cohort = cls.get_cohort(roles)
+        key = cls.get_key(cohort)
+
+        try:
+            client = RedisUtils.get_client()
+            if client.zscore(key, user_id) is not None:
+                return client.zcount(key, f"({karma}", "+inf") + 1
+        except RedisError as e:
+            logger.error(f"Karma rank lookup fell back to SQL: {e}")
+
+        return cls.get_cohort_wallets(cohort).filter(
+            karma__gt=karma
+        ).values("user_id").distinct().count() + 1
+
+    @classmethod
+    def sync_user(cls, user_id, karma: int = None) -> None:
+        """Moves a single user into the cohort sets they currently belong to."""
+        if karma is None:
+            karma = Wallet.objects.filter(user_id=user_id).values_list(
+                "karma", flat=True
+            ).first()
+
+        cohorts = [] if karma is None else cls.get_user_cohorts(user_id)
+
+        try:
+            pipeline = RedisUtils.get_client().pipeline()
+            for cohort in cls.COHORTS:
+                if cohort in cohorts:
+                    pipeline.zadd(cls.get_key(cohort), {user_id: karma})
+                else:
+                    pipeline.zrem(cls.get_key(cohort), user_id)
+            pipeline.execute()
+        except RedisError as e:
+            logger.error(f"Karma rank sync failed for {user_id}: {e}")
+
+    @classmethod
+    def sync_role_links(cls, links) -> None:
+        """Syncs the users of role links saved with bulk_create, which sends no post_save."""
+        if Role.objects.filter(
+            id__in={link.role_id for link in links},
+            title__in=[RoleType.MENTOR.value, RoleType.ENABLER.value],
+        ).exists():
+            for user_id in {link.user_id for link in links}:
+                cls.sync_user(user_id)
+
+    @classmethod
+    def rebuild(cls, batch_size: int = 5000) -> dict:
+        """
+        Recreates every cohort set from the wallet table and swaps it in atomically.
+        """
+        client = RedisUtils.get_client()
+        counts = {}
+
+        for cohort in cls.COHORTS:
+            key = cls.get_key(cohort)
+            temp_key = f"{key}:rebuild"
+            client.delete(temp_key)
+
+            wallets = (
+                cls.get_cohort_wallets(cohort)
+                .values_list("user_id", "karma")
+                .distinct()
+                .iterator(chunk_size=batch_size)
+            )
+
+            count = 0
+            batch = {}
+            for user_id, karma in wallets:
+                batch[user_id] = karma
+                if len(batch) >= batch_size:
+                    client.zadd(temp_key, batch)
+                    count += len(batch)
+                    batch = {}
+
+            if batch:
+                client.zadd(temp_key, batch)
+                count += len(batch)
+
+            if count:
+                client.rename(temp_key, key)
+            else:
+                client.delete(key)
+
+            counts[cohort] = count
+
+        return counts
+
+
+class KarmaHistogram:
+    """
+    Counts wallets per karma bucket to answer percentiles without touching the wallet table.
+
+    Buckets are 1 karma wide below 100 and grow tenfold with every decade after
+    that, so the whole distribution fits in a few hundred redis hash fields and
+    a percentile costs one HGETALL regardless of the number of users. Karma
+    inside a wider bucket is assumed to be evenly spread.
+
+    The hash only answers once `build_karma_histogram` has filled it and set
+    BUILT_KEY; until then moves are not recorded and the wallet table is used.
+    """
+
+    KEY = "karma:histogram"
+    BUILT_KEY = "karma:histogram:built"
+    # (start, end, width) of each bucket range, the last bucket is open ended
+    RANGES = (
+        (0, 100, 1),
+        (100, 1000, 10),
+        (1000, 10000, 100),
+        (10000, 100000, 1000),
+    )
+
+    @classmethod
+    def get_bucket(cls, karma: int) -> int:
+        karma = max(karma or 0, 0)
+        index = 0
+        for start, end, width in cls.RANGES:
+            if karma < end:
+                return index + (karma - start) // width
+            index += (end - start) // width
+        return index
+
+    @classmethod
+    def get_bucket_bounds(cls, bucket: int) -> tuple:
+        for start, end, width in cls.RANGES:
+            size = (end - start) // width
+            if bucket < size:
+                lower = start + bucket * width
+                return lower, lower + width
+            bucket -= size
+        return cls.RANGES[-1][1], None
+
+    @classmethod
+    def move(cls, old_karma, new_karma) -> None:
+        """Moves one wallet between buckets, pass None for a created or deleted wallet."""
+        try:
+            client = RedisUtils.get_client()
+            if not client.exists(cls.BUILT_KEY):
+                return
+            pipeline = client.pipeline()
+            if old_karma is not None:
+                pipeline.hincrby(cls.KEY, cls.get_bucket(old_karma), -1)
+            if new_karma is not None:
+                pipeline.hincrby(cls.KEY, cls.get_bucket(new_karma), 1)
+            pipeline.execute()
+        except RedisError as e:
+            logger.error(f"Karma histogram update failed: {e}")
+
+    @classmethod
+    def get_counts(cls) -> dict | None:
+        """Returns the count of every non-empty bucket, or None before the first build."""
+        pipeline = RedisUtils.get_client().pipeline()
+        pipeline.exists(cls.BUILT_KEY)
+        pipeline.hgetall(cls.KEY)
+        built, counts = pipeline.execute()
+        if not built:
+            return None
+        return {int(bucket): int(count) for bucket, count in counts.items() if int(count) > 0}
+
+    @classmethod
+    def get_percentile(cls, karma: int) -> float:
+        try:
+            counts = cls.get_counts()
+        except RedisError as e:
+            logger.error(f"Karma percentile fell back to SQL: {e}")
+            counts = None
+
+        if counts is not None:
+            total = sum(counts.values())
+            bucket = cls.get_bucket(karma)
+            below = sum(count for index, count in counts.items() if index < bucket)
+
+            lower, upper = cls.get_bucket_bounds(bucket)
+            if upper is not None and bucket in counts:
+                below += counts[bucket] * (max(karma, 0) - lower) / (upper - lower)
+        else:
+            total = Wallet.objects.count()
+            below = Wallet.objects.filter(karma__lt=karma).count()
+
+        return 0 if total == 0 else 100 - ((below * 100) / total)
+
+    @classmethod
+    def get_distribution(cls) -> list:
+        """Returns the non-empty buckets in karma order for charting."""
+        try:
+            counts = cls.get_counts()
+        except RedisError as e:
+            logger.error(f"Karma distribution fell back to SQL: {e}")
+            counts = None
+
+        if counts is None:
+            counts = cls.get_counts_from_db()
+
+        distribution = []
+        for bucket in sorted(counts):
+            lower, upper = cls.get_bucket_bounds(bucket)
+            distribution.append({"min": lower, "max": upper, "users": counts[bucket]})
+        return distribution
+
+    @classmethod
+    def get_counts_from_db(cls) -> dict:
+        counts = {}
+        for karma, count in (
+            Wallet.objects.values("karma")
+            .annotate(count=Count("id"))
+            .values_list("karma", "count")
+            .order_by()
+        ):
+            bucket = cls.get_bucket(karma)
+            counts[bucket] = counts.get(bucket, 0) + count
+        return counts
+
+    @classmethod
+    def rebuild(cls) -> int:
+        client = RedisUtils.get_client()
+        temp_key = f"{cls.KEY}:rebuild"
+        counts = cls.get_counts_from_db()
+
+        client.delete(temp_key)
+        if counts:
+            client.hset(temp_key, mapping=counts)
+            client.rename(temp_key, cls.KEY)
+        else:
+            client.delete(cls.KEY)
+        client.set(cls.BUILT_KEY, 1)
+
+        return sum(counts.values())
+
+
+class LevelProgress:
+    """
+    Builds the level -> task tree of a user's profile, marking completed tasks.
+
+    The user's completed task ids are loaded once as a set and every task with
+    a level is loaded once, so the tree costs three queries however many
+    levels and tasks there are. The result is cached per user and dropped
+    when the user gets karma or changes interest groups through this service;
+    the timeout bounds staleness for karma approved by the Discord bot.
+    """
+
+    CACHE_TIMEOUT = 60 * 10
+    # levels above this only list tasks of the user's interest groups
+    IG_LEVEL_ORDER = 4
+
+    @staticmethod
+    def get_key(user_id) -> str:
+        return f"level:progress:{user_id}"
+
+    @classmethod
+    def build(cls, user_id) -> dict:
+        user_igs = UserIgLink.objects.filter(user_id=user_id).values("ig__name")
+        completed = set(
+            KarmaActivityLog.objects.filter(
+                user_id=user_id, appraiser_approved=True
+            ).values_list("task_id", flat=True)
+        )
+
+        tasks = TaskList.objects.filter(level__isnull=False).filter(
+            Q(level__level_order__lte=cls.IG_LEVEL_ORDER) | Q(ig__name__in=user_igs)
+        ).values(
+            "id",
+            "level_id",
+            "active",
+            "discord_link",
+            "hashtag",
+            "karma",
+            task_name=F("title"),
+        )
+
+        progress = {}
+        for task in tasks:
+            is_completed = task["id"] in completed
+            if task["active"] or is_completed:
+                progress.setdefault(task["level_id"], []).append(
+                    {
+                        "task_name": task["task_name"],
+                        "discord_link": task["discord_link"],
+                        "hashtag": task["hashtag"],
+                        "completed": is_completed,
+                        "karma": task["karma"],
+                    }
+                )
+        return progress
+
+    @classmethod
+    def get(cls, user_id) -> dict:
+        key = cls.get_key(user_id)
+        try:
+            client = RedisUtils.get_client()
+            if (cached := client.get(key)) is not None:
+                return json.loads(cached)
+
+            progress = cls.build(user_id)
+            client.set(key, json.dumps(progress), ex=cls.CACHE_TIMEOUT)
+            return progress
+
+        except RedisError as e:
+            logger.error(f"Level progress cache unavailable: {e}")
+            return cls.build(user_id)
+
+    @classmethod
+    def invalidate(cls, user_id) -> None:
+        try:
+            RedisUtils.get_client().delete(cls.get_key(user_id))
+        except RedisError as e:
+            logger.error(f"Level progress invalidation failed for {user_id}: {e}")
+
+
+class ProfileAggregates:
+    """
+    Loads the grouped figures of user profiles: karma per interest group,
+    karma per task type and verified roles.
+
+    Every figure is a single grouped query over all the requested users, so a
+    profile costs the same four queries however many interest groups, task
+    types or roles the user has, and a page of KKEM users pays them once.
+    """
+
+    @staticmethod
+    def get_ig_karma(user_ids) -> dict:
+        """Returns user id -> [{id, name, karma}] for every interest group the user joined."""
+        karma = {
+            (user_id, ig_id): total_karma
+            for user_id, ig_id, total_karma in KarmaActivityLog.objects.filter(
+                user_id__in=user_ids,
+                task__ig__isnull=False,
+                appraiser_approved=True,
+            )
+            .values("user_id", ig_id=F("task__ig_id"))
+            .annotate(total_karma=Sum("karma"))
+            .values_list("user_id", "ig_id", "total_karma")
+            .order_by()
+        }
+
+        interest_groups = {}
+        for user_id, ig_id, name in UserIgLink.objects.filter(
+            user_id__in=user_ids
+        ).values_list("user_id", "ig_id", "ig__name"):
+            interest_groups.setdefault(user_id, []).append(
+                {"id": ig_id, "name": name, "karma": karma.get((user_id, ig_id)) or 0}
+            )
+        return interest_groups
+
+    @staticmethod
+    def get_karma_distribution(user_id) -> list:
+        return list(
+            KarmaActivityLog.objects.filter(user_id=user_id, appraiser_approved=True)
+            .values(task_type=F("task__type__title"))
+            .annotate(karma=Sum("karma"))
+            .order_by()
+        )
+
+    @staticmethod
+    def get_roles(user_id) -> list:
+        return list(
+            set(
+                UserRoleLink.objects.filter(user_id=user_id, verified=True).values_list(
+                    "role__title", flat=True
+                )
+            )
+        )
+
+
+@receiver(post_save, sender=Wallet)
+def wallet_karma_changed(sender, instance, created=False, **kwargs):
+    old_karma = None if created else getattr(instance, "_loaded_karma", None)
+    if created or instance.karma != old_karma:
+        KarmaRank.sync_user(instance.user_id, instance.karma)
+        KarmaHistogram.move(old_karma, instance.karma)
+
+
+@receiver(post_delete, sender=Wallet)
+def wallet_deleted(sender, instance, **kwargs):
+    KarmaHistogram.move(instance.karma, None)
+    try:
+        pipeline = RedisUtils.get_client().pipeline()
+        for cohort in KarmaRank.COHORTS:
+            pipeline.zrem(KarmaRank.get_key(cohort), instance.user_id)
+        pipeline.execute()
+    except RedisError as e:
+        logger.error(f"Karma rank removal failed for {instance.user_id}: {e}")
+
+
+@receiver(post_save, sender=UserRoleLink)
+@receiver(post_delete, sender=UserRoleLink)
+def user_role_changed(sender, instance, **kwargs):
+    if instance.role.title in [RoleType.MENTOR.value, RoleType.ENABLER.value]:
+        KarmaRank.sync_user(instance.user_id)
+
+
+@receiver(post_save, sender=KarmaActivityLog)
+@receiver(post_delete, sender=KarmaActivityLog)
+@receiver(post_save, sender=UserIgLink)
+@receiver(post_delete, sender=UserIgLink)
+def user_progress_changed(sender, instance, **kwargs):
+    if instance.user_id:
+        LevelProgress.invalidate(instance.user_id)
@@ -2,17 +2,19 @@ import uuid
 
 from decouple import config as decouple_config
 from django.db import transaction
-from django.db.models import F, Sum, Q
+from django.db.models import F
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
+from api.leaderboard.leaderboard_helper import KarmaRollupHelper
 from db.organization import UserOrganizationLink, District
 from db.task import InterestGroup, KarmaActivityLog, Level, TaskList, Wallet, UserIgLink, UserLvlLink
 from db.user import User, UserSettings, Socials
 from utils.exception import CustomException
 from utils.permission import JWTUtils
-from utils.types import OrganizationType, RoleType, MainRoles, WebHookActions, WebHookCategory
+from utils.types import OrganizationType, MainRoles, WebHookActions, WebHookCategory
 from utils.utils import DateTimeUtils, DiscordWebhooks
+from .profile_helper import KarmaHistogram, KarmaRank, LevelProgress, ProfileAggregates
 
 BE_DOMAIN_NAME = decouple_config('BE_DOMAIN_NAME')
 
@@ -71,14 +73,12 @@ class UserProfileSerializer(serializers.ModelSerializer):
         )
 
     def get_percentile(self, obj):
-        users_count_lt_user_karma = Wallet.objects.filter(
-            karma__lt=obj.wallet_user.karma
-        ).count()
-        user_count = User.objects.all().count()
-        return 0 if user_count == 0 else 100 - ((users_count_lt_user_karma * 100) / user_count)
+        return KarmaHistogram.get_percentile(obj.wallet_user.karma)
 
     def get_roles(self, obj):
-        return list({link.role.title for link in obj.user_role_link_user.filter(verified=True)})
+        if not hasattr(self, "_roles"):
+            self._roles = ProfileAggregates.get_roles(obj.id)
+        return self._roles
 
     def get_college_id(self, obj):
         org_type = (
@@ -106,63 +106,13 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return None
 
     def get_rank(self, obj):
-
-        roles = self.get_roles(obj)
-        user_karma = obj.wallet_user.karma
-        if RoleType.MENTOR.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.MENTOR.value,
-                karma__gte=user_karma,
-            ).order_by('-karma', '-updated_at', 'created_at')
-        elif RoleType.ENABLER.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.ENABLER.value,
-                karma__gte=user_karma,
-            ).order_by('-karma', '-updated_at', 'created_at')
-        else:
-            ranks = (
-                Wallet.objects.filter(karma__gte=user_karma)
-                .exclude(
-                    Q(user__user_role_link_user__role__title__in=[
-                        RoleType.ENABLER.value, RoleType.MENTOR.value])
-                ).order_by('-karma')
-            )
-
-        for count, _rank in enumerate(ranks, start=1):
-            if obj == _rank.user:
-                return count
+        return KarmaRank.get_rank(obj.id, obj.wallet_user.karma, self.get_roles(obj))
 
     def get_karma_distribution(self, obj):
-        return (
-            KarmaActivityLog.objects.filter(user=obj, appraiser_approved=True)
-            .values(task_type=F("task__type__title"))
-            .annotate(karma=Sum("karma"))
-            .order_by()
-        )
+        return ProfileAggregates.get_karma_distribution(obj.id)
 
     def get_interest_groups(self, obj):
-        interest_groups = []
-        for ig_link in UserIgLink.objects.filter(user=obj):
-            total_ig_karma = (
-                0
-                if KarmaActivityLog.objects.filter(
-                    task__ig=ig_link.ig, user=obj, appraiser_approved=True
-                )
-                   .aggregate(Sum("karma"))
-                   .get("karma__sum")
-                   is None
-                else KarmaActivityLog.objects.filter(
-                    task__ig=ig_link.ig, user=obj, appraiser_approved=True
-                )
-                   .aggregate(Sum("karma"))
-                   .get("karma__sum")
-            )
-            interest_groups.append(
-                {"id": ig_link.ig.id, "name": ig_link.ig.name, "karma": total_ig_karma}
-            )
-        return interest_groups
+        return ProfileAggregates.get_ig_karma([obj.id]).get(obj.id, [])
 
 
 class UserLevelSerializer(serializers.ModelSerializer):
@@ -173,29 +123,9 @@ class UserLevelSerializer(serializers.ModelSerializer):
         fields = ("name", "tasks", "karma")
 
     def get_tasks(self, obj):
-        user_id = self.context.get("user_id")
-        user_igs = UserIgLink.objects.filter(
-            user__id=user_id).values_list("ig__name", flat=True)
-        tasks = TaskList.objects.filter(level=obj)
-        
-        if obj.level_order > 4:
-            tasks = tasks.filter(ig__name__in=user_igs)
-
-        data = []
-        for task in tasks:
-            completed = KarmaActivityLog.objects.filter(
-                user=user_id, task=task, appraiser_approved=True).exists()
-            if task.active or completed:
-                data.append(
-                    {
-                        "task_name": task.title,
-                        "discord_link": task.discord_link,
-                        "hashtag": task.hashtag,
-                        "completed": completed,
-                        "karma": task.karma,
-                    }
-                )
-        return data
+        if not hasattr(self, "_progress"):
+            self._progress = LevelProgress.get(self.context.get("user_id"))
+        return self._progress.get(obj.id, [])
 
 
 class UserRankSerializer(ModelSerializer):
@@ -215,32 +145,7 @@ class UserRankSerializer(ModelSerializer):
         return ["Learner"] if len(roles) == 0 else roles
 
     def get_rank(self, obj):
-        roles = self.get_roles(obj)
-        user_karma = obj.wallet_user.karma
-        if RoleType.MENTOR.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.MENTOR.value,
-                karma__gte=user_karma,
-            ).order_by('-karma', '-updated_at', 'created_at')
-        elif RoleType.ENABLER.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.ENABLER.value,
-                karma__gte=user_karma,
-            ).order_by('-karma', '-updated_at', 'created_at')
-        else:
-            ranks = (
-                Wallet.objects.filter(karma__gte=user_karma)
-                .exclude(
-                    Q(user__user_role_link_user__role__title__in=[
-                        RoleType.ENABLER.value, RoleType.MENTOR.value])
-                ).order_by('-karma')
-            )
-
-        for count, _rank in enumerate(ranks, start=1):
-            if obj == _rank.user:
-                return count
+        return KarmaRank.get_rank(obj.id, obj.wallet_user.karma, self.context.get("roles"))
 
     def get_karma(self, obj):
         return total_karma.karma if (total_karma := obj.wallet_user) else None
@@ -311,6 +216,7 @@ class UserProfileEditSerializer(serializers.ModelSerializer):
 
                 UserOrganizationLink.objects.bulk_create(
                     user_organization_links)
+                KarmaRollupHelper.refresh_links(user_organization_links)
 
             
 
@@ -360,6 +266,8 @@ class UserIgEditSerializer(serializers.ModelSerializer):
             if len(user_ig_links) > 3:
                 raise CustomException("Cannot add more than 3 interest groups")
             UserIgLink.objects.bulk_create(user_ig_links)
+            # bulk_create sends no post_save for the new links
+            LevelProgress.invalidate(instance.id)
             return super().update(instance, validated_data)
 
     class Meta:
@@ -418,6 +326,12 @@ class LinkSocials(ModelSerializer):
                     karma=F("karma") + karma_value,
                     updated_by_id=user_id
                 )
+                karma = Wallet.objects.filter(user_id=user_id).values_list(
+                    "karma", flat=True
+                ).first()
+                KarmaRank.sync_user(user_id, karma)
+                if karma is not None:
+                    KarmaHistogram.move(karma - karma_value, karma)
 
         for account, account_url in validated_data.items():
             old_account_url = getattr(instance, account)
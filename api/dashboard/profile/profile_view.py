@@ -19,6 +19,7 @@ from utils.types import WebHookActions, WebHookCategory
 from utils.utils import DiscordWebhooks
 
 from . import profile_serializer
+from .profile_helper import KarmaHistogram
 from .profile_serializer import LinkSocials
 
 
@@ -322,6 +323,13 @@ class UserRankAPI(APIView):
         return CustomResponse(response=serializer.data).get_success_response()
 
 
+class KarmaDistributionAPI(APIView):
+    def get(self, request):
+        return CustomResponse(
+            response=KarmaHistogram.get_distribution()
+        ).get_success_response()
+
+
 class GetSocialsAPI(APIView):
     def get(self, request, muid=None):
         if muid is not None:
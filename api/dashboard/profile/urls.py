@@ -14,6 +14,7 @@ urlpatterns = [
     path('share-user-profile/', profile_view.ShareUserProfileAPI.as_view()),
     path('share-user-profile/<str:uuid>/', profile_view.ShareUserProfileAPI.as_view()),
     path('rank/<str:muid>/', profile_view.UserRankAPI.as_view()),
+    path('karma-distribution/', profile_view.KarmaDistributionAPI.as_view()),
     path('get-user-levels/', profile_view.UserLevelsAPI.as_view()),
     path('get-user-levels/<str:muid>/', profile_view.UserLevelsAPI.as_view()),
     path('socials/edit/', profile_view.SocialsAPI.as_view()),
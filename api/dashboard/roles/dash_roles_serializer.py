@@ -2,6 +2,7 @@ import uuid
 
 from rest_framework import serializers
 
+from api.dashboard.profile.profile_helper import KarmaRank
 from db.user import Role, User, UserRoleLink
 from utils.permission import JWTUtils
 from utils.utils import DateTimeUtils, DiscordWebhooks
@@ -52,6 +53,7 @@ class RoleAssignmentSerializer(serializers.Serializer):
         ]
         with transaction.atomic():
             UserRoleLink.objects.bulk_create(user_roles_to_create)
+            KarmaRank.sync_role_links(user_roles_to_create)
             DiscordWebhooks.general_updates(
                 WebHookCategory.BULK_ROLE.value,
                 WebHookActions.UPDATE.value,
@@ -124,10 +124,10 @@ class RoleManagementCSV(APIView):
     def get(self, request):
         role = Role.objects.all()
 
-        role_serializer_data = dash_roles_serializer.RoleDashboardSerializer(
-            role, many=True
-        ).data
-        return CommonUtils.generate_csv(role_serializer_data, "Roles")
+        rows = CommonUtils.serialize_in_chunks(
+            role, dash_roles_serializer.RoleDashboardSerializer
+        )
+        return CommonUtils.generate_export(request, rows, "Roles")
 
 
 class UserRoleSearchAPI(APIView):
@@ -354,38 +354,31 @@ class UserRoleBulkAssignAPI(APIView):
                 general_message="File not found."
             ).get_failure_response()
 
-        excel_data = ImportCSV()
-        excel_data = excel_data.read_excel_file(file_obj)
+        reader = ImportCSV()
+        headers, rows = reader.read_rows(file_obj)
 
-        if not excel_data:
+        if headers is None:
             return CustomResponse(
                 general_message="Empty csv file."
             ).get_failure_response()
 
         temp_headers = ["muid", "role"]
-        first_entry = excel_data[0]
         for key in temp_headers:
-            if key not in first_entry:
+            if key not in headers:
                 return CustomResponse(
                     general_message=f"{key} does not exist in the file."
                 ).get_failure_response()
 
-        excel_data = [row for row in excel_data if any(row.values())]
+        excel_data = []
         valid_rows = []
         error_rows = []
         users_to_fetch = set()
         roles_to_fetch = set()
         user_role_link_to_check = set()
 
-        for row in excel_data[1:]:
-            keys_to_keep = ["muid", "role"]
-            row_keys = list(row.keys())
-            # Remove columns other than "muid" and "role"
-            for key in row_keys:
-                if key not in keys_to_keep:
-                    del row[key]
-
-        for row in excel_data[1:]:
+        for row in rows:
+            # Keep only the "muid" and "role" columns
+            row = {key: row.get(key) for key in temp_headers}
             user = row.get("muid")
             role = row.get("role")
             users_to_fetch.add(user)
@@ -393,9 +386,10 @@ class UserRoleBulkAssignAPI(APIView):
             if (user, role) in user_role_link_to_check:
                 row["error"] = "Duplicate entry"
                 error_rows.append(row)
-                excel_data.remove(row)
             else:
                 user_role_link_to_check.add((user, role))
+                excel_data.append(row)
+        error_rows = reader.errors + error_rows
 
         users = User.objects.filter(muid__in=users_to_fetch).values(
             "id",
@@ -414,7 +408,7 @@ class UserRoleBulkAssignAPI(APIView):
         roles_dict = {role["title"]: role["id"] for role in roles}
         users_by_role = {role_title: [] for role_title in roles_dict.keys()}
 
-        for row in excel_data[1:]:
+        for row in excel_data:
             user = row.pop("muid")
             role = row.pop("role")
 
@@ -0,0 +1,96 @@
+from rest_framework.fields import BooleanField
+
+from db.organization import Organization
+from db.task import Channel, InterestGroup, Level, TaskList, TaskType
+from utils.bulk_import import BulkImporter
+from utils.types import Events
+
+
+class TaskImporter(BulkImporter):
+    """
+    Imports a task list sheet. Tasks are matched to their channel, type,
+    level and interest group by name and to their organization by code, and
+    a hashtag may appear once in the sheet and not already be taken.
+    """
+
+    model = TaskList
+    headers = [
+        "hashtag",
+        "title",
+        "description",
+        "karma",
+        "usage_count",
+        "variable_karma",
+        "level",
+        "channel",
+        "type",
+        "ig",
+        "org",
+        "event",
+    ]
+    relations = {
+        "channel": (Channel, "name", "channel_id"),
+        "type": (TaskType, "title", "type_id"),
+        "level": (Level, "name", "level_id"),
+        "ig": (InterestGroup, "name", "ig_id"),
+        "org": (Organization, "code", "org_id"),
+    }
+    unique = {"hashtag": "hashtag"}
+
+    def normalize(self, row: dict) -> dict:
+        row = super().normalize(row)
+        if row.get("usage_count") is None:
+            row["usage_count"] = 1
+
+        variable_karma = row.get("variable_karma")
+        if variable_karma is None or variable_karma in BooleanField.FALSE_VALUES:
+            row["variable_karma"] = False
+        elif variable_karma in BooleanField.TRUE_VALUES:
+            row["variable_karma"] = True
+        return row
+
+    def check(self, row: dict, seen: dict) -> str | None:
+        if not row.get("hashtag"):
+            return "Missing hashtag."
+        if error := super().check(row, seen):
+            return error
+        if not row.get("title"):
+            return "Missing title."
+        return None
+
+    def validate(self, row: dict, relations: dict, taken: dict) -> str | None:
+        if error := super().validate(row, relations, taken):
+            return error
+        if (event := row.get("event")) is not None and event not in Events.get_all_values():
+            return f"Invalid event: {event}"
+        return None
+
+    def build(self, row: dict, relations: dict) -> TaskList:
+        return TaskList(
+            hashtag=row["hashtag"],
+            title=row["title"],
+            description=row.get("description"),
+            karma=row.get("karma"),
+            usage_count=row["usage_count"],
+            variable_karma=row["variable_karma"],
+            event=row.get("event"),
+            active=True,
+            **self.get_relation_ids(row, relations),
+            **self.get_audit_fields(),
+        )
+
+    def report(self, row: dict, instance: TaskList) -> dict:
+        return {
+            "hashtag": instance.hashtag,
+            "title": instance.title,
+            "description": instance.description,
+            "karma": instance.karma,
+            "usage_count": instance.usage_count,
+            "variable_karma": instance.variable_karma,
+            "level": row.get("level"),
+            "channel": row.get("channel"),
+            "type": row.get("type"),
+            "ig": row.get("ig"),
+            "org": row.get("org"),
+            "event": instance.event,
+        }
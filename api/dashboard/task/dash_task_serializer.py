@@ -4,10 +4,10 @@ from rest_framework import serializers
 
 from db.task import TaskList, TaskType
 from utils.permission import JWTUtils
-from utils.utils import DateTimeUtils
+from utils.utils import DateTimeUtils, SparseFieldsMixin
 
 
-class TaskListSerializer(serializers.ModelSerializer):
+class TaskListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     channel = serializers.CharField(
         source="channel.name", required=False, default=None)
     type = serializers.CharField(source="type.title")
@@ -46,6 +46,7 @@ class TaskListSerializer(serializers.ModelSerializer):
             "bonus_time",
             "bonus_karma",
         ]
+        sparse_field_sources = {"total_karma_gainers": []}
 
     def get_total_karma_gainers(self, obj):
         return obj.karma_activity_log_task.filter(
@@ -78,63 +79,6 @@ class TaskModifySerializer(serializers.ModelSerializer):
         )
 
 
-class TaskImportSerializer(serializers.ModelSerializer):
-    created_by_id = serializers.CharField(required=True, allow_null=False)
-    updated_by_id = serializers.CharField(required=True, allow_null=False)
-    channel_id = serializers.CharField(required=False, allow_null=True)
-    type_id = serializers.CharField(required=False, allow_null=True)
-    org_id = serializers.CharField(required=False, allow_null=True)
-    level_id = serializers.CharField(required=False, allow_null=True)
-    ig_id = serializers.CharField(required=False, allow_null=True)
-    usage_count = serializers.IntegerField(allow_null=True)
-    variable_karma = serializers.BooleanField(allow_null=True)
-
-    class Meta:
-        model = TaskList
-        fields = [
-            "id",
-            "hashtag",
-            "discord_link",
-            "title",
-            "description",
-            "karma",
-            "channel_id",
-            "type_id",
-            "org_id",
-            "event",
-            "level_id",
-            "ig_id",
-            "active",
-            "variable_karma",
-            "usage_count",
-            "created_by_id",
-            "updated_by_id",
-            "created_at",
-            "updated_at",
-        ]
-
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-
-        representation['channel_id'] = instance.channel.name if instance.channel else None
-        representation['type_id'] = instance.type.title if instance.type else None
-        representation['org_id'] = instance.org.code if instance.org else None
-        representation['level_id'] = instance.level.name if instance.level else None
-        representation['ig_id'] = instance.ig.name if instance.ig else None
-
-        return representation
-
-    def validate_usage_count(self, value):
-        if value is None:
-            return 1
-        return value
-
-    def validate_variable_karma(self, value):
-        if value is None:
-            return False
-        return value
-
-
 class TasktypeSerializer(serializers.ModelSerializer):
     updated_by = serializers.CharField(source='updated_by.full_name')
     created_by = serializers.CharField(source='created_by.full_name')
@@ -25,6 +25,7 @@ urlpatterns = [
     path('events/', include('api.dashboard.events.urls')),
 
     path('coupon/', include('api.dashboard.coupon.urls')),
+    path('export/', include('api.dashboard.export.urls')),
 
     path('projects/', include('api.dashboard.projects.urls')),
 ]
@@ -4,18 +4,20 @@ from decouple import config as decouple_config
 from django.db import transaction
 from rest_framework import serializers
 
+from api.dashboard.profile.profile_helper import KarmaRank, LevelProgress
+from api.leaderboard.leaderboard_helper import KarmaRollupHelper
 from db.organization import Organization, UserOrganizationLink
 from db.task import UserIgLink
 from db.user import User, UserRoleLink
 from utils.permission import JWTUtils
 from utils.types import OrganizationType
-from utils.utils import DateTimeUtils
+from utils.utils import DateTimeUtils, SparseFieldsMixin
 from db.user import DynamicRole, DynamicUser
 
 BE_DOMAIN_NAME = decouple_config('BE_DOMAIN_NAME')
 
 
-class UserDashboardSerializer(serializers.ModelSerializer):
+class UserDashboardSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     karma = serializers.IntegerField(source="wallet_user.karma", default=None)
     level = serializers.CharField(
         source="user_lvl_link_user.level.name", default=None)
@@ -169,6 +171,7 @@ class UserDetailsSerializer(serializers.ModelSerializer):
                 ]
                 existing_orgs.delete()
                 UserOrganizationLink.objects.bulk_create(new_orgs)
+                KarmaRollupHelper.refresh_links(new_orgs)
 
             if interest_groups is not None:
                 existing_ig = UserIgLink.objects.filter(user=user)
@@ -184,6 +187,8 @@ class UserDetailsSerializer(serializers.ModelSerializer):
                 ]
                 existing_ig.delete()
                 UserIgLink.objects.bulk_create(new_ig)
+                # bulk_create sends no post_save for the new links
+                LevelProgress.invalidate(user.id)
 
             return super().update(instance, validated_data)
 
@@ -321,7 +326,7 @@ class UserDetailsEditSerializer(serializers.ModelSerializer):
                     validated_data.pop("department", None)
                     validated_data.pop("graduation_year", None)
 
-                UserOrganizationLink.objects.bulk_create(
+                org_links = UserOrganizationLink.objects.bulk_create(
                     [
                         UserOrganizationLink(
                             user=instance,
@@ -337,10 +342,11 @@ class UserDetailsEditSerializer(serializers.ModelSerializer):
                         for org in organizations
                     ]
                 )
+                KarmaRollupHelper.refresh_links(org_links)
 
             if isinstance(role_ids := validated_data.pop("roles", None), list):
                 instance.user_role_link_user.all().delete()
-                UserRoleLink.objects.bulk_create(
+                role_links = UserRoleLink.objects.bulk_create(
                     [
                         UserRoleLink(
                             user=instance,
@@ -352,6 +358,7 @@ class UserDetailsEditSerializer(serializers.ModelSerializer):
                         for role_id in role_ids
                     ]
                 )
+                KarmaRank.sync_role_links(role_links)
 
             if isinstance(
                     interest_group_ids := validated_data.pop("interest_groups", None), list
@@ -368,5 +375,7 @@ class UserDetailsEditSerializer(serializers.ModelSerializer):
                         for ig in interest_group_ids
                     ]
                 )
+                # bulk_create sends no post_save for the new links
+                LevelProgress.invalidate(instance.id)
 
             return super().update(instance, validated_data)
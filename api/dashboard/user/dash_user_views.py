@@ -87,9 +87,13 @@ class UserAPI(APIView):
 
     @role_required([RoleType.ADMIN.value])
     def get(self, request):
-        user_queryset = User.objects.select_related(
-            "wallet_user", "user_lvl_link_user", "user_lvl_link_user__level"
-        ).all()
+        fields = CommonUtils.get_sparse_fields(request)
+        user_queryset = dash_user_serializer.UserDashboardSerializer.prune_queryset(
+            User.objects.select_related(
+                "wallet_user", "user_lvl_link_user", "user_lvl_link_user__level"
+            ).all(),
+            fields,
+        )
 
         queryset = CommonUtils.get_paginated_queryset(
             user_queryset,
@@ -108,11 +112,11 @@ class UserAPI(APIView):
             },
         )
         serializer = dash_user_serializer.UserDashboardSerializer(
-            queryset.get("queryset"), many=True
+            queryset.get("queryset"), many=True, context={"fields": fields}
         )
 
         return CustomResponse().paginated_response(
-            data=serializer.data, pagination=queryset.get("pagination")
+            data=serializer.data, pagination=queryset.get("pagination"), fields=fields
         )
 
 
@@ -125,11 +129,11 @@ class UserManagementCSV(APIView):
             "wallet_user", "user_lvl_link_user", "user_lvl_link_user__level"
         ).all()
 
-        serializer = dash_user_serializer.UserDashboardSerializer(
-            user_queryset, many=True
+        rows = CommonUtils.serialize_in_chunks(
+            user_queryset, dash_user_serializer.UserDashboardSerializer
         )
 
-        return CommonUtils.generate_csv(serializer.data, "User")
+        return CommonUtils.generate_export(request, rows, "User")
 
 
 class UserVerificationAPI(APIView):
@@ -218,10 +222,10 @@ class UserVerificationCSV(APIView):
             verified=False
         )
 
-        serializer = dash_user_serializer.UserVerificationSerializer(
-            user_queryset, many=True
+        rows = CommonUtils.serialize_in_chunks(
+            user_queryset, dash_user_serializer.UserVerificationSerializer
         )
-        return CommonUtils.generate_csv(serializer.data, "User")
+        return CommonUtils.generate_export(request, rows, "User")
 
 
 class ForgotPasswordAPI(APIView):
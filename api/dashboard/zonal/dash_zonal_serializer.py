@@ -1,12 +1,12 @@
 from datetime import timedelta
 
-from django.db.models import Sum
 from rest_framework import serializers
 
 from db.organization import UserOrganizationLink, District
 from db.task import KarmaActivityLog, Level
 from db.user import User
-from utils.types import OrganizationType
+from api.leaderboard.leaderboard_helper import KarmaRollupHelper
+from utils.types import OrganizationType, RollupScope
 from utils.utils import DateTimeUtils
 
 
@@ -29,41 +29,23 @@ class ZonalDetailsSerializer(serializers.ModelSerializer):
             "active_members",
         ]
 
-    def get_rank(self, obj):
-        org_karma_dict = (
-            UserOrganizationLink.objects.filter(
-                org__org_type=OrganizationType.COLLEGE.value)
-            .values("org__district__zone")
-            .annotate(total_karma=Sum("user__wallet_user__karma"))
-        ).order_by("-total_karma", "org__created_at")
-
-        rank_dict = {
-            data["org__district__zone"]: data["total_karma"]
-            if data["total_karma"] is not None
-            else 0
-            for data in org_karma_dict
-        }
-
-        sorted_rank_dict = dict(
-            sorted(rank_dict.items(), key=lambda x: x[1], reverse=True)
-        )
+    def get_rollup(self, obj):
+        if not hasattr(self, "_rollup"):
+            self._rollup = KarmaRollupHelper.get(
+                RollupScope.ZONE.value, obj.org.district.zone.id
+            )
+        return self._rollup
 
-        if obj.org.district.zone.id in sorted_rank_dict:
-            keys_list = list(sorted_rank_dict.keys())
-            position = keys_list.index(obj.org.district.zone.id)
-            return position + 1
+    def get_rank(self, obj):
+        return KarmaRollupHelper.get_rank(self.get_rollup(obj))
 
     def get_karma(self, obj):
-        return UserOrganizationLink.objects.filter(
-            org_org_type=OrganizationType.COLLEGE.value,
-            org__district__zone=obj.org.district.zone,
-        ).aggregate(total_karma=Sum("user__wallet_user__karma"))["total_karma"]
+        rollup = self.get_rollup(obj)
+        return rollup.karma if rollup else 0
 
     def get_total_members(self, obj):
-        return UserOrganizationLink.objects.filter(
-            org_org_type=OrganizationType.COLLEGE.value,
-            org__district__zone=obj.org.district.zone,
-        ).count()
+        rollup = self.get_rollup(obj)
+        return rollup.members if rollup else 0
 
     def get_active_members(self, obj):
         today = DateTimeUtils.get_current_utc_time()
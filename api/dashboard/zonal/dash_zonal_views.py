@@ -1,14 +1,13 @@
-from itertools import islice
-
-from django.db.models import Case, CharField, F, Sum, When
+from django.db.models import Case, CharField, F, When
 from rest_framework.views import APIView
 
-from db.organization import District, Organization, UserOrganizationLink
-from db.task import Level, Wallet
+from api.leaderboard.leaderboard_helper import KarmaRollupHelper, get_wallet_ranks
+from db.organization import District, Organization
+from db.task import Level
 from db.user import User
 from utils.permission import CustomizePermission, JWTUtils, role_required
 from utils.response import CustomResponse
-from utils.types import OrganizationType, RoleType
+from utils.types import OrganizationType, RoleType, RollupScope
 from utils.utils import CommonUtils
 from . import dash_zonal_helper, dash_zonal_serializer
 
@@ -37,30 +36,14 @@ class ZonalTopThreeDistrictAPI(APIView):
 
         user_org_link = dash_zonal_helper.get_user_college_link(user_id)
 
-        district_karma_dict = (
-            UserOrganizationLink.objects.filter(
-                org__org_type=OrganizationType.COLLEGE.value,
-                org__district__zone=user_org_link.org.district.zone,
-                verified=True,
-            )
-            .values("org__district")
-            .annotate(total_karma=Sum("user__wallet_user__karma"))
-        )
-
         district_ranks = {
-            data["org__district"]: data["total_karma"]
-            if data["total_karma"] is not None
-            else 0
-            for data in district_karma_dict
+            rollup.scope_id: rollup.verified_karma
+            for rollup in KarmaRollupHelper.get_top(
+                RollupScope.DISTRICT.value, user_org_link.org.district.zone.id
+            )
         }
 
-        district_ranks = dict(
-            sorted(district_ranks.items(), key=lambda x: x[1], reverse=True)
-        )
-
-        top_districts = dict(islice(district_ranks.items(), 3))
-
-        org_user_district = District.objects.filter(id__in=top_districts).distinct()
+        org_user_district = District.objects.filter(id__in=district_ranks).distinct()
 
         serializer = dash_zonal_serializer.ZonalTopThreeDistrictSerializer(
             org_user_district, many=True, context={"ranks": district_ranks}
@@ -96,21 +79,6 @@ class ZonalStudentDetailsAPI(APIView):
 
         user_org_link = dash_zonal_helper.get_user_college_link(user_id)
 
-        rank = (
-            Wallet.objects.filter(
-                user__user_organization_link_user__org__district__zone=user_org_link.org.district.zone,
-                user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-            )
-            .distinct()
-            .order_by("-karma", "-updated_at", "created_at")
-            .values(
-                "user_id",
-                "karma",
-            )
-        )
-
-        ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
-
         user_org_links = (
             User.objects.filter(
                 user_organization_link_user__org__district__zone=user_org_link.org.district.zone,
@@ -136,6 +104,12 @@ class ZonalStudentDetailsAPI(APIView):
             },
         )
 
+        ranks = get_wallet_ranks(
+            user_org_links,
+            ["-karma", "-updated_at", "created_at"],
+            [user.id for user in paginated_queryset.get("queryset")],
+        )
+
         serializer = dash_zonal_serializer.ZonalStudentDetailsSerializer(
             paginated_queryset.get("queryset"), many=True, context={"ranks": ranks}
         )
@@ -157,21 +131,6 @@ class ZonalStudentDetailsCSVAPI(APIView):
 
         user_org_link = dash_zonal_helper.get_user_college_link(user_id)
 
-        rank = (
-            Wallet.objects.filter(
-                user__user_organization_link_user__org__district__zone=user_org_link.org.district.zone,
-                user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-            )
-            .distinct()
-            .order_by("-karma", "-updated_at", "created_at")
-            .values(
-                "user_id",
-                "karma",
-            )
-        )
-
-        ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
-
         user_org_links = (
             User.objects.filter(
                 user_organization_link_user__org__district__zone=user_org_link.org.district.zone,
@@ -185,10 +144,19 @@ class ZonalStudentDetailsCSVAPI(APIView):
             )
         )
 
-        serializer = dash_zonal_serializer.ZonalStudentDetailsSerializer(
-            user_org_links, many=True, context={"ranks": ranks}
+        ranks = get_wallet_ranks(user_org_links, ["-karma", "-updated_at", "created_at"])
+
+        rows = CommonUtils.serialize_in_chunks(
+            user_org_links,
+            dash_zonal_serializer.ZonalStudentDetailsSerializer,
+            {"ranks": ranks},
+        )
+        summary = CommonUtils.serialize_in_chunks(
+            [user_org_link], dash_zonal_serializer.ZonalDetailsSerializer
+        )
+        return CommonUtils.generate_export(
+            request, rows, "Zonal Student Details", {"Zone Summary": summary}
         )
-        return CommonUtils.generate_csv(serializer.data, "Zonal Student Details")
 
 
 class ZonalCollegeDetailsAPI(APIView):
@@ -294,7 +262,9 @@ class ZonalCollegeDetailsCSVAPI(APIView):
             )
         )
 
-        serializer = dash_zonal_serializer.ZonalCollegeDetailsSerializer(
-            organizations, many=True, context={"leads": leads}
+        rows = CommonUtils.serialize_in_chunks(
+            organizations,
+            dash_zonal_serializer.ZonalCollegeDetailsSerializer,
+            {"leads": leads},
         )
-        return CommonUtils.generate_csv(serializer.data, "Zonal College Details")
+        return CommonUtils.generate_export(request, rows, "Zonal College Details")
@@ -1,5 +1,6 @@
+import datetime
 import json
-from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from urllib.parse import parse_qs
 
 import requests
@@ -7,11 +8,13 @@ from Crypto.Cipher import AES
 from Crypto.Hash import SHA256
 from Crypto.Protocol.KDF import PBKDF2
 from Crypto.Util.Padding import unpad
+from django.db.models import F, Q
 
-from db.integrations import Integration
+from db.integrations import Integration, IntegrationCheckpoint
+from db.task import KarmaActivityLog
 from utils.exception import CustomException
 from utils.types import IntegrationType
-from utils.utils import send_template_mail
+from utils.utils import DateTimeUtils, send_template_mail
 
 
 def send_data_to_kkem(kkem_link):
@@ -81,3 +84,109 @@ def send_connection_successful_email(user):
         subject="Integration Successfully Completed!",
         address=["KKEM", "integration_successful.html"],
     )
+
+
+class KarmaEventFeed:
+    """
+    Change feed of the karma activity logs of users linked to an integration.
+
+    Events are read in (updated_at, id) order one keyset batch at a time, so
+    a response of any length holds at most BATCH_SIZE rows in memory. The
+    position after the last event is handed out as an opaque cursor. The
+    cursor a client sends is its acknowledgement of everything before it and
+    is stored as the integration's checkpoint, so a client that lost its
+    cursor resumes from there. Deleted logs are not part of the feed.
+    """
+
+    FEED = "karma"
+    BATCH_SIZE = 500
+    # rows newer than this may still belong to uncommitted transactions
+    SETTLE_DELAY = datetime.timedelta(seconds=30)
+
+    def __init__(self, integration: Integration):
+        self.integration = integration
+
+    @staticmethod
+    def encode_cursor(updated_at: datetime.datetime, log_id: str) -> str:
+        return urlsafe_b64encode(
+            json.dumps([updated_at.isoformat(), log_id]).encode()
+        ).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        try:
+            updated_at, log_id = json.loads(urlsafe_b64decode(cursor.encode()))
+            return datetime.datetime.fromisoformat(updated_at), log_id
+        except (TypeError, ValueError) as e:
+            raise CustomException("Invalid cursor") from e
+
+    def get_checkpoint(self) -> str | None:
+        return IntegrationCheckpoint.objects.filter(
+            integration=self.integration, feed=self.FEED
+        ).values_list("cursor", flat=True).first()
+
+    def set_checkpoint(self, cursor: str) -> None:
+        if not IntegrationCheckpoint.objects.filter(
+            integration=self.integration, feed=self.FEED
+        ).update(cursor=cursor, updated_at=DateTimeUtils.get_current_utc_time()):
+            IntegrationCheckpoint.objects.create(
+                integration=self.integration, feed=self.FEED, cursor=cursor
+            )
+
+    def get_queryset(self):
+        return KarmaActivityLog.objects.filter(
+            user__integration_authorization_user__integration=self.integration,
+            user__integration_authorization_user__verified=True,
+            updated_at__lt=DateTimeUtils.get_current_utc_time() - self.SETTLE_DELAY,
+        ).values(
+            "id",
+            "karma",
+            "updated_at",
+            mu_id=F("user__muid"),
+            jsid=F("user__integration_authorization_user__integration_value"),
+            task_name=F("task__title"),
+            hashtag=F("task__hashtag"),
+            interest_group=F("task__ig__name"),
+            approved=F("appraiser_approved"),
+        ).order_by("updated_at", "id")
+
+    def stream(self, cursor: str = None):
+        """
+        Yields one NDJSON line per event after `cursor`, then a final line
+        holding the cursor to send with the next request.
+
+        Without a cursor the feed resumes from the stored checkpoint, or from
+        the first event when there is none.
+        """
+        if cursor:
+            position = self.decode_cursor(cursor)
+            self.set_checkpoint(cursor)
+        elif cursor := self.get_checkpoint():
+            position = self.decode_cursor(cursor)
+        else:
+            position = None
+
+        queryset = self.get_queryset()
+        while True:
+            batch = queryset
+            if position:
+                updated_at, log_id = position
+                batch = batch.filter(
+                    Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=log_id)
+                )
+
+            events = list(batch[: self.BATCH_SIZE])
+            for event in events:
+                event["jsid"] = int(event["jsid"]) if event["jsid"] else None
+                event["updated_at"] = event["updated_at"].isoformat()
+                yield json.dumps(event) + "\n"
+
+            if events:
+                last = events[-1]
+                position = (datetime.datetime.fromisoformat(last["updated_at"]), last["id"])
+                cursor = self.encode_cursor(*position)
+
+            if len(events) < self.BATCH_SIZE:
+                break
+
+        yield json.dumps({"cursor": cursor}) + "\n"
@@ -1,6 +1,7 @@
 from django.db.models import Q
 from rest_framework import serializers
 
+from api.dashboard.profile.profile_helper import ProfileAggregates
 from db.integrations import Integration, IntegrationAuthorization
 from db.user import User
 from utils.exception import CustomException
@@ -35,32 +36,14 @@ class KKEMUserSerializer(serializers.ModelSerializer):
         return karma
 
     def get_interest_groups(self, obj):
-        user_ig_links = obj.user_ig_link_user.all()
-
-        # Extract ig_ids for filtering KarmaActivityLog in one go
-        interest_groups = [ig_link.ig for ig_link in user_ig_links]
-
-        # Aggregate karma for each interest group in one query
-        aggregated_karma = obj.karma_activity_log_user.all()
-
-        aggregated_karma = [
-            {
-                "task__ig__id": karma.task.ig.id,
-                "task__ig__name": karma.task.ig.name,
-                "karma": karma.karma,
-            }
-            for karma in aggregated_karma
-            if hasattr(karma.task, "ig") and karma.task.ig
-        ]
-
-        ig_details = {ig.name: 0 for ig in interest_groups}
+        ig_karma = self.context.get("ig_karma")
+        if ig_karma is None:
+            ig_karma = ProfileAggregates.get_ig_karma([obj.id])
 
-        for karma in aggregated_karma:
-            ig_name = karma["task__ig__name"]
-            if ig_name in ig_details:
-                ig_details[ig_name] += karma["karma"]
-
-        return [{"name": key, "karma": value} for key, value in ig_details.items()]
+        return [
+            {"name": ig["name"], "karma": ig["karma"]}
+            for ig in ig_karma.get(obj.id, [])
+        ]
 
     def get_jsid(self, obj):
         return int(obj.jsid) if obj.jsid else None
@@ -2,17 +2,17 @@ import logging
 from datetime import datetime
 
 import requests
-from django.db.models import F, Prefetch
+from django.db.models import F
 from rest_framework.views import APIView
+from api.dashboard.profile.profile_helper import ProfileAggregates
 from db.hackathon import Hackathon
 
 from db.integrations import Integration, IntegrationAuthorization
-from db.task import InterestGroup, KarmaActivityLog, TaskList, UserIgLink
 from db.user import User
 from utils.exception import CustomException
 from utils.response import CustomResponse
 from utils.types import IntegrationType
-from utils.utils import DateTimeUtils, send_template_mail
+from utils.utils import DateTimeUtils, ThreadedStreamingHttpResponse, send_template_mail
 
 from .. import integrations_helper
 from . import kkem_helper
@@ -30,26 +30,6 @@ class KKEMBulkKarmaAPI(APIView):
             .distinct()
             .annotate(jsid=F("integration_authorization_user__integration_value"))
             .select_related("wallet_user")
-            .prefetch_related(
-                Prefetch(
-                    "user_ig_link_user",
-                    queryset=UserIgLink.objects.select_related("ig"),
-                ),
-                Prefetch(
-                    "karma_activity_log_user",
-                    queryset=KarmaActivityLog.objects.filter(
-                        appraiser_approved=True
-                    ).prefetch_related(
-                        Prefetch(
-                            "task",
-                            queryset=TaskList.objects.all().prefetch_related(
-                                Prefetch("ig", queryset=InterestGroup.objects.all())
-                            ),
-                        )
-                    ),
-                ),
-            )
-            .distinct()
         )
 
         if from_datetime_str := request.GET.get("from_datetime"):
@@ -65,11 +45,40 @@ class KKEMBulkKarmaAPI(APIView):
                     general_message="Invalid datetime format",
                 ).get_failure_response()
 
-        serialized_users = KKEMUserSerializer(base_queryset, many=True)
+        users = list(base_queryset)
+        serialized_users = KKEMUserSerializer(
+            users,
+            many=True,
+            context={
+                "ig_karma": ProfileAggregates.get_ig_karma([user.id for user in users])
+            },
+        )
 
         return CustomResponse(response=serialized_users.data).get_success_response()
 
 
+class KKEMKarmaFeedAPI(APIView):
+    @integrations_helper.token_required(IntegrationType.KKEM.value)
+    def get(self, request):
+        integration = Integration.objects.filter(name=IntegrationType.KKEM.value).first()
+        if integration is None:
+            return CustomResponse(
+                general_message="KKEM integration not found"
+            ).get_failure_response()
+
+        feed = kkem_helper.KarmaEventFeed(integration)
+        cursor = request.GET.get("cursor")
+        if cursor:
+            try:
+                feed.decode_cursor(cursor)
+            except CustomException as e:
+                return CustomResponse(general_message=str(e)).get_failure_response()
+
+        return ThreadedStreamingHttpResponse(
+            feed.stream(cursor), content_type="application/x-ndjson"
+        )
+
+
 class KKEMIndividualKarmaAPI(APIView):
     @integrations_helper.token_required(IntegrationType.KKEM.value)
     def get(self, request, muid):
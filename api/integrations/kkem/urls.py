@@ -12,6 +12,7 @@ urlpatterns = [
     path('user/<str:encrypted_data>/', kkem_views.KKEMdetailsFetchAPI.as_view(), name="get-details"),
     
     path('users/', kkem_views.KKEMBulkKarmaAPI.as_view(), name="list-user"),
+    path('users/karma-feed/', kkem_views.KKEMKarmaFeedAPI.as_view(), name="karma-feed"),
     path('users/<str:muid>/', kkem_views.KKEMIndividualKarmaAPI.as_view(), name="get-user"),
     
     path('hackathon-stats/', kkem_views.HackathonStatsAPI.as_view(), name="hackathon-kkem"),
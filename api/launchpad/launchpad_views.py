@@ -1,8 +1,9 @@
 from django.db.models import Sum, Max, Prefetch, F, OuterRef, Subquery, IntegerField
-from django.db import connection
 from rest_framework.views import APIView
 
+from api.leaderboard.leaderboard_helper import EVENT_LEADERBOARDS
 from .serializers import LaunchpadLeaderBoardSerializer
+from utils.exception import CustomException
 from utils.response import CustomResponse
 from utils.utils import CommonUtils
 from db.user import User
@@ -59,65 +60,39 @@ from db.task import KarmaActivityLog
 #         )
 class Leaderboard(APIView):
     def get(self, request):
-        query = """
-        SELECT 
-            u.full_name, 
-            SUM(kal.karma) AS karma,
-            COALESCE(org.title, comm.title) AS org,
-            COALESCE(org.dis, d.name) AS district,
-            COALESCE(org.state, s.name) AS state,
-            MAX(kal.created_at) AS time_
-        FROM karma_activity_log AS kal
-        INNER JOIN user AS u ON kal.user_id = u.id
-        INNER JOIN task_list AS tl ON tl.id = kal.task_id
-        LEFT JOIN (
-            SELECT 
-                uol.user_id,
-                org.id, 
-                org.title AS title, 
-                d.name dis, 
-                s.name state
-            FROM user_organization_link AS uol
-            INNER JOIN organization AS org ON org.id = uol.org_id AND org.org_type IN 
-            ("College", "School", "Company")
-            LEFT JOIN district AS d ON d.id = org.district_id
-            LEFT JOIN zone AS z ON z.id = d.zone_id
-            LEFT JOIN state AS s ON s.id = z.state_id
-            GROUP BY uol.user_id
-        ) AS org ON org.user_id = u.id
-        LEFT JOIN (
-            SELECT 
-                uol.user_id,
-                org.id, 
-                org.title AS title
-            FROM organization AS org
-            INNER JOIN user_organization_link AS uol ON org.id = uol.org_id AND org.org_type IN ("Community")
-            GROUP BY uol.user_id
-        ) AS comm ON comm.user_id = u.id
-        LEFT JOIN district AS d ON d.id = u.district_id
-        LEFT JOIN zone AS z ON d.zone_id = z.id
-        LEFT JOIN state AS s ON z.state_id = s.id
-        WHERE 
-            tl.event = "launchpad" AND
-            kal.appraiser_approved = TRUE AND
-            u.id IN (
-                SELECT karma_activity_log.user_id FROM karma_activity_log 
-                INNER JOIN task_list ON karma_activity_log.task_id = task_list.id
-                WHERE
-                    task_list.hashtag = "#lp24-introduction" AND
-                    karma_activity_log.appraiser_approved = TRUE
+        leaderboard = EVENT_LEADERBOARDS["launchpad"]
+
+        cursor = request.query_params.get("cursor")
+        per_page = request.query_params.get("perPage")
+
+        if cursor is None and per_page is None:
+            rows = leaderboard.get_queryset().values(
+                "full_name", "karma", "org", "district", "state", time_=F("last_karma_at")
             )
-        GROUP BY u.id
-        ORDER BY karma DESC, time_
-        """
-        with connection.cursor() as cursor:
-            cursor.execute(query)
-            results = cursor.fetchall()
-            column_names = [desc[0] for desc in cursor.description]
-            user_ids = set()
-            list_of_dicts = []
-            for row in results:
-                if row[0] not in user_ids:
-                    user_ids.add(row[0])
-                    list_of_dicts.append(dict(zip(column_names, row)))
-            return CustomResponse(response=list_of_dicts).get_success_response()
\ No newline at end of file
+            return CustomResponse(response=list(rows)).get_success_response()
+
+        try:
+            page, next_cursor = leaderboard.get_page(cursor, int(per_page or 10))
+        except (CustomException, ValueError) as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
+
+        return CustomResponse().paginated_response(
+            data=[
+                {
+                    "rank": rank,
+                    "full_name": row.full_name,
+                    "karma": row.karma,
+                    "org": row.org,
+                    "district": row.district,
+                    "state": row.state,
+                    "time_": row.last_karma_at,
+                }
+                for row, rank in page
+            ],
+            pagination={
+                "count": leaderboard.get_queryset().count(),
+                "isNext": next_cursor is not None,
+                "isPrev": bool(cursor),
+                "nextCursor": next_cursor,
+            },
+        )
@@ -0,0 +1,667 @@
+import base64
+import datetime
+import json
+import logging
+import uuid
+
+import pytz
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Count, F, IntegerField, Max, Q, Sum, When, Window
+from django.db.models.functions import Rank
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from redis.exceptions import RedisError
+
+from db.leaderboard import EventLeaderboard, KarmaRollup, MonthlyLeaderboard
+from db.organization import Organization, UserOrganizationLink
+from db.settings import SystemSetting
+from db.task import KarmaActivityLog, Wallet
+from db.user import User
+from utils.exception import CustomException
+from utils.types import LeaderboardType, OrganizationType, RoleType, RollupScope
+from utils.utils import DateTimeUtils, RedisUtils
+
+logger = logging.getLogger("django")
+
+MONTH_FORMAT = "%Y-%m"
+# type of the row every snapshot writes, so a month without karma still counts as built
+SNAPSHOT_MARKER = "built"
+
+
+def get_month_range(month: str):
+    """
+    Returns the half-open [start, end) UTC range covered by a `YYYY-MM` month.
+    """
+    try:
+        start_date = datetime.datetime.strptime(month, MONTH_FORMAT)
+    except (TypeError, ValueError) as e:
+        raise CustomException(f"Invalid month '{month}', expected YYYY-MM") from e
+
+    start_date = start_date.replace(tzinfo=pytz.timezone("UTC"))
+    end_date = (start_date + datetime.timedelta(days=32)).replace(day=1)
+    return start_date, end_date
+
+
+def get_month_key(month: str) -> str:
+    """
+    Returns a month as the `YYYY-MM` snapshots are stored under, so `2026-8`
+    and `2026-08` share one snapshot.
+    """
+    start_date, _ = get_month_range(month)
+    return start_date.strftime(MONTH_FORMAT)
+
+
+def get_previous_month() -> str:
+    first_of_month = DateTimeUtils.get_current_utc_time().replace(day=1)
+    return (first_of_month - datetime.timedelta(days=1)).strftime(MONTH_FORMAT)
+
+
+def is_closed_month(month: str) -> bool:
+    _, end_date = get_month_range(month)
+    return end_date <= DateTimeUtils.get_current_utc_time()
+
+
+def _student_rows(month, start_date, end_date):
+    students = User.objects.filter(
+        user_role_link_user__role__title=RoleType.STUDENT.value,
+        user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
+        exist_in_guild=True,
+    ).values("id")
+
+    karma = (
+        KarmaActivityLog.objects.filter(
+            user__in=students,
+            appraiser_approved=True,
+            created_at__gte=start_date,
+            created_at__lt=end_date,
+        )
+        .values("user_id")
+        .annotate(total_karma=Sum("karma"))
+        .filter(total_karma__gt=0)
+        .order_by("-total_karma", "user_id")
+    )
+    karma = list(karma)
+    user_ids = [row["user_id"] for row in karma]
+
+    names = dict(User.objects.filter(id__in=user_ids).values_list("id", "full_name"))
+    institutions = dict(
+        UserOrganizationLink.objects.filter(
+            user_id__in=user_ids, org__org_type=OrganizationType.COLLEGE.value
+        ).values_list("user_id", "org__title")
+    )
+
+    return [
+        MonthlyLeaderboard(
+            month=month,
+            type=LeaderboardType.STUDENT.value,
+            rank=rank,
+            user_id=row["user_id"],
+            full_name=names.get(row["user_id"]),
+            institution=institutions.get(row["user_id"]),
+            total_karma=row["total_karma"],
+        )
+        for rank, row in enumerate(karma, start=1)
+    ]
+
+
+def _college_rows(month, start_date, end_date):
+    karma = (
+        KarmaActivityLog.objects.filter(
+            appraiser_approved=True,
+            created_at__gte=start_date,
+            created_at__lt=end_date,
+            user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
+        )
+        .values(org_id=F("user__user_organization_link_user__org_id"))
+        .annotate(
+            total_karma=Sum("karma"),
+            students=Count("user_id", distinct=True),
+        )
+        .filter(total_karma__gt=0)
+        .order_by("-total_karma", "org_id")
+    )
+    karma = list(karma)
+
+    orgs = {
+        org["id"]: org
+        for org in Organization.objects.filter(
+            id__in=[row["org_id"] for row in karma]
+        ).values("id", "code", "title")
+    }
+
+    return [
+        MonthlyLeaderboard(
+            month=month,
+            type=LeaderboardType.COLLEGE.value,
+            rank=rank,
+            org_id=row["org_id"],
+            code=orgs[row["org_id"]]["code"],
+            institution=orgs[row["org_id"]]["title"],
+            total_karma=row["total_karma"],
+            students=row["students"],
+        )
+        for rank, row in enumerate(karma, start=1)
+    ]
+
+
+def build_monthly_leaderboard(month: str, force: bool = False) -> bool:
+    """
+    Materializes the student and college rankings of a closed month.
+
+    Args:
+        month (str): The month to snapshot, as `YYYY-MM`.
+        force (bool, optional): Rebuild even if a snapshot already exists.
+
+    Returns:
+        bool: True if a snapshot was written, False if one already existed.
+    """
+    month = get_month_key(month)
+    if not is_closed_month(month):
+        raise CustomException(f"Month '{month}' has not ended yet")
+
+    if not force and MonthlyLeaderboard.objects.filter(month=month).exists():
+        return False
+
+    start_date, end_date = get_month_range(month)
+    rows = _student_rows(month, start_date, end_date) + _college_rows(
+        month, start_date, end_date
+    )
+    rows.append(MonthlyLeaderboard(month=month, type=SNAPSHOT_MARKER, rank=0))
+
+    try:
+        with transaction.atomic():
+            MonthlyLeaderboard.objects.filter(month=month).delete()
+            MonthlyLeaderboard.objects.bulk_create(rows, batch_size=1000)
+    except IntegrityError:
+        # a concurrent build of the same month won the race
+        return False
+
+    return True
+
+
+def get_monthly_leaderboard(month: str, leaderboard_type: str):
+    """
+    Returns the snapshot rows of a closed month, backfilling it on first access.
+    """
+    month = get_month_key(month)
+    if not is_closed_month(month):
+        raise CustomException(f"Month '{month}' has not ended yet")
+
+    if not MonthlyLeaderboard.objects.filter(month=month).exists():
+        build_monthly_leaderboard(month)
+
+    return MonthlyLeaderboard.objects.filter(
+        month=month, type=leaderboard_type
+    ).order_by("rank")
+
+
+def get_wallet_ranks(users, order_by, user_ids=None) -> dict:
+    """
+    Ranks the wallets of `users` with RANK() in the database.
+
+    Args:
+        users (QuerySet): The users in scope, e.g. every student of a zone.
+        order_by (list): The wallet fields to rank by, e.g. ["-karma", "created_at"].
+        user_ids (list, optional): Only return the ranks of these users, which
+            keeps a paginated listing from pulling the whole scope into memory.
+
+    Returns:
+        dict: The rank of each user id.
+    """
+    ranked = (
+        Wallet.objects.filter(user__in=users.values("id"))
+        .annotate(karma_rank=Window(Rank(), order_by=order_by))
+        .values("user_id", "karma_rank")
+        .order_by()
+    )
+    if user_ids is None:
+        return {row["user_id"]: row["karma_rank"] for row in ranked}
+    if not user_ids:
+        return {}
+
+    # the window has to see the whole scope, so the page is picked from the outside
+    sql, params = ranked.query.sql_with_params()
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {quote_name('user_id')}, {quote_name('karma_rank')} FROM ({sql}) ranked "
+            f"WHERE {quote_name('user_id')} IN ({', '.join(['%s'] * len(user_ids))})",
+            (*params, *user_ids),
+        )
+        return dict(cursor.fetchall())
+
+
+class EventLeaderboardEngine:
+    """
+    Maintains the ranking of an event in the `event_leaderboard` table.
+
+    A user is ranked by the approved karma they earned on tasks of the event,
+    ties going to whoever reached it first. When a qualifying hashtag is set
+    only users with an approved log for that hashtag are ranked.
+
+    The table is refreshed in micro-batches by the `refresh_event_leaderboard`
+    command: every refresh only recomputes the users whose karma logs changed
+    since the last watermark, which catches the logs written by the Discord
+    bot as well. Requests only read the table, and a redis lock keeps two
+    refreshes of the same event from overlapping.
+    """
+
+    LOCK_TIMEOUT = 300
+    # deletes the lock only while it still holds the token of the refresh that took it
+    RELEASE_SCRIPT = """
+        if redis.call("get", KEYS[1]) == ARGV[1] then
+            return redis.call("del", KEYS[1])
+        end
+        return 0
+    """
+    # logs can be committed a little after their updated_at, so every refresh
+    # looks back this far past the watermark (recomputing a user is idempotent)
+    WATERMARK_OVERLAP = datetime.timedelta(minutes=5)
+    BATCH_SIZE = 500
+
+    def __init__(self, event: str, hashtag: str = None):
+        self.event = event
+        self.hashtag = hashtag
+        self.lock_key = f"event_leaderboard:{event}:lock"
+        self.watermark_key = f"event_leaderboard.{event}.synced_at"
+
+    def get_queryset(self):
+        return EventLeaderboard.objects.filter(event=self.event).order_by(
+            "-karma", "last_karma_at", "user_id"
+        )
+
+    def get_watermark(self):
+        value = SystemSetting.objects.filter(key=self.watermark_key).values_list(
+            "value", flat=True
+        ).first()
+        return datetime.datetime.fromisoformat(value) if value else None
+
+    def set_watermark(self, watermark: datetime.datetime) -> None:
+        now = DateTimeUtils.get_current_utc_time()
+        if not SystemSetting.objects.filter(key=self.watermark_key).update(
+            value=watermark.isoformat(), updated_at=now
+        ):
+            SystemSetting.objects.create(
+                key=self.watermark_key,
+                value=watermark.isoformat(),
+                updated_at=now,
+                created_at=now,
+            )
+
+    def get_changed_users(self, since: datetime.datetime = None) -> list:
+        event_logs = Q(task__event=self.event)
+        if self.hashtag:
+            event_logs |= Q(task__hashtag=self.hashtag)
+
+        logs = KarmaActivityLog.objects.filter(event_logs)
+        if since is not None:
+            logs = logs.filter(updated_at__gte=since - self.WATERMARK_OVERLAP)
+
+        return list(logs.values_list("user_id", flat=True).distinct().order_by())
+
+    def _rows(self, user_ids) -> list:
+        karma = (
+            KarmaActivityLog.objects.filter(
+                user_id__in=user_ids,
+                task__event=self.event,
+                appraiser_approved=True,
+            )
+            .values("user_id")
+            .annotate(karma=Sum("karma"), last_karma_at=Max("created_at"))
+            .order_by()
+        )
+        if self.hashtag:
+            karma = karma.filter(
+                user_id__in=KarmaActivityLog.objects.filter(
+                    user_id__in=user_ids,
+                    task__hashtag=self.hashtag,
+                    appraiser_approved=True,
+                ).values("user_id")
+            )
+        karma = list(karma)
+        ranked_ids = [row["user_id"] for row in karma]
+
+        orgs, communities = {}, {}
+        for user_id, org_type, title, district, state in UserOrganizationLink.objects.filter(
+            user_id__in=ranked_ids,
+            org__org_type__in=[
+                OrganizationType.COLLEGE.value,
+                OrganizationType.SCHOOL.value,
+                OrganizationType.COMPANY.value,
+                OrganizationType.COMMUNITY.value,
+            ],
+        ).values_list(
+            "user_id",
+            "org__org_type",
+            "org__title",
+            "org__district__name",
+            "org__district__zone__state__name",
+        ):
+            if org_type == OrganizationType.COMMUNITY.value:
+                communities.setdefault(user_id, title)
+            else:
+                orgs.setdefault(user_id, (title, district, state))
+
+        users = {
+            user_id: (full_name, district, state)
+            for user_id, full_name, district, state in User.objects.filter(
+                id__in=ranked_ids
+            ).values_list("id", "full_name", "district__name", "district__zone__state__name")
+        }
+
+        rows = []
+        for row in karma:
+            full_name, user_district, user_state = users[row["user_id"]]
+            org, district, state = orgs.get(row["user_id"], (None, None, None))
+            rows.append(
+                EventLeaderboard(
+                    event=self.event,
+                    user_id=row["user_id"],
+                    full_name=full_name,
+                    karma=row["karma"] or 0,
+                    org=org or communities.get(row["user_id"]),
+                    district=district or user_district,
+                    state=state or user_state,
+                    last_karma_at=row["last_karma_at"],
+                )
+            )
+        return rows
+
+    def refresh(self, full: bool = False) -> int:
+        """
+        Recomputes the users whose karma logs changed since the last refresh.
+
+        Args:
+            full (bool, optional): Rebuild the whole table, which also drops
+                users whose logs were deleted.
+
+        Returns:
+            int: The number of users recomputed.
+        """
+        started_at = DateTimeUtils.get_current_utc_time()
+        watermark = None if full else self.get_watermark()
+        user_ids = self.get_changed_users(watermark)
+
+        try:
+            if watermark is None:
+                with transaction.atomic():
+                    EventLeaderboard.objects.filter(event=self.event).delete()
+                    for index in range(0, len(user_ids), self.BATCH_SIZE):
+                        EventLeaderboard.objects.bulk_create(
+                            self._rows(user_ids[index: index + self.BATCH_SIZE])
+                        )
+            else:
+                for index in range(0, len(user_ids), self.BATCH_SIZE):
+                    batch = user_ids[index: index + self.BATCH_SIZE]
+                    rows = self._rows(batch)
+                    with transaction.atomic():
+                        EventLeaderboard.objects.filter(
+                            event=self.event, user_id__in=batch
+                        ).delete()
+                        EventLeaderboard.objects.bulk_create(rows)
+        except IntegrityError:
+            # a refresh running without the lock (redis down) wrote the same users
+            logger.warning(f"Concurrent refresh of the {self.event} leaderboard")
+            return 0
+
+        self.set_watermark(started_at)
+        return len(user_ids)
+
+    def acquire(self) -> str | None:
+        """Takes the refresh lock, returning its token or None when it is held."""
+        token = uuid.uuid4().hex
+        if RedisUtils.get_client().set(self.lock_key, token, nx=True, ex=self.LOCK_TIMEOUT):
+            return token
+        return None
+
+    def release(self, token: str) -> None:
+        """Releases the lock unless it expired and was taken by another refresh."""
+        try:
+            RedisUtils.get_client().eval(self.RELEASE_SCRIPT, 1, self.lock_key, token)
+        except RedisError as e:
+            logger.error(f"Releasing the {self.event} leaderboard lock failed: {e}")
+
+    @staticmethod
+    def encode_cursor(row: EventLeaderboard, rank: int) -> str:
+        return base64.urlsafe_b64encode(
+            json.dumps(
+                [row.karma, row.last_karma_at.isoformat(), row.user_id, rank]
+            ).encode()
+        ).decode()
+
+    def get_page(self, cursor: str = None, per_page: int = 10):
+        """
+        Returns one page of the ranking after the keyset encoded in `cursor`.
+
+        Returns:
+            tuple: The rows paired with their rank, and the cursor of the next
+                page or None on the last page.
+        """
+        queryset = self.get_queryset()
+        rank = 0
+
+        if cursor:
+            try:
+                karma, last_karma_at, user_id, rank = json.loads(
+                    base64.urlsafe_b64decode(cursor.encode())
+                )
+                last_karma_at = datetime.datetime.fromisoformat(last_karma_at)
+                if not (
+                    type(karma) is int and type(rank) is int and isinstance(user_id, str)
+                ):
+                    raise ValueError("Invalid cursor fields")
+            except (TypeError, ValueError) as e:
+                raise CustomException("Invalid cursor") from e
+
+            queryset = queryset.filter(
+                Q(karma__lt=karma)
+                | Q(karma=karma, last_karma_at__gt=last_karma_at)
+                | Q(karma=karma, last_karma_at=last_karma_at, user_id__gt=user_id)
+            )
+
+        rows = list(queryset[: per_page + 1])
+        page = [
+            (row, rank) for rank, row in enumerate(rows[:per_page], start=rank + 1)
+        ]
+        next_cursor = (
+            self.encode_cursor(*page[-1]) if len(rows) > per_page else None
+        )
+        return page, next_cursor
+
+
+EVENT_LEADERBOARDS = {
+    "launchpad": EventLeaderboardEngine("launchpad", hashtag="#lp24-introduction"),
+}
+
+
+class KarmaRollupHelper:
+    """
+    Keeps wallet karma and member counts of colleges rolled up per organization,
+    district, zone and state in the `karma_rollup` table.
+
+    Wallet changes are applied as increments to the user's college rows only.
+    The district, zone and state rows are shared by every college under them,
+    so they are re-added from their colleges when a college's membership
+    changes and by the scheduled full refresh, which also picks up changes
+    made outside this service. Ranks are counted from the (scope, karma)
+    index, so they never go stale.
+    """
+
+    @staticmethod
+    def get_college_links():
+        return UserOrganizationLink.objects.filter(
+            org__org_type=OrganizationType.COLLEGE.value
+        )
+
+    @staticmethod
+    def _totals() -> dict:
+        return {
+            "karma": Sum("user__wallet_user__karma"),
+            "verified_karma": Sum(
+                Case(
+                    When(verified=True, then="user__wallet_user__karma"),
+                    default=0,
+                    output_field=IntegerField(),
+                )
+            ),
+            "members": Count("id"),
+        }
+
+    @classmethod
+    def refresh(cls) -> int:
+        """
+        Recomputes every row from `user_organization_link` and `wallet`.
+
+        Returns:
+            int: The number of rows written.
+        """
+        totals = {}
+        for org in (
+            cls.get_college_links()
+            .values(
+                "org_id",
+                district_id=F("org__district_id"),
+                zone_id=F("org__district__zone_id"),
+                state_id=F("org__district__zone__state_id"),
+            )
+            .annotate(**cls._totals())
+            .order_by()
+        ):
+            chain = (
+                (RollupScope.ORGANIZATION.value, org["org_id"], org["district_id"]),
+                (RollupScope.DISTRICT.value, org["district_id"], org["zone_id"]),
+                (RollupScope.ZONE.value, org["zone_id"], org["state_id"]),
+                (RollupScope.STATE.value, org["state_id"], None),
+            )
+            for scope, scope_id, parent_id in chain:
+                if scope_id is None:
+                    break
+                row = totals.setdefault(
+                    (scope, scope_id),
+                    KarmaRollup(scope=scope, scope_id=scope_id, parent_id=parent_id),
+                )
+                row.karma += org["karma"] or 0
+                row.verified_karma += org["verified_karma"] or 0
+                row.members += org["members"]
+
+        with transaction.atomic():
+            KarmaRollup.objects.all().delete()
+            KarmaRollup.objects.bulk_create(totals.values(), batch_size=1000)
+
+        return len(totals)
+
+    @classmethod
+    def refresh_org(cls, org_id) -> None:
+        """Recomputes a single college and re-adds up its district, zone and state."""
+        org = Organization.objects.filter(
+            id=org_id, org_type=OrganizationType.COLLEGE.value
+        ).values(
+            "district_id",
+            zone_id=F("district__zone_id"),
+            state_id=F("district__zone__state_id"),
+        ).first()
+        if org is None:
+            return
+
+        totals = cls.get_college_links().filter(org_id=org_id).aggregate(**cls._totals())
+
+        with transaction.atomic():
+            KarmaRollup.objects.update_or_create(
+                scope=RollupScope.ORGANIZATION.value,
+                scope_id=org_id,
+                defaults={
+                    "parent_id": org["district_id"],
+                    "karma": totals["karma"] or 0,
+                    "verified_karma": totals["verified_karma"] or 0,
+                    "members": totals["members"],
+                },
+            )
+
+            child_scope = RollupScope.ORGANIZATION.value
+            for scope, scope_id, parent_id in (
+                (RollupScope.DISTRICT.value, org["district_id"], org["zone_id"]),
+                (RollupScope.ZONE.value, org["zone_id"], org["state_id"]),
+                (RollupScope.STATE.value, org["state_id"], None),
+            ):
+                if scope_id is None:
+                    break
+                children = KarmaRollup.objects.filter(
+                    scope=child_scope, parent_id=scope_id
+                ).aggregate(
+                    karma=Sum("karma"),
+                    verified_karma=Sum("verified_karma"),
+                    members=Sum("members"),
+                )
+                KarmaRollup.objects.update_or_create(
+                    scope=scope,
+                    scope_id=scope_id,
+                    defaults={
+                        "parent_id": parent_id,
+                        "karma": children["karma"] or 0,
+                        "verified_karma": children["verified_karma"] or 0,
+                        "members": children["members"] or 0,
+                    },
+                )
+                child_scope = scope
+
+    @classmethod
+    def refresh_links(cls, links) -> None:
+        """Recomputes the colleges of links saved with bulk_create, which sends no post_save."""
+        for org_id in {link.org_id for link in links}:
+            cls.refresh_org(org_id)
+
+    @classmethod
+    def apply_karma(cls, user_id, delta: int) -> None:
+        """Adds a wallet karma change to every college the user belongs to."""
+        if not delta:
+            return
+
+        for org_id, verified in cls.get_college_links().filter(user_id=user_id).values_list(
+            "org_id", "verified"
+        ):
+            if not KarmaRollup.objects.filter(
+                scope=RollupScope.ORGANIZATION.value, scope_id=org_id
+            ).update(
+                karma=F("karma") + delta,
+                verified_karma=F("verified_karma") + (delta if verified else 0),
+            ):
+                cls.refresh_org(org_id)
+
+    @staticmethod
+    def get(scope: str, scope_id):
+        return KarmaRollup.objects.filter(scope=scope, scope_id=scope_id).first()
+
+    @staticmethod
+    def get_rank(row: KarmaRollup) -> int:
+        """Returns the 1 based position of a row among its scope, ties broken by id."""
+        if row is None:
+            return None
+
+        return KarmaRollup.objects.filter(
+            Q(karma__gt=row.karma) | Q(karma=row.karma, scope_id__lt=row.scope_id),
+            scope=row.scope,
+        ).count() + 1
+
+    @staticmethod
+    def get_top(scope: str, parent_id, limit: int = 3):
+        """Returns the rows under a parent ordered by the karma of verified members."""
+        return KarmaRollup.objects.filter(scope=scope, parent_id=parent_id).order_by(
+            "-verified_karma", "scope_id"
+        )[:limit]
+
+
+@receiver(post_save, sender=Wallet)
+def wallet_rollup_changed(sender, instance, created=False, **kwargs):
+    old_karma = 0 if created else getattr(instance, "_loaded_karma", instance.karma)
+    KarmaRollupHelper.apply_karma(instance.user_id, instance.karma - (old_karma or 0))
+
+
+@receiver(post_delete, sender=Wallet)
+def wallet_rollup_deleted(sender, instance, **kwargs):
+    KarmaRollupHelper.apply_karma(instance.user_id, -instance.karma)
+
+
+@receiver(post_save, sender=UserOrganizationLink)
+@receiver(post_delete, sender=UserOrganizationLink)
+def college_link_changed(sender, instance, **kwargs):
+    KarmaRollupHelper.refresh_org(instance.org_id)
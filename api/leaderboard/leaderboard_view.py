@@ -1,13 +1,14 @@
-from django.db.models import Sum, F, Value, Count, Q, Prefetch
-from django.db.models.functions import Concat, Coalesce
+from django.db.models import Sum, Count, Prefetch
 from rest_framework.views import APIView
 from . import serializers
+from .leaderboard_helper import get_monthly_leaderboard, get_previous_month
 
 from db.organization import Organization, UserOrganizationLink
 from db.user import User
+from utils.exception import CustomException
 from utils.response import CustomResponse
-from utils.types import OrganizationType, RoleType
-from utils.utils import DateTimeUtils
+from utils.types import LeaderboardType, OrganizationType, RoleType
+from utils.utils import CommonUtils
 
 
 class StudentsLeaderboard(APIView):
@@ -42,40 +43,25 @@ class StudentsLeaderboard(APIView):
 
 class StudentsMonthlyLeaderboard(APIView):
     def get(self, request):
-        start_date, end_date = DateTimeUtils.get_start_and_end_of_previous_month()
-        student_monthly_leaderboard = (
-            User.objects.filter(
-                user_role_link_user__role__title=RoleType.STUDENT.value,
-                user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-                exist_in_guild=True,
-            )
-            .annotate(
-                full_name=F("full_name"),
-                institution=F("user_organization_link_user__org__title"),
-                total_karma=Coalesce(
-                    Sum(
-                        "karma_activity_log_user__karma",
-                        filter=Q(
-                            karma_activity_log_user__created_at__range=(
-                                start_date,
-                                end_date,
-                            )
-                        ),
-                    ),
-                    Value(0),
-                ),
-            )
-            .values(
-                "full_name",
-                "total_karma",
-                "institution",
-            )
-            .order_by("-total_karma")
+        month = request.query_params.get("month") or get_previous_month()
+
+        try:
+            student_monthly_leaderboard = get_monthly_leaderboard(
+                month, LeaderboardType.STUDENT.value
+            ).values("rank", "full_name", "total_karma", "institution")
+        except CustomException as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
+
+        paginated_queryset = CommonUtils.get_paginated_queryset(
+            student_monthly_leaderboard,
+            request,
+            ["full_name", "institution"],
         )
 
-        return CustomResponse(
-            response=student_monthly_leaderboard
-        ).get_success_response()
+        return CustomResponse(response={"month": month}).paginated_response(
+            data=list(paginated_queryset.get("queryset")),
+            pagination=paginated_queryset.get("pagination"),
+        )
 
 
 class CollegeLeaderboard(APIView):
@@ -100,36 +86,22 @@ class CollegeLeaderboard(APIView):
 
 class CollegeMonthlyLeaderboard(APIView):
     def get(self, request):
-        start_date, end_date = DateTimeUtils.get_start_and_end_of_previous_month()
-        college_monthly_leaderboard = (
-            Organization.objects.filter(
-                org_type=OrganizationType.COLLEGE.value,
-                user_organization_link_org__user__karma_activity_log_user__created_at__range=(
-                    start_date,
-                    end_date,
-                ),
-                user_organization_link_org__user__karma_activity_log_user__appraiser_approved=True,
-            )
-            .annotate(
-                total_karma=Coalesce(
-                    Sum(
-                        "user_organization_link_org__user__karma_activity_log_user__karma",
-                        filter=Q(
-                            user_organization_link_org__user__karma_activity_log_user__created_at__range=(
-                                start_date,
-                                end_date,
-                            )
-                        ),
-                    ),
-                    Value(0),
-                ),
-                students=Count("user_organization_link_org__user", distinct=True),
-                institution=F("title"),
-            )
-            .values("code", "total_karma", "students")
-            .order_by("-total_karma")[:20]
+        month = request.query_params.get("month") or get_previous_month()
+
+        try:
+            college_monthly_leaderboard = get_monthly_leaderboard(
+                month, LeaderboardType.COLLEGE.value
+            ).values("rank", "code", "institution", "total_karma", "students")
+        except CustomException as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
+
+        paginated_queryset = CommonUtils.get_paginated_queryset(
+            college_monthly_leaderboard,
+            request,
+            ["code", "institution"],
         )
 
-        return CustomResponse(
-            response=college_monthly_leaderboard
-        ).get_success_response()
+        return CustomResponse(response={"month": month}).paginated_response(
+            data=list(paginated_queryset.get("queryset")),
+            pagination=paginated_queryset.get("pagination"),
+        )
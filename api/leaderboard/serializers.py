@@ -6,7 +6,8 @@ from rest_framework import serializers
 from db.organization import UserOrganizationLink
 from db.task import KarmaActivityLog
 from db.user import User
-from utils.types import OrganizationType
+from api.leaderboard.leaderboard_helper import KarmaRollupHelper
+from utils.types import OrganizationType, RollupScope
 from utils.utils import DateTimeUtils
 
 
@@ -55,26 +56,10 @@ class CampusDetailsSerializer(serializers.ModelSerializer):
         )
 
     def get_rank(self, obj):
-        org_karma_dict = (
-            UserOrganizationLink.objects.all()
-            .values("org")
-            .annotate(total_karma=Sum("user__wallet_user__karma"))
+        return KarmaRollupHelper.get_rank(
+            KarmaRollupHelper.get(RollupScope.ORGANIZATION.value, obj.org.id)
         )
 
-        rank_dict = {
-            data["org"]: data["total_karma"] if data["total_karma"] is not None else 0
-            for data in org_karma_dict
-        }
-
-        sorted_rank_dict = dict(
-            sorted(rank_dict.items(), key=lambda x: x[1], reverse=True)
-        )
-
-        if obj.org.id in sorted_rank_dict:
-            keys_list = list(sorted_rank_dict.keys())
-            position = keys_list.index(obj.org.id)
-            return position + 1
-
 
 class StudentLeaderboardSerializer(serializers.ModelSerializer):
     institution = serializers.SerializerMethodField()
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.dashboard.discord_moderator.discord_mod_helper import ApproverStatsHelper
+
+
+class Command(BaseCommand):
+    help = "Rewrites the per day peer and appraiser approval counts of moderators from the karma activity log"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Only rewrite the last N days instead of every day",
+        )
+
+    def handle(self, *args, **options):
+        count = ApproverStatsHelper.refresh(options["days"])
+        self.stdout.write(f"{count} approver stats rows written")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.common.common_helper import IgKarmaIndex
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the redis karma sets of every interest group from the karma activity log"
+
+    def handle(self, *args, **options):
+        for name, count in IgKarmaIndex.rebuild().items():
+            self.stdout.write(f"{name}: {count} users ranked")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from api.dashboard.profile.profile_helper import KarmaHistogram
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the redis karma histogram behind profile percentiles from the wallet table"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{KarmaHistogram.rebuild()} wallets counted")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.dashboard.profile.profile_helper import KarmaRank
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the redis karma rank sets of students, mentors and enablers from the wallet table"
+
+    def handle(self, *args, **options):
+        for cohort, count in KarmaRank.rebuild().items():
+            self.stdout.write(f"{cohort}: {count} users ranked")
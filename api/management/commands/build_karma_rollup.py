@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from api.leaderboard.leaderboard_helper import KarmaRollupHelper
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the college, district, zone and state karma rollup from the wallet table"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{KarmaRollupHelper.refresh()} rollup rows written")
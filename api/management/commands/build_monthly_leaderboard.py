@@ -0,0 +1,54 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.leaderboard.leaderboard_helper import (
+    build_monthly_leaderboard,
+    get_month_key,
+    get_month_range,
+    get_previous_month,
+    MONTH_FORMAT,
+)
+from utils.exception import CustomException
+
+
+class Command(BaseCommand):
+    help = "Materializes the monthly student and college leaderboards of closed months"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--month",
+            action="append",
+            help="Month to snapshot as YYYY-MM, defaults to the previous month",
+        )
+        parser.add_argument(
+            "--backfill",
+            type=int,
+            default=0,
+            help="Also snapshot this many months before the previous month",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rebuild snapshots that already exist",
+        )
+
+    def handle(self, *args, **options):
+        months = options["month"] or [get_previous_month()]
+
+        if options["backfill"]:
+            start_date, _ = get_month_range(get_previous_month())
+            for _ in range(options["backfill"]):
+                start_date = (start_date - datetime.timedelta(days=1)).replace(day=1)
+                months.append(start_date.strftime(MONTH_FORMAT))
+
+        for month in months:
+            try:
+                month = get_month_key(month)
+                built = build_monthly_leaderboard(month, force=options["force"])
+            except CustomException as e:
+                raise CommandError(str(e)) from e
+
+            self.stdout.write(
+                f"{month}: {'snapshot written' if built else 'snapshot already exists'}"
+            )
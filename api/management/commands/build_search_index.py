@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from utils.search import SearchIndex
+
+
+class Command(BaseCommand):
+    help = "Rewrites the full-text search documents of tasks, users, organizations and learning circles"
+
+    def handle(self, *args, **options):
+        for entity, count in SearchIndex.rebuild().items():
+            self.stdout.write(f"{entity}: {count} documents written")
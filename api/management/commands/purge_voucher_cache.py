@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from utils.karma_voucher import VoucherRenderer
+
+
+class Command(BaseCommand):
+    help = "Removes cached karma voucher images that are old or over the size cap"
+
+    def handle(self, *args, **options):
+        removed = VoucherRenderer.purge()
+        self.stdout.write(f"{removed} voucher images removed")
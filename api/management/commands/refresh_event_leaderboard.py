@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from redis.exceptions import RedisError
+
+from api.leaderboard.leaderboard_helper import EVENT_LEADERBOARDS
+
+
+class Command(BaseCommand):
+    help = "Refreshes the materialized event leaderboards from approved karma logs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--event",
+            action="append",
+            choices=list(EVENT_LEADERBOARDS),
+            help="Event to refresh, can be repeated (default: all)",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild the whole table, dropping users whose logs were deleted",
+        )
+
+    def handle(self, *args, **options):
+        for event in options["event"] or EVENT_LEADERBOARDS:
+            leaderboard = EVENT_LEADERBOARDS[event]
+
+            try:
+                token = leaderboard.acquire()
+                if token is None:
+                    raise CommandError(f"{event}: a refresh is already running")
+            except RedisError as e:
+                self.stderr.write(f"{event}: redis unavailable, refreshing without lock ({e})")
+                token = None
+
+            try:
+                count = leaderboard.refresh(full=options["full"])
+            finally:
+                if token:
+                    leaderboard.release(token)
+
+            self.stdout.write(f"{event}: {count} users recomputed")
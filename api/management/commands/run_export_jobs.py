@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api.dashboard.export.export_helper import ExportJobHelper
+
+
+class Command(BaseCommand):
+    help = "Builds the files of queued CSV export jobs and removes the expired ones"
+
+    def handle(self, *args, **options):
+        count = ExportJobHelper.run_pending()
+        expired = ExportJobHelper.purge()
+        self.stdout.write(f"{count} export jobs run, {expired} expired")
@@ -3,7 +3,9 @@ from django.contrib.auth.hashers import make_password
 from django.db import transaction
 from rest_framework import serializers
 
+from api.dashboard.profile.profile_helper import LevelProgress
 from api.integrations.kkem.kkem_helper import decrypt_kkem_data, send_data_to_kkem
+from api.leaderboard.leaderboard_helper import KarmaRollupHelper
 from db.integrations import Integration, IntegrationAuthorization
 from db.organization import (
     Country,
@@ -111,7 +113,7 @@ class UserOrgLinkSerializer(serializers.ModelSerializer):
 
         is_college = lambda org: org.org_type == OrganizationType.COLLEGE.value
 
-        UserOrganizationLink.objects.bulk_create(
+        links = UserOrganizationLink.objects.bulk_create(
             {
                 UserOrganizationLink(
                     user=validated_data["user"],
@@ -125,6 +127,7 @@ class UserOrgLinkSerializer(serializers.ModelSerializer):
                 for org in validated_data["organizations"]
             }
         )
+        KarmaRollupHelper.refresh_links(links)
 
     class Meta:
         model = UserOrganizationLink
@@ -309,6 +312,8 @@ class UserSerializer(serializers.ModelSerializer):
                     for ig in area_of_interest
                 }
             )
+            # bulk_create sends no post_save for the new links
+            LevelProgress.invalidate(user.id)
 
         return user
 
@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Count, Max
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from redis.exceptions import RedisError
+
+from db.task import KarmaActivityLog
+from utils.exception import CustomException
+from utils.types import Events
+from utils.utils import RedisUtils
+
+logger = logging.getLogger("django")
+
+LEADERBOARD_QUERY = """
+    SELECT
+    u.id,
+    u.full_name,
+    u.profile_pic,
+    SUM(kal.karma) AS total_karma,
+    COALESCE(org.title, comm.title) AS org,
+    COALESCE(org.dis, d.name) AS dis,
+    COALESCE(org.state, s.name) AS state,
+    MAX(kal.created_at) AS time_
+    FROM karma_activity_log AS kal
+    INNER JOIN user AS u ON kal.user_id = u.id
+    INNER JOIN task_list AS tl ON tl.id = kal.task_id
+    LEFT JOIN (
+        SELECT
+            uol.user_id,
+            org.id,
+            org.title AS title,
+            d.name dis,
+            s.name state
+        FROM user_organization_link AS uol
+        INNER JOIN organization AS org ON org.id = uol.org_id AND org.org_type IN ('College', 'School', 'Company')
+        LEFT JOIN district AS d ON d.id = org.district_id
+        LEFT JOIN zone AS z ON z.id = d.zone_id
+        LEFT JOIN state AS s ON s.id = z.state_id
+        GROUP BY uol.user_id
+        ) AS org ON org.user_id = u.id
+        LEFT JOIN (SELECT
+            uol.user_id,
+            org.id,
+            org.title AS title
+        FROM user_organization_link AS uol
+        INNER JOIN organization AS org ON org.id = uol.org_id AND org.org_type IN ('Community')
+        GROUP BY uol.user_id) AS comm ON comm.user_id = u.id
+        LEFT JOIN district AS d ON d.id = u.district_id
+        LEFT JOIN zone AS z ON d.zone_id = z.id
+        LEFT JOIN state AS s ON z.state_id = s.id
+        WHERE
+            tl.event = 'TOP100' AND
+            kal.appraiser_approved = TRUE
+            AND u.id IN (select user_id from karma_activity_log as kal
+        INNER JOIN task_list AS tl ON tl.id = kal.task_id
+        WHERE tl.hashtag = '#thc-realworld-problem-proposal' AND kal.appraiser_approved = TRUE)
+        GROUP BY u.id
+        ORDER BY total_karma DESC, time_;
+"""
+
+
+class Top100Leaderboard:
+    """
+    Keeps the TOP100 leaderboard as one precomputed snapshot in redis.
+
+    The snapshot stores the column names once and every row as a list, along
+    with an ETag and the stamp (count and latest update of approved TOP100
+    karma logs) it was built from. The stamp is re-checked at most once every
+    CHECK_INTERVAL seconds, and the expensive leaderboard query only runs again
+    when it has moved, which includes approvals written by the Discord bot.
+    """
+
+    KEY = "top100:leaderboard"
+    CHECKED_KEY = "top100:leaderboard:checked"
+    CHECK_INTERVAL = 60
+
+    @staticmethod
+    def get_stamp() -> str:
+        stamp = KarmaActivityLog.objects.filter(
+            task__event=Events.TOP_100_CODERS.value.upper(),
+            appraiser_approved=True,
+        ).aggregate(count=Count("id"), updated_at=Max("updated_at"))
+        return f"{stamp['count']}:{stamp['updated_at']}"
+
+    @classmethod
+    def build(cls, stamp: str = None) -> dict:
+        stamp = stamp or cls.get_stamp()
+
+        with connection.cursor() as cursor:
+            cursor.execute(LEADERBOARD_QUERY)
+            columns = [desc[0] for desc in cursor.description]
+            rows = [list(row) for row in cursor.fetchall()]
+
+        body = json.dumps([columns, rows], cls=DjangoJSONEncoder)
+        return {
+            "etag": hashlib.sha1(body.encode()).hexdigest(),
+            "stamp": stamp,
+            "columns": columns,
+            "rows": json.loads(body)[1],
+        }
+
+    @classmethod
+    def get(cls) -> dict:
+        try:
+            client = RedisUtils.get_client()
+            if (cached := client.get(cls.KEY)) is not None:
+                snapshot = json.loads(cached)
+                if not client.set(cls.CHECKED_KEY, 1, nx=True, ex=cls.CHECK_INTERVAL):
+                    return snapshot
+
+                stamp = cls.get_stamp()
+                if snapshot["stamp"] == stamp:
+                    return snapshot
+            else:
+                stamp = None
+
+            snapshot = cls.build(stamp)
+            client.set(cls.KEY, json.dumps(snapshot, cls=DjangoJSONEncoder))
+            client.set(cls.CHECKED_KEY, 1, ex=cls.CHECK_INTERVAL)
+            return snapshot
+
+        except RedisError as e:
+            logger.error(f"TOP100 leaderboard cache unavailable: {e}")
+            return cls.build()
+
+    @classmethod
+    def invalidate(cls) -> None:
+        try:
+            RedisUtils.get_client().delete(cls.KEY)
+        except RedisError as e:
+            logger.error(f"TOP100 leaderboard invalidation failed: {e}")
+
+    @staticmethod
+    def encode_cursor(etag: str, offset: int) -> str:
+        return base64.urlsafe_b64encode(f"{etag}:{offset}".encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str, etag: str) -> int:
+        """Returns the offset of a cursor, rejecting cursors of an older snapshot."""
+        try:
+            cursor_etag, offset = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit(":", 1)
+            offset = max(int(offset), 0)
+        except ValueError as e:
+            raise CustomException("Invalid cursor") from e
+
+        if cursor_etag != etag:
+            raise CustomException("The leaderboard has changed, start again from the first page")
+        return offset
+
+
+@receiver(post_save, sender=KarmaActivityLog)
+def top100_karma_approved(sender, instance, **kwargs):
+    if instance.appraiser_approved and KarmaActivityLog.objects.filter(
+        id=instance.id, task__event=Events.TOP_100_CODERS.value.upper()
+    ).exists():
+        Top100Leaderboard.invalidate()
@@ -1,61 +1,56 @@
-from django.db import connection
+from rest_framework import status
+from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from utils.exception import CustomException
 from utils.response import CustomResponse
+from .top100_helper import Top100Leaderboard
 
 
 class Leaderboard(APIView):
     def get(self, request):
-        query = """
-        SELECT 
-        u.id,
-        u.full_name, 
-        u.profile_pic,
-        SUM(kal.karma) AS total_karma,
-        COALESCE(org.title, comm.title) AS org,
-        COALESCE(org.dis, d.name) AS dis,
-        COALESCE(org.state, s.name) AS state,
-        MAX(kal.created_at) AS time_
-        FROM karma_activity_log AS kal
-        INNER JOIN user AS u ON kal.user_id = u.id
-        INNER JOIN task_list AS tl ON tl.id = kal.task_id
-        LEFT JOIN (
-            SELECT 
-                uol.user_id, 
-                org.id, 
-                org.title AS title, 
-                d.name dis, 
-                s.name state
-            FROM user_organization_link AS uol
-            INNER JOIN organization AS org ON org.id = uol.org_id AND org.org_type IN ('College', 'School', 'Company')
-            LEFT JOIN district AS d ON d.id = org.district_id
-            LEFT JOIN zone AS z ON z.id = d.zone_id
-            LEFT JOIN state AS s ON s.id = z.state_id
-            GROUP BY uol.user_id 
-            ) AS org ON org.user_id = u.id
-            LEFT JOIN (SELECT 
-                uol.user_id, 
-                org.id, 
-                org.title AS title
-            FROM user_organization_link AS uol
-            INNER JOIN organization AS org ON org.id = uol.org_id AND org.org_type IN ('Community')
-            GROUP BY uol.user_id) AS comm ON comm.user_id = u.id
-            LEFT JOIN district AS d ON d.id = u.district_id
-            LEFT JOIN zone AS z ON d.zone_id = z.id
-            LEFT JOIN state AS s ON z.state_id = s.id
-            WHERE 
-                tl.event = 'TOP100' AND
-                kal.appraiser_approved = TRUE 
-                AND u.id IN (select user_id from karma_activity_log as kal
-            INNER JOIN task_list AS tl ON tl.id = kal.task_id
-            WHERE tl.hashtag = '#thc-realworld-problem-proposal' AND kal.appraiser_approved = TRUE)
-            GROUP BY u.id
-            ORDER BY total_karma DESC, time_;
-            """
-        with connection.cursor() as cursor:
-            cursor.execute(query)
-            results = cursor.fetchall()
-            column_names = [desc[0] for desc in cursor.description]
-
-            list_of_dicts = [dict(zip(column_names, row)) for row in results]
-            return CustomResponse(response=list_of_dicts).get_success_response()
+        snapshot = Top100Leaderboard.get()
+        etag = f'"{snapshot["etag"]}"'
+
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        columns, rows = snapshot["columns"], snapshot["rows"]
+        cursor = request.query_params.get("cursor")
+        per_page = request.query_params.get("perPage")
+
+        if cursor is None and per_page is None:
+            response = CustomResponse(
+                response=[dict(zip(columns, row)) for row in rows]
+            ).get_success_response()
+            response["ETag"] = etag
+            return response
+
+        try:
+            offset = Top100Leaderboard.decode_cursor(cursor, snapshot["etag"]) if cursor else 0
+            per_page = int(per_page or 10)
+        except (CustomException, ValueError) as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
+
+        if per_page < 1:
+            return CustomResponse(general_message="perPage must be at least 1").get_failure_response()
+
+        page = rows[offset: offset + per_page]
+        next_offset = offset + len(page)
+
+        response = CustomResponse().paginated_response(
+            data=[
+                dict(zip(columns, row), rank=rank)
+                for rank, row in enumerate(page, start=offset + 1)
+            ],
+            pagination={
+                "count": len(rows),
+                "isNext": next_offset < len(rows),
+                "isPrev": offset > 0,
+                "nextCursor": Top100Leaderboard.encode_cursor(snapshot["etag"], next_offset)
+                if next_offset < len(rows)
+                else None,
+            },
+        )
+        response["ETag"] = etag
+        return response
@@ -0,0 +1,97 @@
+"""
+Checks that the profile serializer and ProfileAggregates run the same number
+of queries however many interest groups a user joined.
+
+Run from this directory against a database with a few interest groups:
+
+    python profile_queries.py [user_id]
+
+The user's interest group links are swapped inside a transaction that is
+rolled back, so the database is left as it was. Exits with 1 when a count
+changes with the number of interest groups.
+"""
+import os
+import sys
+import uuid
+
+import django
+
+os.chdir('..')
+sys.path.append(os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mulearnbackend.settings')
+django.setup()
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.dashboard.profile.profile_helper import ProfileAggregates
+from api.dashboard.profile.profile_serializer import UserProfileSerializer
+from db.task import InterestGroup, UserIgLink
+from db.user import User
+from utils.utils import DateTimeUtils
+
+IG_COUNTS = (1, 2, 3, 5, 10)
+
+
+def count_queries(func) -> int:
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    return len(queries.captured_queries)
+
+
+def set_interest_groups(user: User, ig_ids: list) -> None:
+    UserIgLink.objects.filter(user=user).delete()
+    UserIgLink.objects.bulk_create(
+        [
+            UserIgLink(
+                id=uuid.uuid4(),
+                user=user,
+                ig_id=ig_id,
+                created_by=user,
+                created_at=DateTimeUtils.get_current_utc_time(),
+            )
+            for ig_id in ig_ids
+        ]
+    )
+
+
+def serialize_profile(user_id) -> dict:
+    return UserProfileSerializer(User.objects.get(id=user_id)).data
+
+
+def measure(user: User, ig_ids: list) -> dict:
+    set_interest_groups(user, ig_ids)
+    # first call fills the redis caches the profile reads, which do not depend on IGs
+    serialize_profile(user.id)
+    return {
+        'aggregates': count_queries(lambda: ProfileAggregates.get_ig_karma([user.id])),
+        'serializer': count_queries(lambda: serialize_profile(user.id)),
+    }
+
+
+def main() -> int:
+    user = (
+        User.objects.get(id=sys.argv[1]) if len(sys.argv) > 1 else User.objects.first()
+    )
+    ig_ids = list(InterestGroup.objects.values_list('id', flat=True)[: max(IG_COUNTS)])
+    counts = [count for count in IG_COUNTS if count <= len(ig_ids)]
+    if len(counts) < 2:
+        print('Needs at least 2 interest groups')
+        return 1
+
+    results = {}
+    with transaction.atomic():
+        for count in counts:
+            results[count] = measure(user, ig_ids[:count])
+            print(f"{count:>3} IGs: {results[count]}")
+        transaction.set_rollback(True)
+
+    if len({tuple(result.items()) for result in results.values()}) != 1:
+        print('Query count depends on the number of interest groups')
+        return 1
+    print('Query count is independent of the number of interest groups')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
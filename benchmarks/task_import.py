@@ -0,0 +1,121 @@
+"""
+Times the task list import on generated sheets of 10k and 100k rows and
+counts the queries it runs.
+
+Run from this directory against a database with at least one channel, task
+type, level, interest group and organization:
+
+    python task_import.py [rows ...] [--csv]
+
+Each sheet is imported inside a transaction that is rolled back, so the
+database is left as it was. Exits with 1 when a generated row is rejected or
+when the queries per row grow with the size of the sheet.
+"""
+import csv
+import io
+import os
+import sys
+import time
+import uuid
+
+import django
+
+os.chdir('..')
+sys.path.append(os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mulearnbackend.settings')
+django.setup()
+
+import openpyxl
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.dashboard.task.dash_task_helper import TaskImporter
+from db.organization import Organization
+from db.task import Channel, InterestGroup, Level, TaskType
+from db.user import User
+
+ROW_COUNTS = (10_000, 100_000)
+
+
+def get_relations() -> list:
+    return [
+        Level.objects.values_list('name', flat=True).first(),
+        Channel.objects.values_list('name', flat=True).first(),
+        TaskType.objects.values_list('title', flat=True).first(),
+        InterestGroup.objects.values_list('name', flat=True).first(),
+        Organization.objects.values_list('code', flat=True).first(),
+    ]
+
+
+def generate_rows(count: int, relations: list) -> list:
+    level, channel, task_type, ig, org = relations
+    prefix = uuid.uuid4().hex[:8]
+    return [
+        [f"#{prefix}{i}", f"Task {i}", "Generated", i % 50 + 1, 1, False, level, channel, task_type, ig, org, None]
+        for i in range(count)
+    ]
+
+
+def make_file(rows: list, as_csv: bool) -> SimpleUploadedFile:
+    if as_csv:
+        content = io.StringIO()
+        writer = csv.writer(content)
+        writer.writerow(TaskImporter.headers)
+        writer.writerows(rows)
+        return SimpleUploadedFile('tasks.csv', content.getvalue().encode(), 'text/csv')
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(TaskImporter.headers)
+    for row in rows:
+        sheet.append(row)
+    content = io.BytesIO()
+    workbook.save(content)
+    return SimpleUploadedFile('tasks.xlsx', content.getvalue())
+
+
+def measure(user_id: str, file_obj) -> dict:
+    importer = TaskImporter(user_id)
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        imported = importer.run(file_obj)
+        seconds = time.perf_counter() - start
+    return {
+        'imported': len(imported),
+        'rejected': len(importer.errors),
+        'seconds': round(seconds, 2),
+        'queries': len(queries.captured_queries),
+    }
+
+
+def main() -> int:
+    as_csv = '--csv' in sys.argv
+    counts = [int(arg) for arg in sys.argv[1:] if arg != '--csv'] or list(ROW_COUNTS)
+    relations = get_relations()
+    if None in relations:
+        print('Needs a channel, task type, level, interest group and organization')
+        return 1
+    user_id = User.objects.values_list('id', flat=True).first()
+
+    results = {}
+    for count in counts:
+        file_obj = make_file(generate_rows(count, relations), as_csv)
+        with transaction.atomic():
+            results[count] = measure(user_id, file_obj)
+            transaction.set_rollback(True)
+        print(f"{count:>7} rows: {results[count]}")
+
+    if any(result['rejected'] for result in results.values()):
+        print('Generated rows were rejected')
+        return 1
+    smallest, largest = min(results), max(results)
+    if results[largest]['queries'] / largest > results[smallest]['queries'] / smallest:
+        print('Queries per row grow with the size of the sheet')
+        return 1
+    print('Import runs a bounded number of queries per batch of rows')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
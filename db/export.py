@@ -0,0 +1,28 @@
+import uuid
+
+from django.db import models
+
+from db.user import User
+
+# fmt: off
+# noinspection PyPep8
+
+class ExportJob(models.Model):
+    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    path = models.CharField(max_length=255)
+    params = models.CharField(max_length=1000, blank=True, null=True)
+    claims = models.JSONField()
+    status = models.CharField(max_length=10)
+    rows_written = models.IntegerField(default=0)
+    total_rows = models.IntegerField(blank=True, null=True)
+    file_name = models.CharField(max_length=255, blank=True, null=True)
+    error = models.CharField(max_length=255, blank=True, null=True)
+    expires_at = models.DateTimeField(blank=True, null=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, db_column="created_by",
+                                   related_name="export_job_created_by")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = False
+        db_table = "export_job"
@@ -41,3 +41,21 @@ class IntegrationAuthorization(models.Model):
             ),
         ]
         db_table = "integration_authorization"
+
+
+class IntegrationCheckpoint(models.Model):
+    id                = models.CharField(max_length=36, primary_key=True, default=uuid.uuid4)
+    integration       = models.ForeignKey(Integration, on_delete=models.CASCADE, null=False, related_name="integration_checkpoint_integration",)
+    feed              = models.CharField(max_length=50, null=False)
+    cursor            = models.CharField(max_length=255, null=False)
+    updated_at        = models.DateTimeField(null=False, auto_now=True)
+    created_at        = models.DateTimeField(null=False, auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["integration_id", "feed"],
+                name="unique_checkpoint_per_feed",
+            ),
+        ]
+        db_table = "integration_checkpoint"
@@ -0,0 +1,86 @@
+import uuid
+
+from django.db import models
+
+from db.organization import Organization
+from db.user import User
+
+# fmt: off
+# noinspection PyPep8
+
+class MonthlyLeaderboard(models.Model):
+    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    month = models.CharField(max_length=7)
+    type = models.CharField(max_length=10)
+    rank = models.IntegerField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True,
+                             related_name="monthly_leaderboard_user")
+    org = models.ForeignKey(Organization, on_delete=models.SET_NULL, blank=True, null=True,
+                            related_name="monthly_leaderboard_org")
+    full_name = models.CharField(max_length=150, blank=True, null=True)
+    code = models.CharField(max_length=12, blank=True, null=True)
+    institution = models.CharField(max_length=100, blank=True, null=True)
+    total_karma = models.IntegerField(default=0)
+    students = models.IntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        managed = False
+        db_table = "monthly_leaderboard"
+        constraints = [
+            models.UniqueConstraint(fields=["month", "type", "rank"], name="MonthTypeRank")
+        ]
+
+
+class EventLeaderboard(models.Model):
+    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    event = models.CharField(max_length=50)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="event_leaderboard_user")
+    full_name = models.CharField(max_length=150)
+    karma = models.IntegerField(default=0)
+    org = models.CharField(max_length=100, blank=True, null=True)
+    district = models.CharField(max_length=75, blank=True, null=True)
+    state = models.CharField(max_length=75, blank=True, null=True)
+    last_karma_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = False
+        db_table = "event_leaderboard"
+        constraints = [
+            models.UniqueConstraint(fields=["event", "user"], name="EventUser")
+        ]
+
+
+class KarmaRollup(models.Model):
+    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    scope = models.CharField(max_length=15)
+    scope_id = models.CharField(max_length=36)
+    parent_id = models.CharField(max_length=36, blank=True, null=True)
+    karma = models.BigIntegerField(default=0)
+    verified_karma = models.BigIntegerField(default=0)
+    members = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = False
+        db_table = "karma_rollup"
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "scope_id"], name="ScopeId")
+        ]
+
+
+class ApproverStats(models.Model):
+    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    approval = models.CharField(max_length=10)
+    day = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="approver_stats_user")
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = False
+        db_table = "approver_stats"
+        constraints = [
+            models.UniqueConstraint(fields=["approval", "day", "user"], name="ApprovalDayUser")
+        ]
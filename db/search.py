@@ -0,0 +1,20 @@
+import uuid
+
+from django.db import models
+
+# fmt: off
+# noinspection PyPep8
+
+class SearchDocument(models.Model):
+    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    entity = models.CharField(max_length=50)
+    entity_id = models.CharField(max_length=36)
+    content = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = False
+        db_table = "search_document"
+        constraints = [
+            models.UniqueConstraint(fields=["entity", "entity_id"], name="EntityId")
+        ]
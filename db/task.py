@@ -144,6 +144,18 @@ class Wallet(models.Model):
         managed = False
         db_table = "wallet"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored karma so signal receivers can tell what changed
+        instance._loaded_karma = instance.__dict__.get("karma")
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save receivers have seen the old value by now
+        self._loaded_karma = self.karma
+
 
 class KarmaActivityLog(models.Model):
     id = models.CharField(default=uuid.uuid4, primary_key=True, max_length=36)
@@ -229,6 +241,7 @@ class VoucherLog(models.Model):
     claimed = models.BooleanField()
     event = models.CharField(max_length=50, null=True)
     description = models.CharField(max_length=2000, null=True)
+    batch = models.CharField(max_length=36, null=True)
     updated_by = models.ForeignKey(User, on_delete=models.SET(settings.SYSTEM_ADMIN_ID), db_column="updated_by",
                                    related_name="voucher_log_updated_by")
     updated_at = models.DateTimeField(auto_now=True)
@@ -241,6 +254,17 @@ class VoucherLog(models.Model):
         db_table = "voucher_log"
 
 
+class VoucherSequence(models.Model):
+    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    day = models.DateField(unique=True)
+    value = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = False
+        db_table = "voucher_sequence"
+
+
 class Events(models.Model):
     id          = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
     name        = models.CharField(max_length=75)
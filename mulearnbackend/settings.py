@@ -70,7 +70,9 @@ ROOT_URLCONF = "mulearnbackend.urls"
 CORS_ALLOW_ALL_ORIGINS = True
 
 REST_FRAMEWORK = {
-    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",)
+    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+    # ?format= picks the export file type (CommonUtils.generate_export), not a renderer
+    "URL_FORMAT_OVERRIDE": None,
 }
 # paginator settings
 PAGE_SIZE = 10
@@ -94,11 +96,16 @@ ASGI_APPLICATION = "mulearnbackend.asgi.application"
 
 WSGI_APPLICATION = "mulearnbackend.wsgi.application"
 
+REDIS_HOST = decouple_config("REDIS_HOST")
+REDIS_PORT = decouple_config("REDIS_PORT", cast=int)
+# channels uses the default redis database, application data lives in its own
+REDIS_DB = decouple_config("REDIS_DB", default=1, cast=int)
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
-            "hosts": [(decouple_config("REDIS_HOST"), decouple_config("REDIS_PORT"))],
+            "hosts": [(REDIS_HOST, REDIS_PORT)],
         },
     },
 }
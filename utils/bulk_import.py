@@ -0,0 +1,189 @@
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from utils.exception import CustomException
+from utils.search import SearchIndex
+from utils.utils import DateTimeUtils, ImportCSV
+
+
+class BulkImporter:
+    """
+    Imports the rows of an uploaded XLSX or CSV file into one model.
+
+    The file is read once and every row goes through the same steps:
+
+    - normalize: strip text and fill defaults (`normalize`).
+    - check: reject rows that are wrong on their own or repeat a key of an
+      earlier row of the file (`check`).
+    - resolve: look up every value of the `relations` columns and every key
+      of the `unique` columns with one query per BATCH_SIZE distinct values,
+      not per row.
+    - validate: reject rows whose relations do not exist, whose keys are
+      already taken, or whose values do not fit the model fields.
+    - create: `bulk_create` the accepted rows BATCH_SIZE at a time inside one
+      transaction, and rebuild their search documents since bulk inserts
+      send no post_save.
+
+    Rejected rows are kept in `errors` with an "error" message, the same
+    report the import views always sent. Subclasses set `model`, `headers`,
+    `relations` and `unique` and implement `build`. A relation column left
+    empty is only accepted when its model field is nullable.
+    """
+
+    model = None
+    # columns the file must have
+    headers = []
+    # column -> (related model, field the column holds, model field it sets)
+    relations = {}
+    # column -> model field that may not already hold the value
+    unique = {}
+    BATCH_SIZE = 1000
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.errors = []
+
+    def read(self, file_obj) -> list:
+        reader = ImportCSV()
+        headers, rows = reader.read_rows(file_obj)
+        if headers is None:
+            raise CustomException("Empty csv file.")
+        for key in self.headers:
+            if key not in headers:
+                raise CustomException(f"{key} does not exist in the file.")
+
+        rows = [self.normalize(row) for row in rows]
+        self.errors.extend(reader.errors)
+        return rows
+
+    def normalize(self, row: dict) -> dict:
+        return {
+            key: value.strip() or None if isinstance(value, str) else value
+            for key, value in row.items()
+            if key in self.headers
+        }
+
+    def check(self, row: dict, seen: dict) -> str | None:
+        """Returns why a row cannot be imported without looking at the database."""
+        for column in self.unique:
+            if (value := row.get(column)) in seen[column]:
+                return f"Duplicate {column} in excel: {value}"
+        return None
+
+    def fetch(self, model, field: str, values: set, *fields) -> list:
+        """Looks up `values` of `field` BATCH_SIZE at a time, returning `field` and `fields` of the matches."""
+        values = list(values)
+        return [
+            match
+            for start in range(0, len(values), self.BATCH_SIZE)
+            for match in model.objects.filter(
+                **{f"{field}__in": values[start : start + self.BATCH_SIZE]}
+            ).values_list(field, *fields, flat=not fields)
+        ]
+
+    def resolve(self, rows: list) -> tuple:
+        wanted = {
+            column: {row[column] for row in rows if row.get(column) is not None}
+            for column in {**self.relations, **self.unique}
+        }
+        relations = {
+            column: dict(self.fetch(model, field, wanted[column], "id"))
+            for column, (model, field, _) in self.relations.items()
+        }
+        taken = {
+            column: set(self.fetch(self.model, field, wanted[column]))
+            for column, field in self.unique.items()
+        }
+        return relations, taken
+
+    def validate(self, row: dict, relations: dict, taken: dict) -> str | None:
+        for column, (model, field, attname) in self.relations.items():
+            value = row.get(column)
+            if value in relations[column]:
+                continue
+            if value is not None or not self.model._meta.get_field(attname).null:
+                return f"Invalid {model._meta.verbose_name}: {value}"
+        for column in self.unique:
+            if (value := row.get(column)) in taken[column]:
+                return f"Duplicate {column} in database: {value}"
+        return None
+
+    def build(self, row: dict, relations: dict):
+        """Returns the model instance of an accepted row."""
+        raise NotImplementedError
+
+    def report(self, row: dict, instance) -> dict:
+        """Returns the entry of an imported row in the import report."""
+        return row
+
+    def get_relation_ids(self, row: dict, relations: dict) -> dict:
+        return {
+            attname: relations[column].get(row.get(column))
+            for column, (_, _, attname) in self.relations.items()
+        }
+
+    def get_audit_fields(self) -> dict:
+        now = DateTimeUtils.get_current_utc_time()
+        return {
+            "id": str(uuid.uuid4()),
+            "created_by_id": self.user_id,
+            "updated_by_id": self.user_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    @staticmethod
+    def clean(instance) -> str | None:
+        """Converts and checks the values of an instance against its model fields."""
+        exclude = [
+            field.name
+            for field in instance._meta.concrete_fields
+            if field.is_relation or (field.null and getattr(instance, field.attname) is None)
+        ]
+        try:
+            instance.clean_fields(exclude=exclude)
+        except ValidationError as e:
+            return "; ".join(
+                f"{field}: {' '.join(messages)}" for field, messages in e.message_dict.items()
+            )
+        return None
+
+    def reject(self, row: dict, error: str) -> None:
+        self.errors.append(row | {"error": error})
+
+    def run(self, file_obj) -> list:
+        """Imports a file and returns the report of the imported rows. Rejected rows are left in `errors`."""
+        seen = {column: set() for column in self.unique}
+        rows = []
+        for row in self.read(file_obj):
+            if error := self.check(row, seen):
+                self.reject(row, error)
+                continue
+            for column in self.unique:
+                seen[column].add(row.get(column))
+            rows.append(row)
+
+        relations, taken = self.resolve(rows)
+        accepted, instances = [], []
+        for row in rows:
+            if not (error := self.validate(row, relations, taken)):
+                instance = self.build(row, relations)
+                error = self.clean(instance)
+            if error:
+                self.reject(row, error)
+                continue
+            accepted.append(self.report(row, instance))
+            instances.append(instance)
+
+        with transaction.atomic():
+            self.model.objects.bulk_create(instances, batch_size=self.BATCH_SIZE)
+            if self.model in SearchIndex.DOCUMENTS:
+                for start in range(0, len(instances), self.BATCH_SIZE):
+                    SearchIndex.refresh(
+                        self.model,
+                        [instance.pk for instance in instances[start : start + self.BATCH_SIZE]],
+                    )
+
+        return accepted
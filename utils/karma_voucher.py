@@ -1,12 +1,24 @@
+import datetime
+import glob
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import suppress
 from io import BytesIO
 from typing import Optional
 
-from PIL import Image, ImageDraw, ImageFont
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
 
-import time
+from db.task import VoucherLog, VoucherSequence
+from utils import voucher_image
 
-image_location = './api/dashboard/karma_voucher/assets/karmacard.png'
-font_location =  './api/dashboard/karma_voucher/fonts/Roboto-Light.ttf'
+logger = logging.getLogger("django")
 
 def generate_karma_voucher(name, hashtag, karma, code, month):
     """
@@ -17,47 +29,204 @@ def generate_karma_voucher(name, hashtag, karma, code, month):
     :param code:
     :param month:
     :return:
-    """   
+    """
+    voucher = {'name': name, 'hashtag': hashtag, 'karma': karma, 'code': code, 'month': month}
+    _, image_data = next(VoucherRenderer.render_many([voucher]))
+    return BytesIO(image_data)
+
+
+class VoucherRenderer:
+    """
+    Draws karma voucher images and keeps them on disk.
+
+    Vouchers are drawn by `voucher_image`, which opens the base card and the
+    fonts once per process. A batch of at least POOL_THRESHOLD missing
+    images is drawn in a pool of up to WORKERS spawned processes that only
+    import `voucher_image`, so they hold no Django state, sockets or
+    database connections, and the pool is shut down once the batch is done.
+    Smaller batches are drawn in this process.
+
+    Finished JPEGs are kept in DIRECTORY under the voucher code and a digest
+    of the drawn text, so a voucher is drawn again only when its text
+    changes. `purge_voucher_cache` removes images unused for MAX_AGE and
+    then the least recently used ones above MAX_SIZE. DIRECTORY is not
+    served: codes are sequential and a voucher is enough to claim its karma.
+    """
+
+    DIRECTORY = os.path.join(settings.BASE_DIR, 'cache', 'vouchers')
+    WORKERS = min(4, os.cpu_count() or 1)
+    POOL_THRESHOLD = 8
+    MAX_AGE = datetime.timedelta(days=30)
+    MAX_SIZE = 512 * 1024 * 1024
+    FIELDS = ['code', 'user__full_name', 'task__hashtag', 'karma', 'month', 'week', 'event', 'description']
+
+    @staticmethod
+    def get_voucher(row: dict) -> dict:
+        """Returns the text drawn on a voucher from a voucher_log row with FIELDS."""
+        time_or_event = f"{row['month']}/{row['week']}"
+        if row['event'] != '' and row['event'] is not None:
+            time_or_event = f"{row['event']}/{row['description']}"
+
+        return {
+            'name': str(row['user__full_name']),
+            'hashtag': row['task__hashtag'],
+            'karma': str(int(row['karma'])),
+            'code': row['code'],
+            'month': time_or_event,
+        }
+
+    @classmethod
+    def get_path(cls, voucher: dict) -> str:
+        text = '\0'.join(voucher[field] for field, _, _ in voucher_image.LAYOUT)
+        digest = hashlib.sha256(text.encode()).hexdigest()[:16]
+        return os.path.join(cls.DIRECTORY, f"{voucher['code']}-{digest}.jpg")
 
+    @classmethod
+    def read(cls, voucher: dict) -> Optional[bytes]:
+        path = cls.get_path(voucher)
+        try:
+            with open(path, 'rb') as file:
+                image_data = file.read()
+        except FileNotFoundError:
+            return None
 
-    image = Image.open(image_location)
-    image = image.convert('RGB')
+        # purge keeps the most recently used images
+        with suppress(FileNotFoundError):
+            os.utime(path)
+        return image_data
 
-    draw = ImageDraw.Draw(image)
-    x = 135
-    y = 250
-    font1 = ImageFont.truetype(font_location, size=60)
-    draw.text((x, y), name, fill=(255, 255, 255), font=font1)
+    @classmethod
+    def write(cls, voucher: dict, image_data: bytes) -> None:
+        path = cls.get_path(voucher)
+        cls.discard(voucher['code'])
+        os.makedirs(cls.DIRECTORY, exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.part'
+        with open(temp_path, 'wb') as file:
+            file.write(image_data)
+        os.replace(temp_path, path)
 
-    x1 = 135
-    y1 = 450
-    font2 = ImageFont.truetype(font_location, size=45)
-    draw.text((x1, y1), hashtag, fill=(255, 255, 255), font=font2)
+    @classmethod
+    def discard(cls, code: str) -> None:
+        """Removes the cached images of a voucher."""
+        for path in glob.glob(os.path.join(cls.DIRECTORY, f'{glob.escape(code)}-*.jpg')):
+            with suppress(FileNotFoundError):
+                os.remove(path)
 
-    x2 = 920
-    y2 = 135
-    font3 = ImageFont.truetype(font_location, size=45)
-    draw.text((x2, y2), karma, fill=(255, 255, 255), font=font3)
+    @classmethod
+    def purge(cls) -> int:
+        """Removes images unused for MAX_AGE, then the least recently used above MAX_SIZE."""
+        try:
+            entries = [entry for entry in os.scandir(cls.DIRECTORY) if entry.is_file()]
+        except FileNotFoundError:
+            return 0
 
-    x3 = 135
-    y3 = 135
-    font3 = ImageFont.truetype(font_location, size=20)
-    draw.text((x3, y3), code, fill=(255, 255, 255), font=font3)
+        expires_at = time.time() - cls.MAX_AGE.total_seconds()
+        total_size = removed = 0
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime, reverse=True):
+            stat = entry.stat()
+            total_size += stat.st_size
+            if stat.st_mtime < expires_at or total_size > cls.MAX_SIZE:
+                with suppress(FileNotFoundError):
+                    os.remove(entry.path)
+                    removed += 1
+        return removed
 
-    x3 = 135
-    y3 = 375
-    font3 = ImageFont.truetype(font_location, size=30)
-    draw.text((x3, y3), month, fill=(255, 255, 255), font=font3)
+    @classmethod
+    def render_many(cls, vouchers):
+        """
+        Yields (voucher, JPEG) for every voucher, cached ones first and the
+        rest as they are drawn, in order.
+        """
+        missing = []
+        for voucher in vouchers:
+            if (image_data := cls.read(voucher)) is None:
+                missing.append(voucher)
+            else:
+                yield voucher, image_data
+        if not missing:
+            return
 
-    image_data = BytesIO()
-    image.save(image_data, format='JPEG')
-    return image_data
+        executor = None
+        if len(missing) < cls.POOL_THRESHOLD:
+            rendered = map(voucher_image.render, missing)
+        else:
+            workers = min(cls.WORKERS, len(missing))
+            executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+            )
+            rendered = executor.map(
+                voucher_image.render, missing, chunksize=max(1, len(missing) // (workers * 4))
+            )
 
+        done = 0
+        try:
+            for voucher, image_data in zip(missing, rendered):
+                cls.write(voucher, image_data)
+                done += 1
+                yield voucher, image_data
+        except BrokenProcessPool as e:
+            logger.error(f"Voucher render pool died, drawing in process: {e}")
+            for voucher in missing[done:]:
+                image_data = voucher_image.render(voucher)
+                cls.write(voucher, image_data)
+                yield voucher, image_data
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
 
-def generate_ordered_id(count):
-    day = time.strftime('%d')
-    month = time.strftime('%m')
-    year = time.strftime('%y')
+
+def get_code_prefix(date: datetime.date = None):
+    date = date or datetime.date.today()
+    return f'P{date:%d%m%y}'
+
+
+def generate_ordered_id(count, date: datetime.date = None):
     serial = str(count).zfill(4)
-    ordered_id = f'P{day}{month}{year}{serial}'
+    ordered_id = f'{get_code_prefix(date)}{serial}'
     return ordered_id
+
+
+class VoucherCodeAllocator:
+    """
+    Hands out voucher codes, P<ddmmyy><serial>, from one sequence row per day.
+
+    `reserve` takes a block of serials with a single UPDATE value = value + n,
+    so an import of any size costs the same two statements and concurrent
+    imports on other workers get disjoint blocks: the row lock taken by the
+    UPDATE keeps them waiting until the block is read back. A day's row
+    starts after the highest serial voucher_log already holds for that day.
+    Serials of a block whose vouchers are not saved are not reused.
+    """
+
+    @staticmethod
+    def get_seed(date: datetime.date) -> int:
+        prefix = get_code_prefix(date)
+        serials = [
+            int(code[len(prefix):])
+            for code in VoucherLog.objects.filter(code__startswith=prefix).values_list(
+                "code", flat=True
+            )
+            if code[len(prefix):].isdigit()
+        ]
+        return max(serials, default=0)
+
+    @classmethod
+    def reserve(cls, count: int, date: datetime.date = None) -> list:
+        """Returns `count` unused codes of the day, in order."""
+        if count <= 0:
+            return []
+
+        date = date or datetime.date.today()
+        sequence = VoucherSequence.objects.filter(day=date)
+        if not sequence.exists():
+            try:
+                with transaction.atomic():
+                    VoucherSequence.objects.create(day=date, value=cls.get_seed(date))
+            except IntegrityError:
+                pass
+
+        with transaction.atomic():
+            sequence.update(value=F("value") + count)
+            last = sequence.values_list("value", flat=True).get()
+
+        return [generate_ordered_id(serial, date) for serial in range(last - count + 1, last + 1)]
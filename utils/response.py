@@ -99,18 +99,22 @@ class CustomResponse:
             status=status.HTTP_403_FORBIDDEN,
         )
 
-    def paginated_response(self, data: dict, pagination: dict) -> Response:
+    def paginated_response(self, data: dict, pagination: dict, fields: list = None) -> Response:
         """
         Generates a paginated response.
 
         Args:
             data (dict): The data to be included in the response.
             pagination (dict): The pagination details.
+            fields (list, optional): The only keys to keep in each row, as
+                returned by `CommonUtils.get_sparse_fields`. Defaults to every key.
 
         Returns:
             Response: The generated paginated response.
 
         """
+        if fields and data and any(key in data[0] for key in fields):
+            data = [{key: row[key] for key in fields if key in row} for row in data]
 
         self.response.update({"data": data, "pagination": pagination})
         return Response(
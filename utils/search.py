@@ -0,0 +1,180 @@
+import re
+import uuid
+
+from django.db import connection, transaction
+from django.db.models import FloatField, OuterRef, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.db.models.query import ModelIterable
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from db.learning_circle import LearningCircle
+from db.organization import Organization
+from db.search import SearchDocument
+from db.task import TaskList, UserLvlLink
+from db.user import User
+
+
+class SearchIndex:
+    """
+    Full-text search over one maintained document per task, user, organization
+    and learning circle.
+
+    A document concatenates the fields listed in DOCUMENTS and sits under a
+    MySQL FULLTEXT index built with the ngram parser, so any NGRAM_SIZE
+    characters of a field can be looked up, not only word prefixes. Documents
+    are rewritten when their row or the user's level link is saved through
+    this service; names changed on related rows are picked up by
+    `build_search_index`.
+
+    Rows written by `bulk_create`, `.update()` or the Discord bot can have no
+    document or a stale one, so the index never decides which rows match: the
+    caller's `icontains` filter does, and `search` only orders those rows by
+    relevance. It only answers when every field the view searches is part of
+    the document and the model has documents, otherwise it returns None.
+    """
+
+    DOCUMENTS = {
+        TaskList: [
+            "hashtag",
+            "title",
+            "description",
+            "channel__name",
+            "type__title",
+            "level__name",
+            "org__title",
+            "ig__name",
+            "event",
+            "updated_by__full_name",
+            "created_by__full_name",
+        ],
+        User: [
+            "muid",
+            "full_name",
+            "email",
+            "mobile",
+            "user_lvl_link_user__level__name",
+        ],
+        Organization: [
+            "title",
+            "code",
+            "affiliation__title",
+            "district__name",
+            "district__zone__name",
+            "district__zone__state__name",
+            "district__zone__state__country__name",
+        ],
+        LearningCircle: ["name", "circle_code", "ig__name", "org__title"],
+    }
+    # ngram_token_size, shorter words cannot be looked up
+    NGRAM_SIZE = 2
+    BATCH_SIZE = 1000
+    MATCH = "MATCH (content) AGAINST (%s IN BOOLEAN MODE)"
+
+    @staticmethod
+    def get_entity(model) -> str:
+        return model._meta.db_table
+
+    @classmethod
+    def is_enabled(cls, model) -> bool:
+        return connection.vendor == "mysql" and model in cls.DOCUMENTS
+
+    @classmethod
+    def refresh(cls, model, ids=None) -> int:
+        """Rewrites the documents of the given rows, or of every row when `ids` is None."""
+        entity = cls.get_entity(model)
+        rows = model.objects.all() if ids is None else model.objects.filter(pk__in=ids)
+        fields = cls.DOCUMENTS[model]
+
+        documents = [
+            SearchDocument(
+                id=uuid.uuid4(),
+                entity=entity,
+                entity_id=pk,
+                content=" ".join(str(value) for value in values if value not in (None, "")),
+            )
+            for pk, *values in rows.values_list("pk", *fields).iterator(
+                chunk_size=cls.BATCH_SIZE
+            )
+        ]
+
+        with transaction.atomic():
+            stale = SearchDocument.objects.filter(entity=entity)
+            if ids is not None:
+                stale = stale.filter(entity_id__in=ids)
+            stale.delete()
+            SearchDocument.objects.bulk_create(documents, batch_size=cls.BATCH_SIZE)
+
+        return len(documents)
+
+    @classmethod
+    def rebuild(cls) -> dict:
+        return {cls.get_entity(model): cls.refresh(model) for model in cls.DOCUMENTS}
+
+    @classmethod
+    def get_query(cls, search_query: str) -> str | None:
+        """Returns a boolean mode query for documents holding every word of the search."""
+        terms = [
+            term for term in re.findall(r"\w+", search_query) if len(term) >= cls.NGRAM_SIZE
+        ]
+        if not terms:
+            return None
+        return " ".join(f'+"{term}"' for term in terms)
+
+    @classmethod
+    def search(cls, queryset, search_fields, search_query: str):
+        """
+        Returns the queryset, already filtered by `search_query`, with its
+        rows ordered most relevant first, or None when the index cannot rank
+        the search. Rows without a matching document are kept, last.
+        """
+        model = queryset.model
+        if not cls.is_enabled(model) or not (query := cls.get_query(search_query)):
+            return None
+        if not search_fields or not set(search_fields) <= set(cls.DOCUMENTS[model]):
+            return None
+        # annotating a values() queryset would add search_rank to its rows
+        if queryset._iterable_class is not ModelIterable:
+            return None
+
+        documents = SearchDocument.objects.filter(entity=cls.get_entity(model))
+        # an unbuilt index ranks nothing
+        if not documents.exists():
+            return None
+
+        return queryset.annotate(
+            search_rank=Coalesce(
+                Subquery(
+                    documents.filter(entity_id=OuterRef("pk"))
+                    .annotate(score=RawSQL(cls.MATCH, [query], output_field=FloatField()))
+                    .values("score")[:1]
+                ),
+                Value(0.0),
+            )
+        ).order_by("-search_rank", *queryset.query.order_by)
+
+
+@receiver(post_save, sender=TaskList)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Organization)
+@receiver(post_save, sender=LearningCircle)
+def search_document_saved(sender, instance, **kwargs):
+    SearchIndex.refresh(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=TaskList)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Organization)
+@receiver(post_delete, sender=LearningCircle)
+def search_document_deleted(sender, instance, **kwargs):
+    SearchDocument.objects.filter(
+        entity=SearchIndex.get_entity(sender), entity_id=instance.pk
+    ).delete()
+
+
+@receiver(post_save, sender=UserLvlLink)
+@receiver(post_delete, sender=UserLvlLink)
+def search_level_link_changed(sender, instance, **kwargs):
+    # the user's document holds the name of their level
+    SearchIndex.refresh(User, [instance.user_id])
@@ -146,3 +146,32 @@ DEFAULT_HACKATHON_FORM_FIELDS = {
     'linkedin': 'input',
     'bio': 'input',
 }
+
+
+class LeaderboardType(Enum):
+    STUDENT = 'Student'
+    COLLEGE = 'College'
+
+
+class RollupScope(Enum):
+    ORGANIZATION = 'Organization'
+    DISTRICT = 'District'
+    ZONE = 'Zone'
+    STATE = 'State'
+
+
+class ApprovalType(Enum):
+    PEER = 'peer'
+    APPRAISER = 'appraiser'
+
+    @classmethod
+    def get_all_values(cls):
+        return [member.value for member in cls]
+
+
+class ExportStatus(Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    EXPIRED = 'expired'
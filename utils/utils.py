@@ -1,20 +1,40 @@
+import base64
+import codecs
 import csv
 import datetime
-import gzip
+import hashlib
 import io
+import itertools
+import json
+import logging
+import math
+import re
+import tempfile
+import zlib
 from datetime import timedelta
 
 import openpyxl
 import pytz
+import redis
 import requests
+from asgiref.sync import sync_to_async
 from decouple import config
 from django.conf import settings
 from django.core.mail import EmailMessage, send_mail
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import Q
-from django.db.models.query import QuerySet
-from django.http import HttpResponse
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.query import ModelIterable, QuerySet
+from django.http import StreamingHttpResponse
 from django.template.loader import render_to_string
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from redis.exceptions import RedisError
+from rest_framework import serializers
+
+from utils.search import SearchIndex
+
+logger = logging.getLogger("django")
 
 
 class CommonUtils:
@@ -36,6 +56,12 @@ class CommonUtils:
             - sort_fields (dict, optional): A dictionary mapping sort fields. Defaults to None.
             - is_pagination (bool, optional): Flag indicating whether pagination should be applied. Defaults to True.
 
+        Passing a `cursor` query parameter (empty for the first page) switches to
+        keyset pagination, see `KeysetPaginator`; querysets it cannot page keep
+        using page numbers. The `countMode` query parameter picks how the total
+        is counted, see `QueryCount`. Searches the full-text index can answer
+        are ordered most relevant first, see `SearchIndex`.
+
         Returns:
             - QuerySet or dict: The paginated queryset or a dictionary containing the paginated queryset and pagination information.
         """
@@ -53,6 +79,11 @@ class CommonUtils:
                 query |= Q(**{f"{field}__icontains": search_query})
 
             queryset = queryset.filter(query)
+            if (
+                isinstance(queryset, QuerySet)
+                and (ranked := SearchIndex.search(queryset, search_fields, search_query)) is not None
+            ):
+                queryset = ranked
 
         if sort_by:
             sort = sort_by[1:] if sort_by.startswith("-") else sort_by
@@ -61,49 +92,533 @@ class CommonUtils:
                     sort_field_name = f"-{sort_field_name}"
 
                 queryset = queryset.order_by(sort_field_name)
-        if is_pagination:
-            paginator = Paginator(queryset, per_page)
-            try:
-                queryset = paginator.page(page)
-            except PageNotAnInteger:
-                queryset = paginator.page(1)
-            except EmptyPage:
-                queryset = paginator.page(paginator.num_pages)
 
+        if not is_pagination:
+            return queryset
+
+        count_mode = QueryCount.get_mode(request)
+
+        if "cursor" in request.query_params and (
+            sort_field := KeysetPaginator.get_sort_field(queryset)
+        ):
+            keyset_page = KeysetPaginator(queryset, sort_field, per_page).get_page(
+                request.query_params.get("cursor")
+            )
+            count = QueryCount.count(queryset, count_mode)
+            return {
+                "queryset": keyset_page["rows"],
+                "pagination": {
+                    "count": count,
+                    "totalPages": None if count is None else math.ceil(count / per_page),
+                    "isNext": keyset_page["next_cursor"] is not None,
+                    "isPrev": keyset_page["prev_cursor"] is not None,
+                    "nextPage": None,
+                    "nextCursor": keyset_page["next_cursor"],
+                    "prevCursor": keyset_page["prev_cursor"],
+                },
+            }
+
+        if count_mode != QueryCount.EXACT:
+            # without an exact count a page past the end cannot be detected up
+            # front, so one extra row is read to tell whether a next page exists
+            page = max(page, 1)
+            rows = list(queryset[(page - 1) * per_page: page * per_page + 1])
+            count = QueryCount.count(queryset, count_mode)
+            is_next = len(rows) > per_page
             return {
-                "queryset": queryset,
+                "queryset": rows[:per_page],
                 "pagination": {
-                    "count": paginator.count,
-                    "totalPages": paginator.num_pages,
-                    "isNext": queryset.has_next(),
-                    "isPrev": queryset.has_previous(),
-                    "nextPage": queryset.next_page_number()
-                    if queryset.has_next()
-                    else None,
+                    "count": count,
+                    "totalPages": None if count is None else math.ceil(count / per_page),
+                    "isNext": is_next,
+                    "isPrev": page > 1,
+                    "nextPage": page + 1 if is_next else None,
                 },
             }
 
-        return queryset
+        paginator = Paginator(queryset, per_page)
+        paginator.count = QueryCount.count(queryset, count_mode)
+        try:
+            queryset = paginator.page(page)
+        except PageNotAnInteger:
+            queryset = paginator.page(1)
+        except EmptyPage:
+            queryset = paginator.page(paginator.num_pages)
+
+        return {
+            "queryset": queryset,
+            "pagination": {
+                "count": paginator.count,
+                "totalPages": paginator.num_pages,
+                "isNext": queryset.has_next(),
+                "isPrev": queryset.has_previous(),
+                "nextPage": queryset.next_page_number()
+                if queryset.has_next()
+                else None,
+            },
+        }
+
+    @staticmethod
+    def get_sparse_fields(request) -> list | None:
+        """Returns the field names asked for with `?fields=a,b,c`, or None for every field."""
+        fields = [
+            field.strip()
+            for field in request.query_params.get("fields", "").split(",")
+            if field.strip()
+        ]
+        return fields or None
+
+    @staticmethod
+    def serialize_in_chunks(
+        queryset, serializer_class, context: dict = None, chunk_size: int = 2000
+    ) -> "SerializedRows":
+        return SerializedRows(queryset, serializer_class, context, chunk_size)
 
     @staticmethod
-    def generate_csv(queryset: QuerySet, csv_name: str) -> HttpResponse:
-        response = HttpResponse(content_type="text/csv")
+    def generate_csv(rows, csv_name: str) -> StreamingHttpResponse:
+        exporter = CSVExporter(rows)
+        response = ThreadedStreamingHttpResponse(exporter.stream(), content_type="text/csv")
         response["Content-Disposition"] = f'attachment; filename="{csv_name}.csv"'
-        fieldnames = list(queryset[0].keys())
-        writer = csv.DictWriter(response, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(queryset)
-
-        compressed_response = HttpResponse(
-            gzip.compress(response.content),
-            content_type="text/csv",
+        response["Content-Encoding"] = "gzip"
+        # lets export jobs follow the progress of the stream
+        response.exporter = exporter
+
+        return response
+
+    @staticmethod
+    def generate_xlsx(sheets: dict, xlsx_name: str) -> StreamingHttpResponse:
+        exporter = XLSXExporter(sheets)
+        response = ThreadedStreamingHttpResponse(
+            exporter.stream(), content_type=XLSXExporter.CONTENT_TYPE
         )
-        compressed_response[
-            "Content-Disposition"
-        ] = f'attachment; filename="{csv_name}.csv"'
-        compressed_response["Content-Encoding"] = "gzip"
+        response["Content-Disposition"] = f'attachment; filename="{xlsx_name}.xlsx"'
+        response.exporter = exporter
+
+        return response
 
-        return compressed_response
+    @staticmethod
+    def generate_export(request, rows, name: str, extra_sheets: dict = None):
+        """
+        Returns the rows as a gzipped CSV, or as an XLSX workbook with
+        `?format=xlsx`. `extra_sheets` maps sheet titles to rows placed ahead
+        of the main sheet in the workbook; CSV leaves them out, so pass them
+        lazily (e.g. with `serialize_in_chunks`) to avoid loading them there.
+        """
+        if request.query_params.get("format") == XLSXExporter.FORMAT:
+            return CommonUtils.generate_xlsx({**(extra_sheets or {}), name: rows}, name)
+        return CommonUtils.generate_csv(rows, name)
+
+
+class SerializedRows:
+    """
+    The serialized rows of a queryset, loaded with `iterator()` and serialized
+    `chunk_size` rows at a time while they are iterated. Lists are serialized
+    the same way.
+    """
+
+    def __init__(
+        self, queryset, serializer_class, context: dict = None, chunk_size: int = 2000
+    ):
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self.context = context or {}
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        rows = (
+            self.queryset.iterator(chunk_size=self.chunk_size)
+            if isinstance(self.queryset, QuerySet)
+            else iter(self.queryset)
+        )
+        while chunk := list(itertools.islice(rows, self.chunk_size)):
+            yield from self.serializer_class(
+                chunk, many=True, context=self.context
+            ).data
+
+    def count(self) -> int:
+        if isinstance(self.queryset, QuerySet):
+            return QueryCount.get_exact(self.queryset)
+        return len(self.queryset)
+
+
+class ThreadedStreamingHttpResponse(StreamingHttpResponse):
+    """
+    Streams a synchronous iterator without buffering it under ASGI.
+
+    Django serves the synchronous iterator of a StreamingHttpResponse over
+    ASGI by collecting it with sync_to_async(list), so the whole body sits in
+    memory before the first byte is sent. This response pulls CHUNKS parts at
+    a time instead, each batch on the thread that owns the request's database
+    connection. Synchronous consumers (WSGI, export jobs) iterate it as usual.
+    """
+
+    CHUNKS = 16
+
+    async def __aiter__(self):
+        if self.is_async:
+            async for part in super().__aiter__():
+                yield part
+            return
+
+        iterator = iter(self.streaming_content)
+        next_parts = sync_to_async(lambda: list(itertools.islice(iterator, self.CHUNKS)))
+        while parts := await next_parts():
+            for part in parts:
+                yield part
+
+
+class CSVExporter:
+    """
+    Writes rows to a gzip-compressed CSV a block at a time.
+
+    The header comes from the keys of the first row. Rows go to a text buffer
+    that is compressed and handed on once it holds BUFFER_SIZE characters,
+    so an export keeps one block in memory instead of the whole file. The
+    first block is sent as soon as the header and first row are written, and
+    every block is sync-flushed so the client can decompress it on arrival.
+    """
+
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.rows_written = 0
+
+    @staticmethod
+    def count_rows(rows) -> int | None:
+        """Returns the number of rows to write, or None for a plain iterator."""
+        if isinstance(rows, SerializedRows):
+            return rows.count()
+        return len(rows) if hasattr(rows, "__len__") else None
+
+    def count(self) -> int | None:
+        return self.count_rows(self.rows)
+
+    def stream(self):
+        buffer = io.StringIO()
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+        writer = None
+
+        for row in self.rows:
+            first = writer is None
+            if first:
+                writer = csv.DictWriter(buffer, fieldnames=list(row.keys()))
+                writer.writeheader()
+            writer.writerow(row)
+            self.rows_written += 1
+
+            if first or buffer.tell() >= self.BUFFER_SIZE:
+                yield compressor.compress(
+                    buffer.getvalue().encode()
+                ) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield compressor.compress(buffer.getvalue().encode()) + compressor.flush()
+
+
+class XLSXExporter:
+    """
+    Writes sheets of rows to an XLSX workbook in openpyxl's write-only mode.
+
+    Write-only sheets pass each appended row on to a temporary file instead
+    of keeping cells, and the workbook is zipped into another temporary file
+    that is then sent BLOCK_SIZE bytes at a time, so memory stays flat
+    whatever the number of rows. A zip can only be read once it is complete,
+    so unlike CSV the download starts after the whole workbook is written.
+    """
+
+    FORMAT = "xlsx"
+    CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    BLOCK_SIZE = 64 * 1024
+    MAX_TITLE_LENGTH = 31
+
+    def __init__(self, sheets: dict):
+        self.sheets = sheets
+        self.rows_written = 0
+        # called after every row, the stream has nothing to show until the end
+        self.on_row = None
+
+    def count(self) -> int | None:
+        counts = [CSVExporter.count_rows(rows) for rows in self.sheets.values()]
+        return None if None in counts else sum(counts)
+
+    @classmethod
+    def get_title(cls, title: str) -> str:
+        return re.sub(r"[\\/*?:\[\]]", " ", title)[: cls.MAX_TITLE_LENGTH]
+
+    @staticmethod
+    def get_value(value):
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value, default=str)
+        if isinstance(value, str):
+            return ILLEGAL_CHARACTERS_RE.sub("", value)
+        return value
+
+    def save(self, file) -> None:
+        workbook = openpyxl.Workbook(write_only=True)
+        for title, rows in self.sheets.items():
+            sheet = workbook.create_sheet(self.get_title(title))
+            header = None
+            for row in rows:
+                if header is None:
+                    header = list(row.keys())
+                    sheet.append(header)
+                sheet.append([self.get_value(row.get(name)) for name in header])
+                self.rows_written += 1
+                if self.on_row:
+                    self.on_row()
+        workbook.save(file)
+
+    def stream(self):
+        with tempfile.TemporaryFile() as file:
+            self.save(file)
+            file.seek(0)
+            while block := file.read(self.BLOCK_SIZE):
+                yield block
+
+
+class SparseFieldsMixin:
+    """
+    Lets a serializer return only the fields listed in `context["fields"]`.
+
+    `prune_queryset` narrows the queryset to the columns and joins the kept
+    fields read, so payload and query shrink together. Method fields read
+    whatever their method touches; list their lookups in
+    `Meta.sparse_field_sources`, otherwise the queryset is left whole
+    whenever one of them is asked for.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields := self.get_kept_fields(self.fields, self.context.get("fields")):
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @staticmethod
+    def get_kept_fields(serializer_fields, fields) -> list | None:
+        """Returns the requested fields the serializer has, or None to keep them all."""
+        return [name for name in fields or () if name in serializer_fields] or None
+
+    @classmethod
+    def prune_queryset(cls, queryset: QuerySet, fields) -> QuerySet:
+        serializer_fields = cls().fields
+        if not (fields := cls.get_kept_fields(serializer_fields, fields)):
+            return queryset
+
+        method_sources = getattr(cls.Meta, "sparse_field_sources", {})
+        paths = set()
+        for name in fields:
+            field = serializer_fields[name]
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in method_sources:
+                    return queryset
+                paths.update(method_sources[name])
+            elif field.source == "*" or isinstance(field, serializers.BaseSerializer):
+                return queryset
+            else:
+                paths.add(field.source.replace(".", "__"))
+
+        relations = {path.rsplit("__", 1)[0] for path in paths if "__" in path}
+        return queryset.select_related(None).select_related(*relations).only(
+            *(paths or ["pk"])
+        )
+
+
+class QueryCount:
+    """
+    Counts the rows of a paginated list the way the `countMode` query parameter asks.
+
+    - exact (default): COUNT(*), cached in redis for CACHE_TIMEOUT under the
+      hash of the list's SQL, so flipping pages of the same view, filter and
+      search counts once.
+    - approx: the row estimate from MySQL table statistics when the list is a
+      whole table, the cached exact count otherwise.
+    - none: no count, the pagination block only tells whether pages follow.
+    """
+
+    EXACT = "exact"
+    APPROX = "approx"
+    NONE = "none"
+    MODES = (EXACT, APPROX, NONE)
+    CACHE_TIMEOUT = 60
+
+    @classmethod
+    def get_mode(cls, request) -> str:
+        mode = request.query_params.get("countMode", cls.EXACT)
+        return mode if mode in cls.MODES else cls.EXACT
+
+    @classmethod
+    def count(cls, queryset, mode: str = EXACT) -> int | None:
+        if mode == cls.NONE:
+            return None
+        if not isinstance(queryset, QuerySet):
+            return len(queryset)
+        if mode == cls.APPROX and (estimate := cls.get_estimate(queryset)) is not None:
+            return estimate
+        return cls.get_exact(queryset)
+
+    @staticmethod
+    def get_estimate(queryset: QuerySet) -> int | None:
+        """Returns the table statistics row estimate of an unfiltered queryset."""
+        query = queryset.query
+        if (
+            connection.vendor != "mysql"
+            or query.where
+            or query.distinct
+            or query.group_by is not None
+            or query.combinator
+        ):
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    @classmethod
+    def get_exact(cls, queryset: QuerySet) -> int:
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+
+        key = f"count:{hashlib.sha1(f'{sql}{params}'.encode()).hexdigest()}"
+        try:
+            client = RedisUtils.get_client()
+            if (cached := client.get(key)) is not None:
+                return int(cached)
+
+            count = queryset.count()
+            client.set(key, count, ex=cls.CACHE_TIMEOUT)
+            return count
+
+        except RedisError as e:
+            logger.error(f"List count cache unavailable: {e}")
+            return queryset.count()
+
+
+class KeysetPaginator:
+    """
+    Pages a queryset by its sort field and primary key instead of an OFFSET.
+
+    Every page filters past the edge row of the page before it, so page N
+    costs the same as page 1. Rows sharing a sort value are ordered by primary
+    key. Cursors are opaque strings holding the sort field, the edge row and
+    the direction; a cursor that cannot be read or belongs to another sort
+    order returns the first page, the same way an invalid page number does.
+    """
+
+    KEY = "_cursor_key"
+    PK = "_cursor_pk"
+
+    def __init__(self, queryset: QuerySet, sort_field: str, per_page: int):
+        self.descending = sort_field.startswith("-")
+        self.sort_field = sort_field
+        self.per_page = per_page
+        self.queryset = queryset.annotate(
+            **{self.KEY: F(sort_field.lstrip("-")), self.PK: F("pk")}
+        )
+
+    @staticmethod
+    def get_sort_field(queryset) -> str | None:
+        """
+        Returns the field the queryset is ordered by first, or None when it
+        cannot be keyset paginated: lists, grouped or distinct value querysets
+        and orderings by expressions.
+        """
+        if not isinstance(queryset, QuerySet) or queryset.query.group_by is not None:
+            return None
+        if queryset.query.distinct and queryset._iterable_class is not ModelIterable:
+            return None
+
+        ordering = queryset.query.order_by or (
+            queryset.model._meta.ordering if queryset.query.default_ordering else ()
+        )
+        if not ordering:
+            return "pk"
+        if isinstance(ordering[0], str) and ordering[0] != "?":
+            return ordering[0]
+        return None
+
+    def encode_cursor(self, row, backwards: bool) -> str:
+        value, pk = self.get_position(row)
+        return base64.urlsafe_b64encode(
+            json.dumps(
+                [self.sort_field, value, pk, backwards],
+                default=lambda o: o.isoformat() if hasattr(o, "isoformat") else str(o),
+            ).encode()
+        ).decode()
+
+    def decode_cursor(self, cursor: str):
+        try:
+            sort_field, value, pk, backwards = json.loads(
+                base64.urlsafe_b64decode(cursor.encode())
+            )
+        except (TypeError, ValueError):
+            return None
+        return (value, pk, backwards) if sort_field == self.sort_field else None
+
+    def get_position(self, row) -> tuple:
+        if isinstance(row, dict):
+            return row[self.KEY], row[self.PK]
+        return getattr(row, self.KEY), getattr(row, self.PK)
+
+    def get_ordering(self, descending: bool) -> list:
+        if descending:
+            return [F(self.KEY).desc(nulls_last=True), F(self.PK).desc()]
+        return [F(self.KEY).asc(nulls_first=True), F(self.PK).asc()]
+
+    def get_filter(self, value, pk, descending: bool) -> Q:
+        """Matches the rows after (value, pk) in the given direction."""
+        if descending:
+            if value is None:
+                return Q(**{f"{self.KEY}__isnull": True, f"{self.PK}__lt": pk})
+            return (
+                Q(**{f"{self.KEY}__lt": value})
+                | Q(**{self.KEY: value, f"{self.PK}__lt": pk})
+                | Q(**{f"{self.KEY}__isnull": True})
+            )
+
+        if value is None:
+            return Q(**{f"{self.KEY}__isnull": True, f"{self.PK}__gt": pk}) | Q(
+                **{f"{self.KEY}__isnull": False}
+            )
+        return Q(**{f"{self.KEY}__gt": value}) | Q(
+            **{self.KEY: value, f"{self.PK}__gt": pk}
+        )
+
+    def get_page(self, cursor: str = None) -> dict:
+        position = self.decode_cursor(cursor) if cursor else None
+        backwards = bool(position and position[2])
+        descending = self.descending != backwards
+
+        queryset = self.queryset.order_by(*self.get_ordering(descending))
+        if position:
+            queryset = queryset.filter(self.get_filter(position[0], position[1], descending))
+
+        rows = list(queryset[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+
+        is_next = True if backwards else has_more
+        is_prev = has_more if backwards else position is not None
+        page = {
+            "rows": rows,
+            "next_cursor": self.encode_cursor(rows[-1], False) if rows and is_next else None,
+            "prev_cursor": self.encode_cursor(rows[0], True) if rows and is_prev else None,
+        }
+
+        for row in rows:
+            if isinstance(row, dict):
+                del row[self.KEY], row[self.PK]
+        return page
 
 
 class DateTimeUtils:
@@ -147,6 +662,27 @@ class DateTimeUtils:
         return start_date, end_date
 
 
+class RedisUtils:
+    """
+    Shares a single lazily created connection pool to the application redis database.
+    """
+
+    _client = None
+
+    @classmethod
+    def get_client(cls) -> redis.Redis:
+        if cls._client is None:
+            cls._client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                socket_timeout=1,
+                socket_connect_timeout=1,
+                decode_responses=True,
+            )
+        return cls._client
+
+
 class _CustomHTTPHandler:
     @staticmethod
     def get_client_ip_address(request):
@@ -177,19 +713,99 @@ class DiscordWebhooks:
 
 
 class ImportCSV:
-    def read_excel_file(self, file_obj):
-        workbook = openpyxl.load_workbook(filename=io.BytesIO(file_obj.read()))
-        sheet = workbook.active
+    """
+    Reads the rows of an uploaded XLSX or CSV file one at a time.
+
+    Workbooks are opened in read-only mode, which parses the sheet as it is
+    iterated instead of loading every cell, and CSV files are decoded line by
+    line. The header row is read once; every following non-empty row becomes
+    a dict keyed by it. CSV cells that spell a number become an int or float,
+    as the same cell would in a workbook. Rows that cannot be read (values
+    outside the header, Excel error values, bytes that are not UTF-8) are not
+    yielded but collected in `errors` with an "error" message, the same shape
+    the import views report their own rejected rows in.
+    """
 
-        rows = []
-        for row in sheet.iter_rows(values_only=True):
-            row_dict = {
-                header.value: cell_value for header, cell_value in zip(sheet[1], row)
-            }
-            rows.append(row_dict)
-        workbook.close()
+    EXCEL_ERRORS = {"#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A"}
+    # numbers without leading zeros, which a workbook would keep as text
+    INTEGER = re.compile(r"-?(0|[1-9]\d*)")
+    DECIMAL = re.compile(r"-?(0|[1-9]\d*)\.\d+")
 
-        return rows
+    def __init__(self):
+        self.errors = []
+
+    @staticmethod
+    def is_csv(file_obj) -> bool:
+        return getattr(file_obj, "name", "").lower().endswith(".csv") or getattr(
+            file_obj, "content_type", None
+        ) in ("text/csv", "application/csv")
+
+    @classmethod
+    def get_csv_value(cls, value: str):
+        if value == "":
+            return None
+        if cls.INTEGER.fullmatch(value):
+            return int(value)
+        if cls.DECIMAL.fullmatch(value):
+            return float(value)
+        return value
+
+    def iter_sheet(self, file_obj):
+        """Yields the values of every row, header included."""
+        if self.is_csv(file_obj):
+            file_obj.seek(0)
+            for values in csv.reader(
+                codecs.iterdecode(file_obj, "utf-8-sig", errors="replace")
+            ):
+                yield [self.get_csv_value(value) for value in values]
+            return
+
+        workbook = openpyxl.load_workbook(filename=file_obj, read_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    def get_error(self, headers: list, values) -> str | None:
+        if any(value is not None for value in values[len(headers):]):
+            return "has values outside the header columns"
+        for header, value in zip(headers, values):
+            if isinstance(value, str):
+                if value in self.EXCEL_ERRORS:
+                    return f"has {value} in {header}"
+                if "\ufffd" in value:
+                    return f"has text that is not UTF-8 in {header}"
+        return None
+
+    def read_rows(self, file_obj):
+        """
+        Returns the header and a generator of the rows after it. The header is
+        None for an empty file.
+        """
+        sheet = self.iter_sheet(file_obj)
+        if (header := next(sheet, None)) is None:
+            return None, iter(())
+
+        headers = [value.strip() if isinstance(value, str) else value for value in header]
+
+        def rows():
+            for number, values in enumerate(sheet, start=2):
+                if all(value is None for value in values):
+                    continue
+                row = dict(zip(headers, values))
+                if error := self.get_error(headers, values):
+                    self.errors.append(row | {"error": f"Row {number} {error}"})
+                    continue
+                yield row
+
+        return headers, rows()
+
+    def read_excel_file(self, file_obj):
+        """Returns the header row followed by every readable row, as one list."""
+        headers, rows = self.read_rows(file_obj)
+        if headers is None:
+            return []
+        return [dict(zip(headers, headers)), *rows]
 
 
 def send_template_mail(
@@ -0,0 +1,42 @@
+import functools
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Nothing here may import Django: the workers of VoucherRenderer's pool are
+# spawned and only import this module.
+
+image_location = './api/dashboard/karma_voucher/assets/karmacard.png'
+font_location = './api/dashboard/karma_voucher/fonts/Roboto-Light.ttf'
+
+# (field, font size, position)
+LAYOUT = [
+    ('name', 60, (135, 250)),
+    ('hashtag', 45, (135, 450)),
+    ('karma', 45, (920, 135)),
+    ('code', 20, (135, 135)),
+    ('month', 30, (135, 375)),
+]
+
+
+@functools.cache
+def get_base_image():
+    with Image.open(image_location) as image:
+        return image.convert('RGB')
+
+
+@functools.cache
+def get_font(size: int):
+    return ImageFont.truetype(font_location, size=size)
+
+
+def render(voucher: dict) -> bytes:
+    """Draws the LAYOUT fields of a voucher on the base card and returns the JPEG."""
+    image = get_base_image().copy()
+    draw = ImageDraw.Draw(image)
+    for field, size, position in LAYOUT:
+        draw.text(position, voucher[field], fill=(255, 255, 255), font=get_font(size))
+
+    image_data = BytesIO()
+    image.save(image_data, format='JPEG')
+    return image_data.getvalue()